@@ -4,18 +4,35 @@ from __future__ import annotations
 
 import logging
 
+import homeassistant.helpers.config_validation as cv
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.device_registry import DeviceEntry, format_mac
+from homeassistant.helpers.typing import ConfigType
 
 from .const import DOMAIN
 from .device import ElroConnectsK1
+from .interlink import async_setup_interlink
+from .metrics import ElroConnectsMetricsView
+from .services import async_setup_services
+from .websocket_api import async_setup_websocket_api
 
 _LOGGER = logging.getLogger(__name__)
 
 _PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.SIREN, Platform.SWITCH]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Elro Connects integration."""
+    async_setup_services(hass)
+    async_setup_interlink(hass)
+    async_setup_websocket_api(hass)
+    hass.http.register_view(ElroConnectsMetricsView)
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Elro Connects from a config entry."""
@@ -25,9 +42,11 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = elro_connects_api
 
-    await elro_connects_api.async_config_entry_first_refresh()
+    await elro_connects_api.async_first_refresh()
     await hass.config_entries.async_forward_entry_setups(entry, _PLATFORMS)
 
+    entry.async_on_unload(elro_connects_api.async_start_heartbeat())
+
     entry.async_on_unload(
         entry.add_update_listener(elro_connects_api.async_update_settings)
     )
@@ -38,7 +57,10 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     elro_connects_api: ElroConnectsK1 = hass.data[DOMAIN][entry.entry_id]
+    elro_connects_api.async_cancel_commands()
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, _PLATFORMS):
+        elro_connects_api.async_stop_profile()
+        await elro_connects_api.async_stop_capture()
         await elro_connects_api.async_disconnect()
         hass.data[DOMAIN].pop(entry.entry_id)
 
@@ -0,0 +1,93 @@
+"""Aggregates of the devices of an Elro Connects K1 connector."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from elro.device import (
+    ALARM_CO,
+    ALARM_FIRE,
+    ALARM_HEAT,
+    ALARM_SMOKE,
+    ALARM_WATER,
+    ATTR_BATTERY_LEVEL,
+    ATTR_DEVICE_STATE,
+    ATTR_DEVICE_TYPE,
+    STATE_LOW_BATTERY,
+    STATE_TEST_ALARM,
+    STATES_OFFLINE,
+    STATES_ON,
+)
+
+AGGREGATE_ALARM = "alarm"
+AGGREGATE_LOW_BATTERY = "low_battery"
+AGGREGATE_OFFLINE = "offline"
+
+# Battery levels up to this percentage are low, higher values than 100 are
+# reported by devices without a battery
+LOW_BATTERY_LEVEL = 20
+
+# Other devices also report alarm states, an open door or window sensor
+# reports an alarm
+ALARM_DEVICE_TYPES = (ALARM_CO, ALARM_FIRE, ALARM_HEAT, ALARM_SMOKE, ALARM_WATER)
+
+
+def _is_alarm(device_data: dict[str, Any]) -> bool:
+    """Return True if an alarm is going off, test alarms are not counted."""
+    device_state = device_data.get(ATTR_DEVICE_STATE)
+    return (
+        device_data.get(ATTR_DEVICE_TYPE) in ALARM_DEVICE_TYPES
+        and device_state in STATES_ON
+        and device_state != STATE_TEST_ALARM
+    )
+
+
+def _is_low_battery(device_data: dict[str, Any]) -> bool:
+    """Return True if the device reports a low battery."""
+    if device_data.get(ATTR_DEVICE_STATE) == STATE_LOW_BATTERY:
+        return True
+    battery_level = device_data.get(ATTR_BATTERY_LEVEL)
+    return isinstance(battery_level, int) and battery_level <= LOW_BATTERY_LEVEL
+
+
+AGGREGATE_TESTS: dict[str, Callable[[dict[str, Any]], bool]] = {
+    AGGREGATE_ALARM: _is_alarm,
+    AGGREGATE_LOW_BATTERY: _is_low_battery,
+    AGGREGATE_OFFLINE: lambda data: data.get(ATTR_DEVICE_STATE) in STATES_OFFLINE,
+}
+
+
+class HubAggregates:
+    """Track the devices of a K1 connector that are in alarm, offline or low.
+
+    The devices are kept in a set per aggregate. Only the devices that
+    changed are tested again, the cost per poll is O(changes).
+    """
+
+    def __init__(self) -> None:
+        """Initialize the aggregates."""
+        self._devices: dict[str, set[int]] = {key: set() for key in AGGREGATE_TESTS}
+
+    def update(self, devices: dict[int, dict], changed: Iterable[int]) -> None:
+        """Test the changed devices again."""
+        for device_id in changed:
+            device_data = devices[device_id]
+            for key, test in AGGREGATE_TESTS.items():
+                if test(device_data):
+                    self._devices[key].add(device_id)
+                else:
+                    self._devices[key].discard(device_id)
+
+    def remove(self, device_ids: Iterable[int]) -> None:
+        """Remove devices that were pruned."""
+        for devices in self._devices.values():
+            devices.difference_update(device_ids)
+
+    def count(self, key: str) -> int:
+        """Return the number of devices in an aggregate."""
+        return len(self._devices[key])
+
+    def device_ids(self, key: str) -> list[int]:
+        """Return the ID's of the devices in an aggregate."""
+        return sorted(self._devices[key])
@@ -0,0 +1,235 @@
+"""Orchestrate alarm tests across Elro Connects K1 connectors."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+from elro.api import K1
+from elro.device import (
+    ATTR_DEVICE_STATE,
+    ATTR_DEVICE_TYPE,
+    STATE_TEST_ALARM,
+    STATE_UNKNOWN,
+    STATES_OFFLINE,
+    STATES_ON,
+)
+from homeassistant.const import ATTR_NAME
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import ATTR_CONNECTOR_ID, ATTR_DEVICE_ID
+from .device import ElroConnectsK1
+from .siren import SIREN_DEVICE_TYPES
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 2
+DEFAULT_PACE = 1.0
+DEFAULT_TIMEOUT = 30
+FOCUSED_POLL_INTERVAL = 1.0
+
+RESULT_ERROR = "error"
+RESULT_FAILED = "failed"
+RESULT_PASSED = "passed"
+RESULT_SKIPPED = "skipped"
+
+
+class FocusedPoller:
+    """Poll the device states of a K1 connector while alarm tests are running.
+
+    The K1 only reports the status of all devices at once, concurrent waiters
+    share a status request that is at most `interval` seconds old.
+    """
+
+    def __init__(self, elro_connects_api: ElroConnectsK1, interval: float) -> None:
+        """Initialize the poller."""
+        self._elro_connects_api = elro_connects_api
+        self._interval = interval
+        self._lock = asyncio.Lock()
+        self._states: dict[int, dict[str, Any]] = {}
+        self._fetched: float | None = None
+        self.requests = 0
+
+    async def async_device_state(self, device_id: int) -> str | None:
+        """Return the current state of a device."""
+        async with self._lock:
+            if self._fetched is None or (
+                time.monotonic() - self._fetched >= self._interval
+            ):
+                self._states = await self._elro_connects_api.async_fetch_states()
+                self._fetched = time.monotonic()
+                self.requests += 1
+        return self._states.get(device_id, {}).get(ATTR_DEVICE_STATE)
+
+
+class Pacer:
+    """Space commands to a K1 connector at least `pace` seconds apart."""
+
+    def __init__(self, pace: float) -> None:
+        """Initialize the pacer."""
+        self._pace = pace
+        self._lock = asyncio.Lock()
+        self._next: float = 0.0
+
+    async def async_wait(self) -> None:
+        """Wait until the next command may be sent."""
+        async with self._lock:
+            if (delay := self._next - time.monotonic()) > 0:
+                await asyncio.sleep(delay)
+            self._next = time.monotonic() + self._pace
+
+
+class AlarmTest:
+    """Test all alarms of one or more K1 connectors.
+
+    Per connector at most `concurrency` devices are tested at the same time,
+    and test commands are sent at least `pace` seconds apart. A device passes
+    when it reports the test alarm state within `timeout` seconds, after that
+    the alarm is silenced.
+    """
+
+    def __init__(
+        self,
+        connectors: list[ElroConnectsK1],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        pace: float = DEFAULT_PACE,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> None:
+        """Initialize the alarm test."""
+        self._connectors = connectors
+        self._concurrency = concurrency
+        self._pace = pace
+        self._timeout = timeout
+
+    async def async_run(self) -> dict[str, Any]:
+        """Run the alarm test and return the report."""
+        started = time.monotonic()
+        results = await asyncio.gather(
+            *(
+                self._async_test_connector(elro_connects_api)
+                for elro_connects_api in self._connectors
+            )
+        )
+        devices = [result for connector in results for result in connector]
+        report: dict[str, Any] = {
+            result: sum(device["result"] == result for device in devices)
+            for result in (RESULT_PASSED, RESULT_FAILED, RESULT_ERROR, RESULT_SKIPPED)
+        }
+        report["duration"] = round(time.monotonic() - started, 3)
+        report["devices"] = devices
+        return report
+
+    async def _async_test_connector(
+        self, elro_connects_api: ElroConnectsK1
+    ) -> list[dict[str, Any]]:
+        """Test the alarms of a K1 connector."""
+        semaphore = asyncio.Semaphore(self._concurrency)
+        pacer = Pacer(self._pace)
+        poller = FocusedPoller(elro_connects_api, FOCUSED_POLL_INTERVAL)
+
+        async def _async_test(device_id: int, device_data: dict) -> dict[str, Any]:
+            async with semaphore:
+                return await self._async_test_device(
+                    elro_connects_api, poller, pacer, device_id, device_data
+                )
+
+        results = await asyncio.gather(
+            *(
+                _async_test(device_id, device_data)
+                for device_id, device_data in (elro_connects_api.data or {}).items()
+                if device_data.get(ATTR_DEVICE_TYPE) in SIREN_DEVICE_TYPES
+            )
+        )
+        # Process the final states
+        await elro_connects_api.async_request_refresh()
+        return list(results)
+
+    async def _async_test_device(
+        self,
+        elro_connects_api: ElroConnectsK1,
+        poller: FocusedPoller,
+        pacer: Pacer,
+        device_id: int,
+        device_data: dict[str, Any],
+    ) -> dict[str, Any]:
+        """Test the alarm of a device."""
+        description = SIREN_DEVICE_TYPES[device_data[ATTR_DEVICE_TYPE]]
+        result: dict[str, Any] = {
+            ATTR_CONNECTOR_ID: elro_connects_api.connector_id,
+            ATTR_DEVICE_ID: device_id,
+            ATTR_NAME: device_data.get(ATTR_NAME),
+            ATTR_DEVICE_TYPE: device_data[ATTR_DEVICE_TYPE],
+        }
+        device_state = device_data.get(ATTR_DEVICE_STATE)
+        if device_state in STATES_OFFLINE or elro_connects_api.is_stale(device_id):
+            return result | {"result": RESULT_SKIPPED, "reason": "unavailable"}
+        if device_state in STATES_ON or device_state == STATE_UNKNOWN:
+            # Never test or silence a device that is or might be in alarm
+            return result | {"result": RESULT_SKIPPED, "reason": "in alarm"}
+
+        await pacer.async_wait()
+        started = time.monotonic()
+        try:
+            await elro_connects_api.async_command(
+                description.test_alarm, device_ID=device_id
+            )
+        except (K1.K1ConnectionError, HomeAssistantError) as err:
+            return self._error_result(elro_connects_api, result, str(err), started)
+
+        error: str | None = None
+        try:
+            while True:
+                device_state = await poller.async_device_state(device_id)
+                if (confirmed := device_state == STATE_TEST_ALARM) or (
+                    time.monotonic() - started >= self._timeout
+                ):
+                    break
+                await asyncio.sleep(FOCUSED_POLL_INTERVAL)
+            confirm_time = time.monotonic() - started
+        except (K1.K1ConnectionError, HomeAssistantError) as err:
+            error = str(err)
+        finally:
+            # The test alarm was sent, it is always silenced
+            try:
+                await pacer.async_wait()
+                await elro_connects_api.async_command(
+                    description.silence_alarm, device_ID=device_id
+                )
+            except (K1.K1ConnectionError, HomeAssistantError) as err:
+                result["silence_error"] = str(err)
+                error = error or f"alarm not silenced: {err}"
+        if error is not None:
+            return self._error_result(elro_connects_api, result, error, started)
+        if not confirmed:
+            return result | {
+                "result": RESULT_FAILED,
+                "reason": "test alarm not confirmed",
+                "duration": round(time.monotonic() - started, 3),
+            }
+        return result | {
+            "result": RESULT_PASSED,
+            "confirm_time": round(confirm_time, 3),
+            "duration": round(time.monotonic() - started, 3),
+        }
+
+    @staticmethod
+    def _error_result(
+        elro_connects_api: ElroConnectsK1,
+        result: dict[str, Any],
+        reason: str,
+        started: float,
+    ) -> dict[str, Any]:
+        """Log and return the result of a device test that failed with an error."""
+        _LOGGER.warning(
+            "Alarm test of device %s on K1 connector %s failed: %s",
+            result[ATTR_DEVICE_ID],
+            elro_connects_api.connector_id,
+            reason,
+        )
+        return result | {
+            "result": RESULT_ERROR,
+            "reason": reason,
+            "duration": round(time.monotonic() - started, 3),
+        }
@@ -0,0 +1,154 @@
+"""Capture and replay of Elro Connects K1 traffic."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any
+
+from elro.api import K1
+from elro.command import CommandAttributes
+from homeassistant.core import HomeAssistant
+
+# Keys of a capture record
+ATTR_ARGV = "argv"
+ATTR_ATTRIBUTES = "attrs"
+ATTR_COMMAND = "cmd"
+ATTR_DURATION = "d"
+ATTR_ERROR = "err"
+ATTR_RESPONSE = "resp"
+ATTR_TIME = "t"
+
+
+def _restore_device_ids(response: Any) -> Any:
+    """Restore the integer device ID keys that were converted to strings by JSON."""
+    if isinstance(response, dict) and all(key.isdigit() for key in response):
+        return {int(key): value for key, value in response.items()}
+    return response
+
+
+class K1TrafficCapture:
+    """Append the request/response pairs of a K1 connector to a capture file.
+
+    Every exchange is written as a compact JSON line with the time offset
+    since the start of the capture and the duration of the request.
+    """
+
+    def __init__(self, hass: HomeAssistant, path: str) -> None:
+        """Initialize the capture."""
+        self._hass = hass
+        self._path = path
+        self._start = time.monotonic()
+        self._pending: list[str] = []
+        self._flush_task: asyncio.Task | None = None
+        self.records = 0
+
+    @property
+    def path(self) -> str:
+        """Return the path of the capture file."""
+        return self._path
+
+    def record(
+        self,
+        command: CommandAttributes,
+        argv: dict[str, Any],
+        started: float,
+        duration: float,
+        response: Any = None,
+        error: Exception | None = None,
+    ) -> None:
+        """Record a request/response pair."""
+        record: dict[str, Any] = {
+            ATTR_TIME: round(started - self._start, 4),
+            ATTR_DURATION: round(duration, 4),
+            ATTR_COMMAND: command["cmd_id"].name,
+        }
+        if command["additional_attributes"]:
+            record[ATTR_ATTRIBUTES] = command["additional_attributes"]
+        if argv:
+            record[ATTR_ARGV] = argv
+        if error is not None:
+            record[ATTR_ERROR] = str(error)
+        else:
+            record[ATTR_RESPONSE] = response
+        # Serialize now, the response is updated later on
+        self._pending.append(json.dumps(record, separators=(",", ":")))
+        self.records += 1
+        if self._flush_task is None:
+            self._flush_task = self._hass.async_create_background_task(
+                self._async_flush(), f"elro_connects capture {self._path}"
+            )
+
+    async def _async_flush(self) -> None:
+        """Write the pending records to the capture file."""
+        try:
+            while self._pending:
+                lines, self._pending = self._pending, []
+                await self._hass.async_add_executor_job(self._write, lines)
+        finally:
+            self._flush_task = None
+
+    def _write(self, lines: list[str]) -> None:
+        """Append lines to the capture file."""
+        with open(self._path, "a", encoding="utf-8") as capture_file:
+            capture_file.write("\n".join(lines) + "\n")
+
+    async def async_close(self) -> None:
+        """Wait for all records to be written."""
+        if self._flush_task is not None:
+            await self._flush_task
+
+
+class K1TrafficReplay:
+    """Replay captured K1 traffic.
+
+    The `async_process_command` method is a drop in replacement for
+    `K1.async_process_command`. The responses are returned in the captured
+    order per command. When the responses for a command are exhausted the
+    last response is repeated. With `realtime` the captured timing is
+    reproduced, otherwise responses are returned as fast as possible.
+    """
+
+    def __init__(self, records: list[dict[str, Any]], realtime: bool = False) -> None:
+        """Initialize the replay."""
+        self._realtime = realtime
+        self._start: float | None = None
+        self._queues: dict[str, deque[dict[str, Any]]] = defaultdict(deque)
+        self._last: dict[str, dict[str, Any]] = {}
+        for record in records:
+            self._queues[record[ATTR_COMMAND]].append(record)
+        self.requests = 0
+
+    @classmethod
+    def from_file(cls, path: str, realtime: bool = False) -> K1TrafficReplay:
+        """Load a replay from a capture file."""
+        with Path(path).open(encoding="utf-8") as capture_file:
+            records = [json.loads(line) for line in capture_file if line.strip()]
+        return cls(records, realtime)
+
+    async def async_process_command(
+        self,
+        attributes: CommandAttributes,
+        **argv: int | str,
+    ) -> dict[int, dict[str, Any]] | None:
+        """Return the next captured response for a command."""
+        command = attributes["cmd_id"].name
+        if queue := self._queues.get(command):
+            record = self._last[command] = queue.popleft()
+        elif command in self._last:
+            record = self._last[command]
+        else:
+            raise K1.K1ConnectionError(f"No captured response for {command}")
+        self.requests += 1
+        if self._realtime:
+            now = time.monotonic()
+            if self._start is None:
+                self._start = now - record[ATTR_TIME]
+            delay = self._start + record[ATTR_TIME] + record[ATTR_DURATION] - now
+            await asyncio.sleep(max(delay, 0))
+        if ATTR_ERROR in record:
+            raise K1.K1ConnectionError(record[ATTR_ERROR])
+        return _restore_device_ids(record.get(ATTR_RESPONSE))
@@ -22,7 +22,27 @@ from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
 
-from .const import CONF_CONNECTOR_ID, DEFAULT_PORT, DOMAIN
+from .connection import K1Client
+from .const import (
+    CONF_COMMAND_TIMEOUT,
+    CONF_COMPACT_SENSORS,
+    CONF_CONNECTOR_ID,
+    CONF_EXECUTOR_PROCESSING,
+    CONF_INTERLINK,
+    CONF_KEEPALIVE,
+    CONF_PRUNE_AFTER,
+    CONF_SETUP_TIMEOUT,
+    CONF_STALE_TIMEOUT,
+    DEFAULT_COMMAND_TIMEOUT,
+    DEFAULT_COMPACT_SENSORS,
+    DEFAULT_EXECUTOR_PROCESSING,
+    DEFAULT_KEEPALIVE,
+    DEFAULT_PORT,
+    DEFAULT_PRUNE_AFTER,
+    DEFAULT_SETUP_TIMEOUT,
+    DEFAULT_STALE_TIMEOUT,
+    DOMAIN,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -39,6 +59,18 @@ ELRO_CONNECTS_DATA_SCHEMA = vol.Schema(
 
 TITLE = "Elro Connects K1 Connector"
 
+# Settings that are stored as options and do not affect the connection
+OPTION_KEYS = (
+    CONF_STALE_TIMEOUT,
+    CONF_INTERLINK,
+    CONF_KEEPALIVE,
+    CONF_SETUP_TIMEOUT,
+    CONF_COMPACT_SENSORS,
+    CONF_PRUNE_AFTER,
+    CONF_EXECUTOR_PROCESSING,
+    CONF_COMMAND_TIMEOUT,
+)
+
 
 class K1ConnectionTest:
     """Elro Connects K1 connection test."""
@@ -51,7 +83,7 @@ class K1ConnectionTest:
         self, connector_id: str, port: int, api_key: str | None = None
     ) -> bool:
         """Test if we can authenticate with the host."""
-        connector = K1(self.host, connector_id, port, api_key)
+        connector = K1Client(self.host, connector_id, port, api_key)
         try:
             await connector.async_connect()
         except K1.K1ConnectionError:
@@ -139,6 +171,12 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             step_id="user", data_schema=ELRO_CONNECTS_DATA_SCHEMA, errors=errors
         )
 
+    async def async_step_import(self, import_data: dict[str, Any]) -> FlowResult:
+        """Create an entry for a K1 connector validated by the bulk import."""
+        await self.async_set_unique_id(import_data[CONF_CONNECTOR_ID])
+        self._abort_if_unique_id_configured()
+        return self.async_create_entry(title=TITLE, data=import_data)
+
 
 class OptionsFlowHandler(config_entries.OptionsFlow):
     """Manage the options."""
@@ -153,9 +191,15 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         """Manage configuration options."""
         errors = {}
         entry_data = self.config_entry.data
+        entry_options = self.config_entry.options
         if user_input is not None:
             changed_input = {}
             changed_input.update(user_input)
+            options = {
+                key: changed_input.pop(key)
+                for key in OPTION_KEYS
+                if key in changed_input
+            }
             try:
                 info = await async_validate_input(self.hass, changed_input)
             except CannotConnect:
@@ -167,7 +211,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 self.hass.config_entries.async_update_entry(
                     self.config_entry, data=info
                 )
-                return self.async_create_entry(title="", data=changed_input)
+                return self.async_create_entry(title="", data=options)
 
         return self.async_show_form(
             step_id="init",
@@ -194,6 +238,50 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                         CONF_API_KEY,
                         description={"suggested_value": entry_data.get(CONF_API_KEY)},
                     ): str,
+                    vol.Optional(
+                        CONF_STALE_TIMEOUT,
+                        default=entry_options.get(
+                            CONF_STALE_TIMEOUT, DEFAULT_STALE_TIMEOUT
+                        ),
+                    ): cv.positive_int,
+                    vol.Optional(
+                        CONF_INTERLINK,
+                        default=entry_options.get(CONF_INTERLINK, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_KEEPALIVE,
+                        default=entry_options.get(CONF_KEEPALIVE, DEFAULT_KEEPALIVE),
+                    ): bool,
+                    vol.Optional(
+                        CONF_SETUP_TIMEOUT,
+                        default=entry_options.get(
+                            CONF_SETUP_TIMEOUT, DEFAULT_SETUP_TIMEOUT
+                        ),
+                    ): cv.positive_int,
+                    vol.Optional(
+                        CONF_COMPACT_SENSORS,
+                        default=entry_options.get(
+                            CONF_COMPACT_SENSORS, DEFAULT_COMPACT_SENSORS
+                        ),
+                    ): bool,
+                    vol.Optional(
+                        CONF_PRUNE_AFTER,
+                        default=entry_options.get(
+                            CONF_PRUNE_AFTER, DEFAULT_PRUNE_AFTER
+                        ),
+                    ): cv.positive_int,
+                    vol.Optional(
+                        CONF_EXECUTOR_PROCESSING,
+                        default=entry_options.get(
+                            CONF_EXECUTOR_PROCESSING, DEFAULT_EXECUTOR_PROCESSING
+                        ),
+                    ): bool,
+                    vol.Optional(
+                        CONF_COMMAND_TIMEOUT,
+                        default=entry_options.get(
+                            CONF_COMMAND_TIMEOUT, DEFAULT_COMMAND_TIMEOUT
+                        ),
+                    ): cv.positive_int,
                 }
             ),
         )
@@ -0,0 +1,159 @@
+"""Connection management for the Elro Connects K1 connector."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+from datetime import datetime, timedelta
+from enum import StrEnum
+
+from elro.api import K1
+from homeassistant.util import dt as dt_util
+
+from .const import DEFAULT_INTERVAL
+
+BACKOFF_MAX = 300
+BACKOFF_JITTER = 0.2
+FAILURE_THRESHOLD = 3
+
+
+class K1Client(K1):
+    """K1 API that only serializes its own requests.
+
+    The library serializes the requests of all K1 connectors with a class wide
+    lock. Every connector has its own socket, with a lock per instance an
+    unreachable connector does not hold up the requests to the others.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        """Initialize the K1 API with its own lock."""
+        super().__init__(*args, **kwargs)
+        self._lock = asyncio.Lock()
+
+
+class ConnectionHealth(StrEnum):
+    """Health state of the connection with the K1 connector."""
+
+    HEALTHY = "healthy"
+    DEGRADED = "degraded"
+    OFFLINE = "offline"
+
+
+class K1ConnectionManager:
+    """Track failures and back off requests to an unreachable K1 connector.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    commands are short circuited until the backoff delay has passed.
+    The first command after that is let through to probe the connector.
+    Polls are not gated, the coordinator backs off its update interval.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        backoff_base: float = DEFAULT_INTERVAL,
+        backoff_max: float = BACKOFF_MAX,
+    ) -> None:
+        """Initialize the connection manager."""
+        self._failure_threshold = failure_threshold
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._failures = 0
+        self._retry_at: datetime | None = None
+        self._outage_start: datetime | None = None
+        self.last_recovery_time: timedelta | None = None
+        # Request latency metrics, a cold request had to set up a session first
+        self.connects = 0
+        self.connect_time: float | None = None
+        self.first_request_latency: float | None = None
+        self._requests = {True: 0, False: 0}
+        self._request_time = {True: 0.0, False: 0.0}
+
+    @property
+    def circuit_open(self) -> bool:
+        """Return True if the failure threshold was reached."""
+        return self._failures >= self._failure_threshold
+
+    @property
+    def failures(self) -> int:
+        """Return the number of consecutive failures."""
+        return self._failures
+
+    @property
+    def health(self) -> ConnectionHealth:
+        """Return the health state of the connection."""
+        if not self._failures:
+            return ConnectionHealth.HEALTHY
+        if not self.circuit_open:
+            return ConnectionHealth.DEGRADED
+        return ConnectionHealth.OFFLINE
+
+    @property
+    def retry_at(self) -> datetime | None:
+        """Return the earliest time a new request is allowed."""
+        return self._retry_at
+
+    def allow_request(self) -> bool:
+        """Return True if a request to the connector may be sent."""
+        return (
+            not self.circuit_open
+            or self._retry_at is None
+            or dt_util.utcnow() >= self._retry_at
+        )
+
+    def backoff(self) -> timedelta:
+        """Return the exponential backoff delay with jitter."""
+        delay = min(
+            self._backoff_max,
+            self._backoff_base * 2 ** max(self._failures - 1, 0),
+        )
+        return timedelta(
+            seconds=delay * random.uniform(1 - BACKOFF_JITTER, 1 + BACKOFF_JITTER)
+        )
+
+    def record_failure(self) -> timedelta:
+        """Register a failed request and return the backoff delay."""
+        now = dt_util.utcnow()
+        if not self._failures:
+            self._outage_start = now
+        self._failures += 1
+        delay = self.backoff()
+        self._retry_at = now + delay
+        return delay
+
+    def record_success(self) -> timedelta | None:
+        """Register a successful request, return the recovery time after an outage."""
+        recovery_time: timedelta | None = None
+        if self._outage_start is not None:
+            recovery_time = dt_util.utcnow() - self._outage_start
+            self.last_recovery_time = recovery_time
+        self.reset()
+        return recovery_time
+
+    def record_connect(self, duration: float) -> None:
+        """Register the duration of a session handshake."""
+        self.connects += 1
+        self.connect_time = duration
+
+    def record_request(self, duration: float, cold: bool) -> None:
+        """Register the latency of a request."""
+        if self.first_request_latency is None:
+            self.first_request_latency = duration
+        self._requests[cold] += 1
+        self._request_time[cold] += duration
+
+    def requests(self, cold: bool) -> int:
+        """Return the number of cold or warm requests."""
+        return self._requests[cold]
+
+    def mean_latency(self, cold: bool) -> float | None:
+        """Return the mean latency of cold or warm requests in seconds."""
+        if not self._requests[cold]:
+            return None
+        return self._request_time[cold] / self._requests[cold]
+
+    def reset(self) -> None:
+        """Reset the failure state."""
+        self._failures = 0
+        self._retry_at = None
+        self._outage_start = None
@@ -2,9 +2,45 @@
 
 DOMAIN = "elro_connects"
 
+DEFAULT_COMMAND_TIMEOUT = 10
+DEFAULT_COMPACT_SENSORS = False
+DEFAULT_EXECUTOR_PROCESSING = False
 DEFAULT_INTERVAL = 15
+DEFAULT_KEEPALIVE = True
 DEFAULT_PORT = 1025
+DEFAULT_PRUNE_AFTER = 0
+DEFAULT_SETUP_TIMEOUT = 0
+DEFAULT_STALE_TIMEOUT = 3600
 
 CONF_CONNECTOR_ID = "connector_id"
+CONF_COMMAND_TIMEOUT = "command_timeout"
+CONF_COMPACT_SENSORS = "compact_sensors"
+CONF_EXECUTOR_PROCESSING = "executor_processing"
+CONF_INTERLINK = "interlink"
+CONF_KEEPALIVE = "keepalive"
+CONF_PRUNE_AFTER = "prune_after"
+CONF_SETUP_TIMEOUT = "setup_timeout"
+CONF_STALE_TIMEOUT = "stale_timeout"
 
 ELRO_CONNECTS_NEW_DEVICE = "elro_connnects_new_dev_{}"
+ELRO_CONNECTS_REMOVED_DEVICE = "elro_connects_removed_dev_{}"
+ELRO_CONNECTS_HUB_UPDATE = "elro_connects_hub_update_{}"
+ELRO_CONNECTS_ALARM = "elro_connects_alarm"
+ELRO_CONNECTS_DATA_UPDATED = "elro_connects_data_updated"
+
+EVENT_DEVICE_TRANSITION = "elro_connects_device_transition"
+EVENT_INTERLINK = "elro_connects_interlink"
+
+ATTR_CONNECTOR_ID = "connector_id"
+ATTR_DEVICE_ID = "device_id"
+ATTR_FROM_STATE = "from_state"
+ATTR_TO_STATE = "to_state"
+ATTR_TRANSITION = "transition"
+ATTR_RESPONSE_TIME = "response_time"
+ATTR_LATENCY = "latency"
+ATTR_TARGETS = "targets"
+
+TRANSITION_ALARM = "alarm"
+TRANSITION_NORMAL = "normal"
+TRANSITION_OFFLINE = "offline"
+TRANSITION_SILENCE = "silence"
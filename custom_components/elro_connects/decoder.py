@@ -0,0 +1,123 @@
+"""Batch decoding of Elro Connects K1 device status payloads."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from elro.device import DEVICE_STATE, DEVICE_VALUE, STATE_NORMAL, DeviceType
+from elro.utils import get_device_states
+
+DEVICE_STATUS_LENGTH = 8
+
+# Byte to device state and device value lookup tables. Unknown bytes decode
+# to their hex representation, like `elro.utils.get_device_states` does.
+# The library decodes "AA" (closed) as normal for all device types.
+STATE_TABLE: tuple[str, ...] = tuple(
+    STATE_NORMAL if byte == 0xAA else DEVICE_STATE.get(f"{byte:02X}", f"{byte:02X}")
+    for byte in range(256)
+)
+VALUE_TABLE: tuple[str, ...] = tuple(
+    DEVICE_VALUE.get(byte, hex(byte)) for byte in range(256)
+)
+
+
+def _device_type(device_name: str) -> str | None:
+    """Return the device type name for a device name code."""
+    try:
+        return DeviceType(device_name).name
+    except ValueError:
+        return None
+
+
+class DeviceStatusDecoder:
+    """Decode the `GET_ALL_EQUIPMENT_STATUS` response in one pass.
+
+    A drop in replacement for the `get_device_states` content transformer.
+    The status strings of all changed devices are joined and converted to
+    bytes at once, the signal, battery, state and value fields are strided
+    slices of that buffer and are mapped through the lookup tables.
+    Records of devices with an unchanged raw status are reused from the
+    previous poll.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the decoder."""
+        self._device_types: dict[str, str | None] = {}
+        self._records: dict[int, tuple[str, str, dict[str, Any]]] = {}
+        self.changed = 0
+
+    def __call__(self, content: list[dict[str, Any]]) -> dict[int, dict[str, Any]]:
+        """Decode the device status records."""
+        device_types = self._device_types
+        previous = self._records
+        records: dict[int, tuple[str, str, dict[str, Any]]] = {}
+        states: dict[int, dict[str, Any] | None] = {}
+        pending: dict[int, tuple[dict[str, Any], str]] = {}
+        for hexdata in content:
+            device_name = hexdata["device_name"]
+            if (device_type := device_types.get(device_name)) is None:
+                if device_name in device_types or (
+                    (device_type := _device_type(device_name)) is None
+                ):
+                    # Unsupported record, skip and continue silently
+                    device_types[device_name] = None
+                    continue
+                device_types[device_name] = device_type
+            device_id = hexdata["device_ID"]
+            device_status = hexdata["device_status"]
+            cached = previous.get(device_id)
+            if (
+                cached is not None
+                and cached[0] == device_name
+                and cached[1] == device_status
+            ):
+                record = cached[2]
+                record["device_status_data"] = hexdata
+                records[device_id] = cached
+                states[device_id] = record
+                pending.pop(device_id, None)
+                continue
+            states[device_id] = None
+            pending[device_id] = (hexdata, device_type)
+
+        self.changed = len(pending)
+        for device_id, record in self._decode(pending).items():
+            hexdata = record["device_status_data"]
+            records[device_id] = (
+                hexdata["device_name"],
+                hexdata["device_status"],
+                record,
+            )
+            states[device_id] = record
+        self._records = records
+        return states  # type: ignore[return-value]
+
+    @staticmethod
+    def _decode(
+        pending: dict[int, tuple[dict[str, Any], str]],
+    ) -> dict[int, dict[str, Any]]:
+        """Decode the changed device status records."""
+        if not pending:
+            return {}
+        statuses = [hexdata["device_status"] for hexdata, _ in pending.values()]
+        try:
+            if any(len(status) != DEVICE_STATUS_LENGTH for status in statuses):
+                raise ValueError("Unexpected device status length")
+            raw = bytes.fromhex("".join(statuses))
+        except ValueError:
+            # Malformed status, decode record by record like the library does
+            return get_device_states([hexdata for hexdata, _ in pending.values()])
+        decoded: dict[int, dict[str, Any]] = {}
+        fields = zip(raw[0::4], raw[1::4], raw[2::4], raw[3::4])
+        for device_id, (signal, battery, state, value) in zip(pending, fields):
+            hexdata, device_type = pending[device_id]
+            decoded[device_id] = {
+                "device_type": device_type,
+                "signal": signal,
+                "battery": battery,
+                "device_state": STATE_TABLE[state],
+                "device_value": VALUE_TABLE[value],
+                "device_status_data": hexdata,
+                "device_value_data": value,
+            }
+        return decoded
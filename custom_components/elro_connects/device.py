@@ -5,7 +5,13 @@ from __future__ import annotations
 import asyncio
 import copy
 import logging
-from datetime import timedelta
+import time
+from collections import ChainMap
+from collections.abc import AsyncIterator, Iterable, Iterator, Mapping
+from collections.abc import Set as AbstractSet
+from contextlib import AbstractContextManager, asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
 from typing import Any
 
 from elro.api import K1
@@ -21,30 +27,100 @@ from elro.device import (
     ALARM_HEAT,
     ALARM_SMOKE,
     ALARM_WATER,
+    ATTR_BATTERY_LEVEL,
     ATTR_DEVICE_STATE,
     ATTR_DEVICE_TYPE,
+    ATTR_DEVICE_VALUE,
+    ATTR_SIGNAL,
+    STATE_NORMAL,
+    STATE_SILENCE,
     STATE_UNKNOWN,
+    STATES_OFFLINE,
+    STATES_ON,
 )
 from elro.utils import update_state_data
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import ATTR_NAME, CONF_API_KEY, CONF_HOST, CONF_PORT
-from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.device_registry import (
     EVENT_DEVICE_REGISTRY_UPDATED,
     format_mac,
 )
 from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.entity import DeviceInfo, EntityDescription
+from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
     DataUpdateCoordinator,
     UpdateFailed,
 )
+from homeassistant.util import dt as dt_util
 
-from .const import CONF_CONNECTOR_ID, DEFAULT_INTERVAL, DOMAIN, ELRO_CONNECTS_NEW_DEVICE
+from .aggregates import HubAggregates
+from .capture import K1TrafficCapture
+from .connection import K1Client, K1ConnectionManager
+from .const import (
+    ATTR_CONNECTOR_ID,
+    ATTR_DEVICE_ID,
+    ATTR_FROM_STATE,
+    ATTR_RESPONSE_TIME,
+    ATTR_TO_STATE,
+    ATTR_TRANSITION,
+    CONF_COMMAND_TIMEOUT,
+    CONF_COMPACT_SENSORS,
+    CONF_CONNECTOR_ID,
+    CONF_EXECUTOR_PROCESSING,
+    CONF_INTERLINK,
+    CONF_KEEPALIVE,
+    CONF_PRUNE_AFTER,
+    CONF_SETUP_TIMEOUT,
+    CONF_STALE_TIMEOUT,
+    DEFAULT_COMMAND_TIMEOUT,
+    DEFAULT_COMPACT_SENSORS,
+    DEFAULT_EXECUTOR_PROCESSING,
+    DEFAULT_INTERVAL,
+    DEFAULT_KEEPALIVE,
+    DEFAULT_PRUNE_AFTER,
+    DEFAULT_SETUP_TIMEOUT,
+    DEFAULT_STALE_TIMEOUT,
+    DOMAIN,
+    ELRO_CONNECTS_ALARM,
+    ELRO_CONNECTS_DATA_UPDATED,
+    ELRO_CONNECTS_HUB_UPDATE,
+    ELRO_CONNECTS_NEW_DEVICE,
+    ELRO_CONNECTS_REMOVED_DEVICE,
+    EVENT_DEVICE_TRANSITION,
+    TRANSITION_ALARM,
+    TRANSITION_NORMAL,
+    TRANSITION_OFFLINE,
+    TRANSITION_SILENCE,
+)
+from .decoder import DeviceStatusDecoder
+from .metrics import K1Metrics
+from .profiler import (
+    STAGE_CYCLE,
+    STAGE_DISPATCH,
+    STAGE_FETCH,
+    STAGE_LISTENERS,
+    STAGE_PROCESS,
+    K1PollProfiler,
+)
+from .tracing import (
+    SPAN_COMMAND,
+    SPAN_LOCK_WAIT,
+    SPAN_POLL,
+    SPAN_REQUEST,
+    SPAN_RETRY,
+    SPAN_STATE_WRITE,
+    K1Tracer,
+)
 
-MAX_RETRIES = 3
+HEARTBEAT_INTERVAL = timedelta(seconds=5)
+# Time optimistic values are held while the K1 does not confirm them
+OPTIMISTIC_TIMEOUT = timedelta(seconds=2 * DEFAULT_INTERVAL)
 
 DEVICE_MODELS = {
     ALARM_CO: "CO alarm",
@@ -55,7 +131,166 @@ DEVICE_MODELS = {
 }
 
 
-class ElroConnectsK1(DataUpdateCoordinator, K1):
+def device_transition(device_state: str | None) -> str | None:
+    """Return the transition class a device state belongs to."""
+    if device_state in STATES_ON:
+        return TRANSITION_ALARM
+    if device_state == STATE_SILENCE:
+        return TRANSITION_SILENCE
+    if device_state in STATES_OFFLINE:
+        return TRANSITION_OFFLINE
+    if device_state == STATE_NORMAL:
+        return TRANSITION_NORMAL
+    return None
+
+
+def response_fingerprint(
+    status: dict[int, dict[str, Any]], names: dict[int, dict[str, Any]] | None
+) -> tuple:
+    """Return a fingerprint of the status and names responses."""
+    return (
+        tuple(
+            (
+                device_id,
+                (data.get("device_status_data") or {}).get("device_status"),
+                data.get(ATTR_DEVICE_TYPE),
+                data.get(ATTR_DEVICE_STATE),
+                data.get(ATTR_DEVICE_VALUE),
+                data.get(ATTR_BATTERY_LEVEL),
+                data.get(ATTR_SIGNAL),
+            )
+            for device_id, data in status.items()
+        ),
+        tuple(
+            (device_id, data.get(ATTR_NAME))
+            for device_id, data in (names or {}).items()
+        ),
+    )
+
+
+@dataclass(frozen=True)
+class ProcessedResponse:
+    """A processed K1 response, nothing is shared with the processing thread."""
+
+    connector_data: dict[int, dict]
+    coordinator_update: dict[int, dict]
+    updated: frozenset[int]
+    # Devices that are new or changed device state or battery level
+    changed: frozenset[int]
+    valid_devices: frozenset[int]
+    new_devices: bool
+    # Devices that changed state class as (device_id, old_data, new_data)
+    transitions: tuple[tuple[int, dict, dict], ...]
+
+
+def process_response(
+    previous: dict[int, dict],
+    status: dict[int, dict[str, Any]],
+    names: dict[int, dict[str, Any]] | None,
+) -> ProcessedResponse:
+    """Merge a K1 response and diff it against the previous coordinator data.
+
+    The status response is merged with the names into new dicts that become
+    the new connector data. The decoded responses are owned by the event loop
+    and are not changed, so this can run in an executor.
+    """
+    connector_data = copy.deepcopy(status)
+    update_state_data(connector_data, copy.deepcopy(names))
+    # get state from coordinator cash in case the current state is unknown
+    coordinator_update: dict[int, dict] = copy.deepcopy(previous)
+    device_update = copy.deepcopy(connector_data)
+    new_devices = False
+    updated: set[int] = set()
+    changed: set[int] = set()
+    transitions: list[tuple[int, dict, dict]] = []
+    for device_id, device_data in device_update.items():
+        if ATTR_DEVICE_STATE not in device_data:
+            # No valid device state, do not update
+            continue
+        if device_id not in coordinator_update:
+            # new device discovered, an alarm that is already going off
+            # transitions from no state
+            new_devices = True
+            if device_transition(device_data[ATTR_DEVICE_STATE]) == TRANSITION_ALARM:
+                transitions.append((device_id, {}, device_data))
+            coordinator_update[device_id] = device_data
+            # a device discovered with an unknown state had no valid update
+            if device_data[ATTR_DEVICE_STATE] != STATE_UNKNOWN:
+                updated.add(device_id)
+            changed.add(device_id)
+        elif device_data[ATTR_DEVICE_STATE] == STATE_UNKNOWN:
+            # do not process unknown state updates
+            continue
+        else:
+            # full state update to coordinator device data
+            old_data = coordinator_update[device_id]
+            transition = device_transition(device_data[ATTR_DEVICE_STATE])
+            if transition is not None and transition != device_transition(
+                old_data.get(ATTR_DEVICE_STATE)
+            ):
+                transitions.append((device_id, old_data, device_data))
+            if any(
+                device_data.get(key) != old_data.get(key)
+                for key in (ATTR_DEVICE_STATE, ATTR_BATTERY_LEVEL)
+            ):
+                changed.add(device_id)
+            coordinator_update[device_id] = device_data
+            updated.add(device_id)
+    return ProcessedResponse(
+        connector_data=connector_data,
+        coordinator_update=coordinator_update,
+        updated=frozenset(updated),
+        changed=frozenset(changed),
+        valid_devices=frozenset(
+            device_id
+            for device_id, device_data in device_update.items()
+            if device_data.get(ATTR_DEVICE_STATE, STATE_UNKNOWN) != STATE_UNKNOWN
+        ),
+        new_devices=new_devices,
+        transitions=tuple(transitions),
+    )
+
+
+def connection_settings(entry: ConfigEntry) -> tuple[str, int, str | None]:
+    """Return the host, port and API key of the K1 connector of an entry."""
+    return (
+        entry.data[CONF_HOST],
+        entry.data[CONF_PORT],
+        entry.data.get(CONF_API_KEY),
+    )
+
+
+@dataclass(eq=False)
+class PendingCommand:
+    """A command that waits for or holds the API lock."""
+
+    device_id: int | str | None
+    deadline: asyncio.Timeout
+    queued: bool = True
+    cancelled: bool = False
+
+
+@dataclass
+class OptimisticState:
+    """Values set by commands that the K1 did not confirm yet."""
+
+    values: dict[str, Any]
+    expires: datetime
+    # Values before the first command, a report of another value is real
+    previous: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class DeviceFreshness:
+    """Freshness of the state of a device."""
+
+    last_update: datetime | None = None
+    missed_polls: int = 0
+    # Devices without a valid update become stale counting from discovery
+    first_seen: datetime | None = None
+
+
+class ElroConnectsK1(DataUpdateCoordinator, K1Client):
     """Communicate with the Elro Connects K1 adapter and update the coordinator."""
 
     def __init__(
@@ -72,7 +307,50 @@ class ElroConnectsK1(DataUpdateCoordinator, K1):
         self._connector_data: dict[int, dict] = {}
         self._api_lock = asyncio.Lock()
         self._connector_id = entry.data[CONF_CONNECTOR_ID]
-        self._retry_count = 0
+        self._connection = K1ConnectionManager()
+        self._connection_settings = connection_settings(entry)
+        self._response_time: datetime | None = None
+        self._freshness: dict[int, DeviceFreshness] = {}
+        self._capture: K1TrafficCapture | None = None
+        self._profiler: K1PollProfiler | None = None
+        self._fingerprint: tuple | None = None
+        # The status and names of the last changed K1 response
+        self._response: tuple[dict[int, dict], dict[int, dict] | None] = ({}, None)
+        self._unchanged_response = False
+        self._skip_listeners = False
+        self._valid_devices: frozenset[int] = frozenset()
+        self._stale_snapshot: frozenset[int] = frozenset()
+        # The K1 device names that were synced to the device registry
+        self._device_names: dict[int, str] = {}
+        # Consecutive polls devices were not reported by the K1
+        self._absent_polls: dict[int, int] = {}
+        self._pending_commands: set[PendingCommand] = set()
+        # Optimistic values of commands, on top of the coordinator data
+        self._optimistic: dict[int, OptimisticState] = {}
+        self.polls = 0
+        self.skipped_polls = 0
+        self.metrics = K1Metrics()
+        self.aggregates = HubAggregates()
+        self.tracer = K1Tracer(self._connector_id)
+        # Sensor state writes suppressed by a deadband or minimum dwell time
+        self.suppressed_writes = 0
+        self._status_decoder = DeviceStatusDecoder()
+        # Decode the status of all devices in one batch
+        self._get_all_equipment_status = CommandAttributes(
+            {**GET_ALL_EQUIPMENT_STATUS, "content_transformer": self._status_decoder}
+        )
+        self._stale_timeout = timedelta(
+            seconds=entry.options.get(CONF_STALE_TIMEOUT, DEFAULT_STALE_TIMEOUT)
+        )
+        self._prune_after: int = entry.options.get(
+            CONF_PRUNE_AFTER, DEFAULT_PRUNE_AFTER
+        )
+        self._compact_sensors: bool = entry.options.get(
+            CONF_COMPACT_SENSORS, DEFAULT_COMPACT_SENSORS
+        )
+        self._executor_processing: bool = entry.options.get(
+            CONF_EXECUTOR_PROCESSING, DEFAULT_EXECUTOR_PROCESSING
+        )
 
         self._device_registry_updated = hass.bus.async_listen(
             EVENT_DEVICE_REGISTRY_UPDATED, self._async_device_updated
@@ -86,7 +364,7 @@ class ElroConnectsK1(DataUpdateCoordinator, K1):
             update_method=self._async_update_data,
             update_interval=timedelta(seconds=DEFAULT_INTERVAL),
         )
-        K1.__init__(
+        K1Client.__init__(
             self,
             entry.data[CONF_HOST],
             entry.data[CONF_CONNECTOR_ID],
@@ -96,35 +374,334 @@ class ElroConnectsK1(DataUpdateCoordinator, K1):
 
     async def _async_update_data(self) -> dict[int, dict]:
         """Update coordinator data via API."""
-        # get state from coordinator cash in case the current state is unknown
-        coordinator_update: dict[int, dict] = copy.deepcopy(self.data or {})
-        new_devices = False
+        self._skip_listeners = False
+        # Polls are not short circuited, the update interval applies the
+        # backoff and every poll probes the K1
         try:
-            await self._async_fetch_connector_data()
-            device_update = copy.deepcopy(self._connector_data)
-            for device_id, device_data in device_update.items():
-                if ATTR_DEVICE_STATE not in device_data:
-                    # No valid device state, do not update
-                    continue
-                if device_id not in coordinator_update:
-                    # new device discovered
-                    new_devices = True
-                    coordinator_update[device_id] = device_data
-                elif device_data[ATTR_DEVICE_STATE] == STATE_UNKNOWN:
-                    # do not process unknown state updates
-                    continue
-                else:
-                    # full state update to coordinator device data
-                    coordinator_update[device_id] = device_data
-
+            with self._stage(STAGE_FETCH):
+                fresh = await self._async_fetch_connector_data()
+            if not fresh:
+                # No new data, keep the cached state
+                self._update_freshness(self.data or {}, set())
+                return copy.deepcopy(self.data or {})
         except K1.K1ConnectionError as err:
             raise UpdateFailed(err) from err
 
-        if new_devices:
+        self.polls += 1
+        with self._stage(STAGE_PROCESS):
+            processed: ProcessedResponse | None = None
+            if not self._unchanged_response:
+                processed = await self._async_process_response(*self._response)
+                self._connector_data = processed.connector_data
+            pruned = self._count_absent_polls()
+            if processed is None:
+                if self.data is not None and not pruned:
+                    # Same response as the last poll, only the freshness is updated
+                    self._update_freshness(self.data, self._valid_devices)
+                    expired = self._settle_optimistic(self.data, self._valid_devices)
+                    stale_snapshot = frozenset(self.stale_devices)
+                    if stale_snapshot == self._stale_snapshot and not expired:
+                        self.skipped_polls += 1
+                        self._skip_listeners = True
+                    self._stale_snapshot = stale_snapshot
+                    self.metrics.stale_devices = len(stale_snapshot)
+                    return self.data
+                processed = await self._async_process_response(
+                    self._connector_data, None
+                )
+
+            coordinator_update = processed.coordinator_update
+            transitions = [
+                self._device_transition(device_id, old_data, new_data)
+                for device_id, old_data, new_data in processed.transitions
+            ]
+            for device_id in pruned:
+                del coordinator_update[device_id]
+            self.aggregates.update(coordinator_update, processed.changed - pruned)
+            self.aggregates.remove(pruned)
+            self._update_freshness(coordinator_update, processed.updated)
+            self._settle_optimistic(coordinator_update, processed.updated)
+            self._async_sync_device_names(processed.connector_data)
+            self._valid_devices = processed.valid_devices
+            self._stale_snapshot = frozenset(self.stale_devices)
+            self.metrics.stale_devices = len(self._stale_snapshot)
+            self.metrics.update_devices(coordinator_update, processed.changed - pruned)
+            self.metrics.remove_devices(pruned)
+
+        with self._stage(STAGE_DISPATCH):
+            # Fire transition events straight from the poll path,
+            # before the entities process the update
+            for transition in transitions:
+                if transition[ATTR_TRANSITION] == TRANSITION_ALARM:
+                    async_dispatcher_send(
+                        self.hass, ELRO_CONNECTS_ALARM, self, transition
+                    )
+                self.hass.bus.async_fire(EVENT_DEVICE_TRANSITION, transition)
+
+            if processed.new_devices:
+                async_dispatcher_send(
+                    self.hass, ELRO_CONNECTS_NEW_DEVICE.format(self._entry.entry_id)
+                )
+            if pruned:
+                self._async_prune_devices(pruned)
+        return coordinator_update
+
+    async def _async_refresh(self, *args: Any, **kwargs: Any) -> None:
+        """Refresh data and profile the poll cycle if requested."""
+        started = time.monotonic()
+        with self.tracer.span(SPAN_POLL, root=True):
+            if (profiler := self._profiler) is None:
+                await super()._async_refresh(*args, **kwargs)
+                self.metrics.poll_duration.observe(time.monotonic() - started)
+                return
+            profiler.start_cycle()
+            try:
+                with profiler.stage(STAGE_CYCLE):
+                    await super()._async_refresh(*args, **kwargs)
+            finally:
+                if (
+                    profiler.end_cycle(self._connector_id)
+                    and self._profiler is profiler
+                ):
+                    self._profiler = None
+        self.metrics.poll_duration.observe(time.monotonic() - started)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all registered listeners, unless the poll was skipped."""
+        if self._skip_listeners:
+            self._skip_listeners = False
+            # Only the K1 connector entities report the skipped poll
             async_dispatcher_send(
-                self.hass, ELRO_CONNECTS_NEW_DEVICE.format(self._entry.entry_id)
+                self.hass, ELRO_CONNECTS_HUB_UPDATE.format(self._connector_id)
             )
-        return coordinator_update
+            return
+        with self._stage(STAGE_LISTENERS):
+            super().async_update_listeners()
+            async_dispatcher_send(self.hass, ELRO_CONNECTS_DATA_UPDATED, self)
+
+    @contextmanager
+    def _stage(self, name: str) -> Iterator[None]:
+        """Trace a stage of the poll cycle and record its time when profiling."""
+        with self.tracer.span(name):
+            if self._profiler is None:
+                yield
+                return
+            with self._profiler.stage(name):
+                yield
+
+    def async_start_profile(self, profiler: K1PollProfiler) -> None:
+        """Profile the next poll cycles."""
+        self._profiler = profiler
+        self._logger.info(
+            "Profiling %s poll cycles of K1 connector %s",
+            profiler.cycles,
+            self._connector_id,
+        )
+
+    def async_stop_profile(self) -> None:
+        """Stop profiling and write the results collected so far."""
+        if (profiler := self._profiler) is None:
+            return
+        self._profiler = None
+        profiler.finish(self._connector_id)
+
+    def _update_freshness(
+        self, devices: Iterable[int], updated: AbstractSet[int]
+    ) -> None:
+        """Update the last valid update time and missed poll count of devices."""
+        for device_id in devices:
+            if (freshness := self._freshness.get(device_id)) is None:
+                freshness = self._freshness[device_id] = DeviceFreshness(
+                    first_seen=self._response_time
+                )
+            if device_id in updated:
+                freshness.last_update = self._response_time
+                freshness.missed_polls = 0
+            else:
+                freshness.missed_polls += 1
+
+    def is_stale(self, device_id: int) -> bool:
+        """Return True if the device has no valid update within the staleness limit."""
+        if not self._stale_timeout:
+            return False
+        if (freshness := self._freshness.get(device_id)) is None:
+            return True
+        if (last_update := freshness.last_update or freshness.first_seen) is None:
+            return True
+        return dt_util.utcnow() - last_update > self._stale_timeout
+
+    @callback
+    def async_set_optimistic(self, device_id: int, values: dict[str, Any]) -> None:
+        """Hold the values a command set until the K1 confirms them."""
+        state = self._optimistic.setdefault(
+            device_id, OptimisticState({}, dt_util.utcnow())
+        )
+        device_data = (self.data or {}).get(device_id) or {}
+        for key in values:
+            state.previous.setdefault(key, device_data.get(key))
+        state.values.update(values)
+        state.expires = dt_util.utcnow() + OPTIMISTIC_TIMEOUT
+
+    def optimistic_data(self, device_id: int, data: dict) -> Mapping[str, Any]:
+        """Return the device data with the optimistic values that did not expire."""
+        if (state := self._optimistic.get(device_id)) is None or not data:
+            return data
+        if dt_util.utcnow() >= state.expires:
+            return data
+        return ChainMap(state.values, data)
+
+    def _settle_optimistic(
+        self, devices: dict[int, dict], updated: AbstractSet[int]
+    ) -> bool:
+        """Drop the confirmed, overruled and expired optimistic values.
+
+        The values are confirmed by a valid update that reports all of them.
+        They are overruled by a valid update that reports another value than
+        before the command, or an alarm, a real alarm is never hidden.
+        Return True if values expired, the state of the entities changes.
+        """
+        if not self._optimistic:
+            return False
+        now = dt_util.utcnow()
+        expired = False
+        for device_id, state in list(self._optimistic.items()):
+            if now >= state.expires:
+                del self._optimistic[device_id]
+                expired = True
+            elif device_id in updated and (
+                self._optimistic_confirmed(state, devices[device_id])
+                or self._optimistic_overruled(state, devices[device_id])
+            ):
+                del self._optimistic[device_id]
+        return expired
+
+    @staticmethod
+    def _optimistic_confirmed(state: OptimisticState, device_data: dict) -> bool:
+        """Return True if the device reports all optimistic values."""
+        return all(device_data.get(key) == value for key, value in state.values.items())
+
+    @staticmethod
+    def _optimistic_overruled(state: OptimisticState, device_data: dict) -> bool:
+        """Return True if the device reports a change the command did not make."""
+        device_state = device_data.get(ATTR_DEVICE_STATE)
+        if device_state in STATES_ON and device_state != state.values.get(
+            ATTR_DEVICE_STATE
+        ):
+            return True
+        return any(
+            device_data.get(key) not in (value, state.previous.get(key))
+            for key, value in state.values.items()
+        )
+
+    def _count_absent_polls(self) -> set[int]:
+        """Count the polls devices were absent and return the devices to prune."""
+        reported = self._connector_data
+        known = self.data or {}
+        self._absent_polls = {
+            device_id: self._absent_polls.get(device_id, 0) + 1
+            for device_id in known
+            if device_id not in reported
+        }
+        if not self._prune_after:
+            return set()
+        return {
+            device_id
+            for device_id, absent_polls in self._absent_polls.items()
+            if absent_polls >= self._prune_after
+        }
+
+    @callback
+    def _async_prune_devices(self, device_ids: set[int]) -> None:
+        """Remove the devices that disappeared from the K1 in one batch."""
+        device_registry = dr.async_get(self.hass)
+        for device_id in device_ids:
+            self._absent_polls.pop(device_id, None)
+            self._freshness.pop(device_id, None)
+            self._optimistic.pop(device_id, None)
+            self._device_names.pop(device_id, None)
+            device_entry = device_registry.async_get_device(
+                identifiers={(DOMAIN, f"{self._connector_id}_{device_id}")}
+            )
+            if device_entry is not None:
+                # The entity registry also removes the entities of the device
+                device_registry.async_update_device(
+                    device_entry.id, remove_config_entry_id=self._entry.entry_id
+                )
+        async_dispatcher_send(
+            self.hass,
+            ELRO_CONNECTS_REMOVED_DEVICE.format(self._entry.entry_id),
+            device_ids,
+        )
+        self._logger.info(
+            "Removed devices %s that disappeared from K1 connector %s",
+            sorted(device_ids),
+            self._connector_id,
+        )
+
+    @callback
+    def _async_sync_device_names(self, device_update: dict[int, dict]) -> None:
+        """Apply the device names that were changed on the K1 to the registry.
+
+        Only the name is updated, the name set by the user is kept and is not
+        written back to the K1 by `_async_device_updated`.
+        """
+        changed = {
+            device_id: name
+            for device_id, device_data in device_update.items()
+            if (name := device_data.get(ATTR_NAME))
+            and self._device_names.get(device_id) != name
+        }
+        if not changed:
+            return
+        device_registry = dr.async_get(self.hass)
+        renamed = 0
+        for device_id, name in changed.items():
+            device_entry = device_registry.async_get_device(
+                identifiers={(DOMAIN, f"{self._connector_id}_{device_id}")}
+            )
+            # Devices that are not registered yet are added with this name
+            if device_entry is not None and device_entry.name != name:
+                device_registry.async_update_device(device_entry.id, name=name)
+                renamed += 1
+        self._device_names.update(changed)
+        if renamed:
+            self._logger.debug(
+                "Synced %s device names from K1 connector %s",
+                renamed,
+                self._connector_id,
+            )
+
+    async def _async_process_response(
+        self,
+        status: dict[int, dict[str, Any]],
+        names: dict[int, dict[str, Any]] | None,
+    ) -> ProcessedResponse:
+        """Process a K1 response, in an executor if configured."""
+        if self._executor_processing:
+            return await self.hass.async_add_executor_job(
+                process_response, self.data or {}, status, names
+            )
+        return process_response(self.data or {}, status, names)
+
+    def _device_transition(
+        self, device_id: int, old_data: dict, new_data: dict
+    ) -> dict[str, Any]:
+        """Return the transition event data of a device that changed state class."""
+        old_state = old_data.get(ATTR_DEVICE_STATE)
+        new_state = new_data[ATTR_DEVICE_STATE]
+        return {
+            ATTR_CONNECTOR_ID: self._connector_id,
+            ATTR_DEVICE_ID: device_id,
+            ATTR_DEVICE_TYPE: new_data.get(ATTR_DEVICE_TYPE),
+            ATTR_NAME: new_data.get(ATTR_NAME),
+            ATTR_FROM_STATE: old_state,
+            ATTR_TO_STATE: new_state,
+            ATTR_TRANSITION: device_transition(new_state),
+            ATTR_RESPONSE_TIME: (
+                self._response_time.isoformat() if self._response_time else None
+            ),
+        }
 
     async def _async_device_updated(self, event: Event) -> None:
         """Propagate name changes though the connector."""
@@ -162,55 +739,493 @@ class ElroConnectsK1(DataUpdateCoordinator, K1):
                 ),
             )
 
-    async def _async_fetch_connector_data(self) -> None:
-        """Fetch new update from the K1 connector."""
+    async def _async_fetch_connector_data(self) -> bool:
+        """Fetch new update from the K1 connector, return True if data was received."""
 
         try:
-            async with self._api_lock:
+            async with self._async_api_lock():
                 new_data: dict[int, dict] = {}
-                update_status = await self.async_process_command(
-                    GET_ALL_EQUIPMENT_STATUS
+                update_status = await self._async_request(
+                    self._get_all_equipment_status
                 )
+                self._response_time = dt_util.utcnow()
                 new_data = update_status
-                update_names = await self.async_process_command(GET_DEVICE_NAMES)
-                update_state_data(new_data, update_names)
-                self._retry_count = 0
-                self._connector_data = new_data
+                update_names = await self._async_request(GET_DEVICE_NAMES)
+                fingerprint = response_fingerprint(new_data, update_names)
+                self._unchanged_response = fingerprint == self._fingerprint
+                if not self._unchanged_response:
+                    # Merged with the names when the response is processed
+                    self._response = (new_data, update_names)
+                    self._fingerprint = fingerprint
         except K1.K1ConnectionError as err:
-            self._retry_count += 1
-            if not self._connector_data or self._retry_count >= MAX_RETRIES:
+            await self._async_handle_connection_error()
+            if not self._connector_data or self._connection.circuit_open:
                 raise K1.K1ConnectionError(err) from err
+            return False
+        self._handle_connection_success()
+        return True
+
+    @asynccontextmanager
+    async def _async_api_lock(self) -> AsyncIterator[None]:
+        """Hold the API lock and record the time waited for it."""
+        started = time.monotonic()
+        with self.tracer.span(SPAN_LOCK_WAIT):
+            await self._api_lock.acquire()
+        try:
+            self.metrics.lock_wait.observe(time.monotonic() - started)
+            yield
+        finally:
+            self._api_lock.release()
+
+    async def _async_request(
+        self,
+        command: CommandAttributes,
+        **argv: int | str,
+    ) -> dict[int, dict[str, Any]] | None:
+        """Send a request to the K1 connector, the API lock must be held."""
+        # A cold request has to set up a session with the K1 first
+        cold = not self._session
+        started = time.monotonic()
+        try:
+            with self.tracer.span(
+                SPAN_REQUEST, command=command["cmd_id"].name, cold=cold
+            ):
+                response = await self.async_process_command(command, **argv)
+        except K1.K1ConnectionError as err:
+            if self._capture is not None:
+                self._capture.record(
+                    command, argv, started, time.monotonic() - started, error=err
+                )
+            raise
+        duration = time.monotonic() - started
+        self._connection.record_request(duration, cold)
+        self.metrics.request_duration.observe(duration)
+        if self._capture is not None:
+            self._capture.record(command, argv, started, duration, response)
+        return response
+
+    async def _async_connect(self) -> None:
+        """Set up a new session with the K1 connector, the API lock must be held."""
+        if self._transport is not None:
+            # Close the socket of the dropped session
+            await self.async_configure(
+                self._entry.data[CONF_HOST],
+                self._entry.data[CONF_PORT],
+                self._entry.data.get(CONF_API_KEY),
+            )
+        started = time.monotonic()
+        await self.async_connect()
+        self._connection.record_connect(time.monotonic() - started)
+
+    @property
+    def setup_timeout(self) -> int:
+        """Return the time budget for the first refresh in seconds, 0 to wait."""
+        return self._entry.options.get(CONF_SETUP_TIMEOUT, DEFAULT_SETUP_TIMEOUT)
+
+    async def async_first_refresh(self) -> None:
+        """Do the first refresh while the config entry is set up.
+
+        Without a setup timeout ConfigEntryNotReady is raised when the K1
+        can not be reached. With a setup timeout the setup continues when the
+        first refresh failed or did not finish in time, the known devices are
+        added as unavailable and the K1 is connected in the background.
+        """
+        if not (timeout := self.setup_timeout):
+            await self.async_warm_up()
+            await self.async_config_entry_first_refresh()
+            return
+
+        refresh = self._entry.async_create_background_task(
+            self.hass,
+            self._async_background_refresh(),
+            f"elro_connects first refresh {self._connector_id}",
+        )
+        await asyncio.wait((refresh,), timeout=timeout)
+        if refresh.done() and self.last_update_success:
+            return
+        self._logger.warning(
+            "K1 connector %s is not available yet, connecting in the background",
+            self._connector_id,
+        )
+        self._async_add_known_devices()
+
+    async def _async_background_refresh(self) -> None:
+        """Connect and do the first refresh."""
+        await self.async_warm_up()
+        await self.async_refresh()
+
+    @callback
+    def _async_add_known_devices(self) -> None:
+        """Add the devices known from the registries until the K1 reports them."""
+        if self._connector_data:
+            return
+        device_registry = dr.async_get(self.hass)
+        entity_registry = er.async_get(self.hass)
+        model_types = {
+            model: device_type for device_type, model in DEVICE_MODELS.items()
+        }
+        known: dict[int, dict] = {}
+        for entity_entry in er.async_entries_for_config_entry(
+            entity_registry, self._entry.entry_id
+        ):
+            # Device entity unique ID's are formatted as <connector_id>-<device_id>-<key>
+            parts = entity_entry.unique_id.split("-", 2)
+            if (
+                len(parts) != 3
+                or parts[0] != self._connector_id
+                or not parts[1].isdigit()
+                or entity_entry.device_id is None
+                or (device_entry := device_registry.async_get(entity_entry.device_id))
+                is None
+            ):
+                continue
+            device_type = model_types.get(device_entry.model, device_entry.model)
+            device_data = known.setdefault(
+                int(parts[1]),
+                {ATTR_DEVICE_TYPE: device_type, ATTR_NAME: device_entry.name},
+            )
+            if parts[2] != device_type:
+                device_data[parts[2]] = None
+        self._connector_data = known
+
+    @property
+    def keepalive(self) -> bool:
+        """Return True if the session with the K1 is kept alive."""
+        return self._entry.options.get(CONF_KEEPALIVE, DEFAULT_KEEPALIVE)
+
+    async def async_warm_up(self) -> None:
+        """Set up the session before the first request is made."""
+        if not self.keepalive:
+            return
+        async with self._async_api_lock():
+            try:
+                await self._async_connect()
+            except K1.K1ConnectionError as err:
+                # The first refresh will handle the connection error
+                self._logger.debug(
+                    "Warm up of K1 connector %s failed: %s", self._connector_id, err
+                )
+
+    @callback
+    def async_start_heartbeat(self) -> CALLBACK_TYPE:
+        """Start the heartbeat that keeps the session with the K1 ready."""
+        return async_track_time_interval(
+            self.hass,
+            self._async_heartbeat,
+            HEARTBEAT_INTERVAL,
+            name=f"elro_connects heartbeat {self._connector_id}",
+        )
+
+    @callback
+    def _async_heartbeat(self, now: datetime) -> None:
+        """Reconnect in the background when the session was dropped.
+
+        During an outage the backed off polls probe the K1 connector.
+        """
+        if (
+            not self.keepalive
+            or self._session
+            or self._api_lock.locked()
+            or self._connection.failures
+        ):
+            return
+        self.hass.async_create_background_task(
+            self._async_reconnect(), f"elro_connects reconnect {self._connector_id}"
+        )
+
+    async def _async_reconnect(self) -> None:
+        """Set up a new session with the K1 connector."""
+        async with self._async_api_lock():
+            if self._session:
+                return
+            try:
+                await self._async_connect()
+            except K1.K1ConnectionError as err:
+                self._logger.debug(
+                    "Reconnect to K1 connector %s failed: %s", self._connector_id, err
+                )
+                await self._async_handle_connection_error()
+                return
+        self._logger.debug("Reconnected to K1 connector %s", self._connector_id)
+
+    async def _async_handle_connection_error(self) -> None:
+        """Back off polling and recreate the socket after a connection error."""
+        self._fingerprint = None
+        self.metrics.retries += 1
+        delay = self._connection.record_failure()
+        self.update_interval = max(timedelta(seconds=DEFAULT_INTERVAL), delay)
+        with self.tracer.span(SPAN_RETRY):
+            await self._async_close_session()
+
+    async def _async_close_session(self) -> None:
+        """Close the socket, the next request will set up a new session."""
+        await self.async_configure(
+            self._entry.data[CONF_HOST],
+            self._entry.data[CONF_PORT],
+            self._entry.data.get(CONF_API_KEY),
+        )
+
+    def _handle_connection_success(self) -> None:
+        """Restore polling after a successful request."""
+        if recovery_time := self._connection.record_success():
+            self._logger.info(
+                "Connection with K1 connector %s recovered after %s",
+                self._connector_id,
+                recovery_time,
+            )
+        self.update_interval = timedelta(seconds=DEFAULT_INTERVAL)
+
+    @property
+    def command_timeout(self) -> float | None:
+        """Return the default deadline of a command in seconds, None to wait."""
+        return (
+            self._entry.options.get(CONF_COMMAND_TIMEOUT, DEFAULT_COMMAND_TIMEOUT)
+            or None
+        )
 
     async def async_command(
         self,
         command: CommandAttributes,
+        *,
+        timeout: float | None = None,
+        **argv: int | str,
+    ) -> dict[int, dict[str, Any]] | None:
+        """Execute a synchronized command through the K1 connector.
+
+        The deadline covers the wait for the API lock and the request, without
+        a `timeout` the command timeout option applies. K1CommandTimeout is
+        raised when the deadline passes, K1CommandCancelled when the command
+        was cancelled while it was queued.
+        """
+        if not self._connection.allow_request():
+            raise K1Unavailable(
+                f"K1 connector {self._connector_id} is unavailable, "
+                f"next attempt at {self._connection.retry_at}"
+            )
+        if timeout is None:
+            timeout = self.command_timeout
+        name = command["cmd_id"].name
+        started = time.monotonic()
+        with self.tracer.span(SPAN_COMMAND, command=name, **argv):
+            try:
+                async with asyncio.timeout(timeout) as deadline:
+                    pending = PendingCommand(argv.get("device_ID"), deadline)
+                    self._pending_commands.add(pending)
+                    try:
+                        result = await self._async_locked_command(
+                            pending, command, **argv
+                        )
+                    finally:
+                        self._pending_commands.discard(pending)
+            except (TimeoutError, K1.K1ConnectionError) as err:
+                if not deadline.expired():
+                    raise
+                if pending.cancelled:
+                    raise K1CommandCancelled(
+                        f"Command {name} to K1 connector {self._connector_id} "
+                        "was cancelled"
+                    ) from err
+                raise K1CommandTimeout(
+                    f"Command {name} to K1 connector {self._connector_id} "
+                    f"timed out after {timeout} s"
+                ) from err
+        self._handle_connection_success()
+        self.metrics.command_duration.observe(time.monotonic() - started)
+        return result
+
+    async def _async_locked_command(
+        self,
+        pending: PendingCommand,
+        command: CommandAttributes,
         **argv: int | str,
     ) -> dict[int, dict[str, Any]] | None:
-        """Execute a synchronized command through the K1 connector."""
-        async with self._api_lock:
-            return await self.async_process_command(command, **argv)
+        """Wait for the API lock and send the command."""
+        async with self._async_api_lock():
+            pending.queued = False
+            # The command changes the state, process the next poll in full
+            self._fingerprint = None
+            try:
+                return await self._async_request(command, **argv)
+            except K1.K1ConnectionError:
+                if pending.deadline.expired():
+                    # The request was cut short, a late response must not
+                    # answer the next request
+                    await self._async_close_session()
+                else:
+                    await self._async_handle_connection_error()
+                raise
+
+    @callback
+    def async_cancel_commands(self, device_id: int | None = None) -> int:
+        """Cancel the queued commands of a device or of all devices.
+
+        Commands that already hold the API lock are not cancelled, they might
+        already be sent. Returns the number of cancelled commands.
+        """
+        cancelled = 0
+        for pending in self._pending_commands:
+            if (
+                pending.queued
+                and not pending.deadline.expired()
+                and (device_id is None or pending.device_id == device_id)
+            ):
+                pending.cancelled = True
+                pending.deadline.reschedule(self.hass.loop.time())
+                cancelled += 1
+        return cancelled
+
+    async def async_fetch_states(self) -> dict[int, dict[str, Any]]:
+        """Fetch the current state of all devices, bypassing the coordinator."""
+        return await self.async_command(self._get_all_equipment_status) or {}
 
     async def async_update_settings(
         self, hass: HomeAssistant, entry: ConfigEntry
     ) -> None:
-        """Process updated settings."""
-        async with self._api_lock:
-            await self.async_configure(
-                entry.data[CONF_HOST],
-                entry.data[CONF_PORT],
-                entry.data.get(CONF_API_KEY),
-            )
+        """Process updated settings in place.
+
+        The coordinator data and entities are kept, only a changed compact
+        sensors option reloads the entry. The session with the K1 is kept
+        unless the host, port or API key changed.
+        """
+        if (
+            entry.options.get(CONF_COMPACT_SENSORS, DEFAULT_COMPACT_SENSORS)
+            != self._compact_sensors
+        ):
+            # The sensor entities have to be set up again
+            hass.config_entries.async_schedule_reload(entry.entry_id)
+            return
+        if (settings := connection_settings(entry)) != self._connection_settings:
+            await self._async_swap_transport(settings)
+        self._stale_timeout = timedelta(
+            seconds=entry.options.get(CONF_STALE_TIMEOUT, DEFAULT_STALE_TIMEOUT)
+        )
+        self._prune_after = entry.options.get(CONF_PRUNE_AFTER, DEFAULT_PRUNE_AFTER)
+        self._executor_processing = entry.options.get(
+            CONF_EXECUTOR_PROCESSING, DEFAULT_EXECUTOR_PROCESSING
+        )
+
+    async def _async_swap_transport(
+        self, settings: tuple[str, int, str | None]
+    ) -> None:
+        """Move to a new K1 address or API key.
+
+        The API lock is held until the new session is set up, no request is
+        sent while the transport is swapped.
+        """
+        async with self._async_api_lock():
+            await self.async_configure(*settings)
+            self._connection_settings = settings
+            self._connection.reset()
+            self._fingerprint = None
+            if self.keepalive:
+                try:
+                    await self._async_connect()
+                except K1.K1ConnectionError as err:
+                    # The next poll will handle the connection error
+                    self._logger.debug(
+                        "Connecting to K1 connector %s failed: %s",
+                        self._connector_id,
+                        err,
+                    )
+        self._logger.info(
+            "K1 connector %s moved to %s:%s", self._connector_id, *settings[:2]
+        )
+
+    async def async_reload(self) -> None:
+        """Reload in place, the next poll is processed in full."""
+        await self.async_update_settings(self.hass, self._entry)
+        self._fingerprint = None
+        await self.async_refresh()
+
+    def async_start_capture(self, path: str) -> None:
+        """Start capturing the K1 traffic to a file."""
+        if self._capture is not None:
+            return
+        self._capture = K1TrafficCapture(self.hass, path)
+        self._logger.info(
+            "Capturing traffic of K1 connector %s to %s", self._connector_id, path
+        )
+
+    async def async_stop_capture(self) -> K1TrafficCapture | None:
+        """Stop capturing the K1 traffic and return the finished capture."""
+        if (capture := self._capture) is None:
+            return None
+        self._capture = None
+        await capture.async_close()
+        self._logger.info(
+            "Captured %s requests of K1 connector %s to %s",
+            capture.records,
+            self._connector_id,
+            capture.path,
+        )
+        return capture
+
+    @property
+    def capture(self) -> K1TrafficCapture | None:
+        """Return the active capture."""
+        return self._capture
+
+    @property
+    def profiler(self) -> K1PollProfiler | None:
+        """Return the active profiler."""
+        return self._profiler
 
     @property
     def connector_data(self) -> dict[int, dict]:
         """Return the synced state."""
         return self._connector_data
 
+    @property
+    def connection(self) -> K1ConnectionManager:
+        """Return the connection manager."""
+        return self._connection
+
     @property
     def connector_id(self) -> str:
         """Return the K1 connector ID."""
         return self._connector_id
 
+    @property
+    def compact_sensors(self) -> bool:
+        """Return True if battery and signal are device state attributes."""
+        return self._compact_sensors
+
+    @property
+    def interlink(self) -> bool:
+        """Return True if the alarms of the connector are interlinked."""
+        return self._entry.options.get(CONF_INTERLINK, False)
+
+    @property
+    def response_time(self) -> datetime | None:
+        """Return the time the last status response was received."""
+        return self._response_time
+
+    @property
+    def skip_ratio(self) -> float:
+        """Return the fraction of polls that were skipped as unchanged."""
+        return self.skipped_polls / self.polls if self.polls else 0.0
+
+    @property
+    def stale_devices(self) -> list[int]:
+        """Return the ID's of the devices that are stale."""
+        return [device_id for device_id in self._freshness if self.is_stale(device_id)]
+
+    def device_freshness(self, device_id: int) -> DeviceFreshness | None:
+        """Return the freshness info of a device."""
+        return self._freshness.get(device_id)
+
+    @property
+    def k1_device_info(self) -> DeviceInfo:
+        """Return info for the K1 connector device."""
+        return DeviceInfo(
+            identifiers={
+                (dr.CONNECTION_NETWORK_MAC, format_mac(self._connector_id[3:]))
+            },
+            manufacturer="Elro",
+            model="K1 (SF40GA)",
+            name=f"Elro Connects K1 {self._connector_id}",
+        )
+
 
 class ElroConnectsEntity(CoordinatorEntity):
     """Defines a base entity for Elro Connects devices."""
@@ -237,26 +1252,52 @@ class ElroConnectsEntity(CoordinatorEntity):
         self._attr_unique_id = f"{self._connector_id}-{device_id}-{description.key}"
         self.entity_description = description
 
+    @property
+    def available(self) -> bool:
+        """Return if the device state is available and not stale."""
+        return (
+            super().available
+            # Known devices are added before the K1 reported them
+            and self._device_id in (self.coordinator.data or {})
+            and not self.coordinator.is_stale(self._device_id)
+        )
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel the queued commands of the device."""
+        await super().async_will_remove_from_hass()
+        self.coordinator.async_cancel_commands(self._device_id)
+
+    @property
+    def state_data(self) -> Mapping[str, Any]:
+        """Return the device data with the optimistic values of commands."""
+        return self.coordinator.optimistic_data(self._device_id, self.data)
+
     @callback
     def _handle_coordinator_update(self):
         """Fetch state from the device."""
-        self.data = self.coordinator.data[self._device_id]
+        self.data = (self.coordinator.data or {}).get(self._device_id, self.data)
         self.async_write_ha_state()
 
+    def _trace_command(self, service: str) -> AbstractContextManager[None]:
+        """Return a span that traces a command of the entity from the start."""
+        return self.coordinator.tracer.span(
+            f"{self.platform.domain}.{service}", root=True, entity_id=self.entity_id
+        )
+
+    @callback
+    def _async_write_command_state(self) -> None:
+        """Write the state after a command and trace the state write."""
+        with self.coordinator.tracer.span(SPAN_STATE_WRITE):
+            self.async_write_ha_state()
+
     @property
     def device_info(self) -> DeviceInfo:
         """Return info for device registry."""
         # connector
         device_registry = dr.async_get(self.hass)
-        mac_address = format_mac(self._connector_id[3:])
         k1_device = device_registry.async_get_or_create(
-            model="K1 (SF40GA)",
             config_entry_id=self._entry.entry_id,
-            identifiers={
-                (dr.CONNECTION_NETWORK_MAC, mac_address),
-            },
-            manufacturer="Elro",
-            name=f"Elro Connects K1 {self._connector_id}",
+            **self.coordinator.k1_device_info,
         )
         # sub device
         device_type = self.data[ATTR_DEVICE_TYPE]
@@ -269,3 +1310,15 @@ class ElroConnectsEntity(CoordinatorEntity):
             via_device_id=k1_device.id,
         )
         return device_info
+
+
+class K1Unavailable(HomeAssistantError):
+    """Error to indicate the K1 connector is unavailable."""
+
+
+class K1CommandTimeout(HomeAssistantError):
+    """Error to indicate a command did not finish before its deadline."""
+
+
+class K1CommandCancelled(HomeAssistantError):
+    """Error to indicate a queued command was cancelled."""
@@ -10,7 +10,7 @@ from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import EntityDescription
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import DOMAIN, ELRO_CONNECTS_NEW_DEVICE
+from .const import DOMAIN, ELRO_CONNECTS_NEW_DEVICE, ELRO_CONNECTS_REMOVED_DEVICE
 from .device import ElroConnectsK1
 
 
@@ -63,6 +63,11 @@ def async_set_up_discovery_helper(
 
         async_add_entities(new_items)
 
+    @callback
+    def _async_remove_devices(device_ids: set[int]) -> None:
+        # Pruned devices are added again when they come back
+        current.difference_update(device_ids)
+
     entry.async_on_unload(
         async_dispatcher_connect(
             hass,
@@ -70,5 +75,12 @@ def async_set_up_discovery_helper(
             _async_add_entities,
         )
     )
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass,
+            ELRO_CONNECTS_REMOVED_DEVICE.format(entry.entry_id),
+            _async_remove_devices,
+        )
+    )
     # Initial setup on first fetch
     _async_add_entities()
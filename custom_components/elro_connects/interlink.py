@@ -0,0 +1,121 @@
+"""Interlink the alarms of Elro Connects K1 connectors."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+from elro.api import K1
+from elro.device import (
+    ATTR_DEVICE_STATE,
+    ATTR_DEVICE_TYPE,
+    STATE_TEST_ALARM,
+    STATE_UNKNOWN,
+    STATES_OFFLINE,
+    STATES_ON,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    ATTR_CONNECTOR_ID,
+    ATTR_DEVICE_ID,
+    ATTR_LATENCY,
+    ATTR_TARGETS,
+    ATTR_TO_STATE,
+    DOMAIN,
+    ELRO_CONNECTS_ALARM,
+    EVENT_INTERLINK,
+)
+from .device import ElroConnectsK1
+from .siren import SIREN_DEVICE_TYPES
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@callback
+def async_setup_interlink(hass: HomeAssistant) -> None:
+    """Propagate alarms to the sirens of all interlinked K1 connectors."""
+
+    @callback
+    def _async_alarm(source_api: ElroConnectsK1, transition: dict[str, Any]) -> None:
+        """Start the interlink when an alarm goes off on an interlinked connector."""
+        if (
+            not source_api.interlink
+            # Test alarms are not propagated, this also prevents loops
+            or transition[ATTR_TO_STATE] == STATE_TEST_ALARM
+            # An open door or window sensor also reports an alarm state
+            or transition[ATTR_DEVICE_TYPE] not in SIREN_DEVICE_TYPES
+        ):
+            return
+        hass.async_create_background_task(
+            async_interlink(hass, source_api, transition),
+            f"elro_connects interlink {source_api.connector_id}",
+        )
+
+    async_dispatcher_connect(hass, ELRO_CONNECTS_ALARM, _async_alarm)
+
+
+async def async_interlink(
+    hass: HomeAssistant, source_api: ElroConnectsK1, transition: dict[str, Any]
+) -> dict[str, Any]:
+    """Sound the sirens of the interlinked connectors in parallel.
+
+    The latency is measured from the time the K1 response with the alarm
+    was received until the command to a siren was acknowledged.
+    """
+    detected = source_api.response_time or dt_util.utcnow()
+    targets = [
+        (elro_connects_api, device_id, device_data)
+        for elro_connects_api in hass.data.get(DOMAIN, {}).values()
+        if elro_connects_api.interlink
+        for device_id, device_data in (elro_connects_api.data or {}).items()
+        if device_data.get(ATTR_DEVICE_TYPE) in SIREN_DEVICE_TYPES
+        and device_data.get(ATTR_DEVICE_STATE) not in STATES_ON
+        and device_data.get(ATTR_DEVICE_STATE) not in STATES_OFFLINE
+        and device_data.get(ATTR_DEVICE_STATE) != STATE_UNKNOWN
+        and not (
+            elro_connects_api is source_api and device_id == transition[ATTR_DEVICE_ID]
+        )
+    ]
+
+    async def _async_sound(
+        elro_connects_api: ElroConnectsK1, device_id: int, device_data: dict
+    ) -> dict[str, Any]:
+        result: dict[str, Any] = {
+            ATTR_CONNECTOR_ID: elro_connects_api.connector_id,
+            ATTR_DEVICE_ID: device_id,
+        }
+        description = SIREN_DEVICE_TYPES[device_data[ATTR_DEVICE_TYPE]]
+        try:
+            await elro_connects_api.async_command(
+                description.test_alarm, device_ID=device_id
+            )
+        except (K1.K1ConnectionError, HomeAssistantError) as err:
+            return result | {"error": str(err)}
+        return result | {
+            ATTR_LATENCY: round((dt_util.utcnow() - detected).total_seconds(), 3)
+        }
+
+    results = await asyncio.gather(*(_async_sound(*target) for target in targets))
+    latencies = [result[ATTR_LATENCY] for result in results if ATTR_LATENCY in result]
+    event_data = {
+        ATTR_CONNECTOR_ID: source_api.connector_id,
+        ATTR_DEVICE_ID: transition[ATTR_DEVICE_ID],
+        ATTR_TO_STATE: transition[ATTR_TO_STATE],
+        ATTR_LATENCY: max(latencies, default=None),
+        ATTR_TARGETS: list(results),
+    }
+    _LOGGER.info(
+        "Alarm of device %s on K1 connector %s propagated to %s of %s sirens in %s s",
+        transition[ATTR_DEVICE_ID],
+        source_api.connector_id,
+        len(latencies),
+        len(results),
+        event_data[ATTR_LATENCY],
+    )
+    hass.bus.async_fire(EVENT_INTERLINK, event_data)
+    return event_data
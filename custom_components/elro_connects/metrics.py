@@ -0,0 +1,199 @@
+"""Prometheus metrics of the Elro Connects K1 connectors."""
+
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Callable, Iterable
+from typing import TYPE_CHECKING
+
+from aiohttp import web
+from elro.device import ATTR_DEVICE_STATE, STATE_UNKNOWN
+from homeassistant.components.http import KEY_HASS, HomeAssistantView
+
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from .device import ElroConnectsK1
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Summary:
+    """The number and sum of observed values."""
+
+    __slots__ = ("count", "sum")
+
+    def __init__(self) -> None:
+        """Initialize the summary."""
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Add an observed value."""
+        self.count += 1
+        self.sum += value
+
+
+class K1Metrics:
+    """Metrics of a K1 connector.
+
+    The metrics are updated by the coordinator when they change, a scrape
+    only renders them.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.poll_duration = Summary()
+        self.command_duration = Summary()
+        self.request_duration = Summary()
+        self.lock_wait = Summary()
+        self.retries = 0
+        self.device_states: Counter[str] = Counter()
+        self.stale_devices = 0
+        # The counted state per device
+        self._device_state: dict[int, str] = {}
+
+    def update_devices(self, devices: dict[int, dict], changed: Iterable[int]) -> None:
+        """Count the changed devices again after a processed poll."""
+        for device_id in changed:
+            device_state = devices[device_id].get(ATTR_DEVICE_STATE, STATE_UNKNOWN)
+            previous_state = self._device_state.get(device_id)
+            if device_state == previous_state:
+                continue
+            if previous_state is not None:
+                self._uncount(previous_state)
+            self.device_states[device_state] += 1
+            self._device_state[device_id] = device_state
+
+    def remove_devices(self, device_ids: Iterable[int]) -> None:
+        """Stop counting devices that were pruned."""
+        for device_id in device_ids:
+            if (device_state := self._device_state.pop(device_id, None)) is not None:
+                self._uncount(device_state)
+
+    def _uncount(self, device_state: str) -> None:
+        """Decrement the count of a state, states without devices are removed."""
+        self.device_states[device_state] -= 1
+        if not self.device_states[device_state]:
+            del self.device_states[device_state]
+
+
+# Name, type, help and the samples per connector as name suffix, labels and value
+Sample = tuple[str, dict[str, str], float]
+MetricSamples = Callable[["ElroConnectsK1"], Iterable[Sample]]
+METRICS: tuple[tuple[str, str, str, MetricSamples], ...] = (
+    (
+        "elro_connects_up",
+        "gauge",
+        "Whether the last poll of the K1 connector succeeded.",
+        lambda api: (("", {}, float(api.last_update_success)),),
+    ),
+    (
+        "elro_connects_polls_total",
+        "counter",
+        "Polls that received a response from the K1 connector.",
+        lambda api: (("", {}, api.polls),),
+    ),
+    (
+        "elro_connects_skipped_polls_total",
+        "counter",
+        "Polls that were skipped because the response was unchanged.",
+        lambda api: (("", {}, api.skipped_polls),),
+    ),
+    (
+        "elro_connects_poll_duration_seconds",
+        "summary",
+        "Duration of the poll cycles, including updating the entities.",
+        lambda api: _summary(api.metrics.poll_duration),
+    ),
+    (
+        "elro_connects_command_duration_seconds",
+        "summary",
+        "Duration of the commands, including waiting for the connector.",
+        lambda api: _summary(api.metrics.command_duration),
+    ),
+    (
+        "elro_connects_request_duration_seconds",
+        "summary",
+        "Duration of the requests to the K1 connector.",
+        lambda api: _summary(api.metrics.request_duration),
+    ),
+    (
+        "elro_connects_lock_wait_seconds",
+        "summary",
+        "Time spent waiting for other requests to the K1 connector.",
+        lambda api: _summary(api.metrics.lock_wait),
+    ),
+    (
+        "elro_connects_retries_total",
+        "counter",
+        "Requests that failed with a connection error and are retried.",
+        lambda api: (("", {}, api.metrics.retries),),
+    ),
+    (
+        "elro_connects_devices",
+        "gauge",
+        "Devices by state.",
+        lambda api: (
+            ("", {"state": state}, count)
+            for state, count in sorted(api.metrics.device_states.items())
+        ),
+    ),
+    (
+        "elro_connects_stale_devices",
+        "gauge",
+        "Devices without a valid update within the staleness limit.",
+        lambda api: (("", {}, api.metrics.stale_devices),),
+    ),
+    (
+        "elro_connects_suppressed_writes_total",
+        "counter",
+        "Sensor state writes suppressed by a deadband or minimum dwell time.",
+        lambda api: (("", {}, api.suppressed_writes),),
+    ),
+)
+
+
+def _summary(summary: Summary) -> tuple[Sample, ...]:
+    """Return the samples of a summary."""
+    return (("_sum", {}, summary.sum), ("_count", {}, summary.count))
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_metrics(connectors: Iterable[ElroConnectsK1]) -> str:
+    """Return the metrics of the K1 connectors in the text exposition format."""
+    connectors = list(connectors)
+    lines: list[str] = []
+    for name, metric_type, description, samples in METRICS:
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for api in connectors:
+            for suffix, labels, value in samples(api):
+                label_text = ",".join(
+                    f'{label}="{_escape(label_value)}"'
+                    for label, label_value in (
+                        ("connector_id", api.connector_id),
+                        *labels.items(),
+                    )
+                )
+                lines.append(f"{name}{suffix}{{{label_text}}} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class ElroConnectsMetricsView(HomeAssistantView):
+    """Serve the metrics of the K1 connectors to Prometheus."""
+
+    url = "/api/elro_connects/metrics"
+    name = "api:elro_connects:metrics"
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Return the metrics."""
+        hass = request.app[KEY_HASS]
+        return web.Response(
+            body=render_metrics(hass.data.get(DOMAIN, {}).values()).encode(),
+            headers={"Content-Type": CONTENT_TYPE},
+        )
@@ -0,0 +1,157 @@
+"""Profiling of the Elro Connects poll and update pipeline."""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import logging
+import pstats
+import time
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+
+from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+# Stages of a poll cycle
+STAGE_CYCLE = "cycle"
+STAGE_DISPATCH = "dispatch"
+STAGE_FETCH = "fetch"
+STAGE_LISTENERS = "listeners"
+STAGE_PROCESS = "process"
+
+STAGES = (STAGE_CYCLE, STAGE_FETCH, STAGE_PROCESS, STAGE_DISPATCH, STAGE_LISTENERS)
+
+PSTATS_LIMIT = 40
+
+
+def _cprofile_available() -> bool:
+    """Return True if cProfile can be started, another profiler may be active."""
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError as err:
+        _LOGGER.warning("Unable to start cProfile: %s", err)
+        return False
+    profile.disable()
+    return True
+
+
+class K1PollProfiler:
+    """Profile the next poll cycles of one or more K1 connectors.
+
+    A single cProfile profiler is shared by all connectors, it is enabled
+    while at least one poll cycle is running. Next to that the wall clock
+    time of every stage of a cycle is recorded. When all connectors finished
+    their cycles the pstats file and a timing summary are written. When
+    cProfile can not be started only the summary is written, and
+    `stats_path` is None.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        connector_ids: Iterable[str],
+        cycles: int,
+        path_prefix: str,
+    ) -> None:
+        """Initialize the profiler."""
+        self._hass = hass
+        self._remaining: dict[str, int] = dict.fromkeys(connector_ids, cycles)
+        self._profile: cProfile.Profile | None = (
+            cProfile.Profile() if _cprofile_available() else None
+        )
+        self._running = 0
+        self._timings: dict[str, list[float]] = defaultdict(list)
+        self.cycles = cycles
+        self.stats_path: str | None = (
+            f"{path_prefix}.prof" if self._profile is not None else None
+        )
+        self.summary_path = f"{path_prefix}.txt"
+
+    @property
+    def finished(self) -> bool:
+        """Return True if all connectors finished profiling."""
+        return not self._remaining
+
+    def start_cycle(self) -> None:
+        """Start profiling a poll cycle."""
+        self._running += 1
+        if self._running > 1 or self._profile is None:
+            return
+        try:
+            self._profile.enable()
+        except ValueError as err:
+            # Another profiler is active, only record the stage timings
+            _LOGGER.warning("Unable to start cProfile: %s", err)
+            self._profile = None
+            self.stats_path = None
+
+    def end_cycle(self, connector_id: str) -> bool:
+        """End a poll cycle, return True if the connector finished profiling."""
+        self._running -= 1
+        if not self._running and self._profile is not None:
+            self._profile.disable()
+        if connector_id not in self._remaining:
+            return True
+        self._remaining[connector_id] -= 1
+        if self._remaining[connector_id] > 0:
+            return False
+        self.finish(connector_id)
+        return True
+
+    def finish(self, connector_id: str) -> None:
+        """Stop profiling a connector and write the results when all are done."""
+        if self._remaining.pop(connector_id, None) is None or self._remaining:
+            return
+        self._hass.async_create_task(
+            self._async_write(), f"elro_connects profile {self.summary_path}"
+        )
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Record the wall clock time of a stage."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._timings[name].append(time.perf_counter() - started)
+
+    def summary(self) -> str:
+        """Return the stage timing summary."""
+        lines = [
+            f"{'stage':<12}{'count':>8}{'total ms':>12}{'mean ms':>12}{'max ms':>12}"
+        ]
+        for name in STAGES:
+            if not (timings := self._timings.get(name)):
+                continue
+            lines.append(
+                f"{name:<12}{len(timings):>8}{sum(timings) * 1000:>12.3f}"
+                f"{sum(timings) * 1000 / len(timings):>12.3f}"
+                f"{max(timings) * 1000:>12.3f}"
+            )
+        return "\n".join(lines)
+
+    async def _async_write(self) -> None:
+        """Write the profiling results."""
+        await self._hass.async_add_executor_job(self._write)
+        _LOGGER.info(
+            "Profile of %s poll cycles written to %s",
+            self.cycles,
+            " and ".join(path for path in (self.stats_path, self.summary_path) if path),
+        )
+
+    def _write(self) -> None:
+        """Write the pstats file and the summary."""
+        summary = io.StringIO()
+        summary.write(f"Elro Connects poll profile, {self.cycles} cycles\n\n")
+        summary.write(self.summary())
+        summary.write("\n\n")
+        if self._profile is not None and self.stats_path is not None:
+            self._profile.dump_stats(self.stats_path)
+            stats = pstats.Stats(self._profile, stream=summary)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PSTATS_LIMIT)
+        with open(self.summary_path, "w", encoding="utf-8") as summary_file:
+            summary_file.write(summary.getvalue())
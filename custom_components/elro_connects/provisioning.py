@@ -0,0 +1,186 @@
+"""Bulk provisioning of Elro Connects K1 connectors."""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import logging
+from pathlib import Path
+from typing import Any
+
+import homeassistant.helpers.config_validation as cv
+import voluptuous as vol
+from elro.auth import ElroConnectsSession
+from homeassistant.config_entries import SOURCE_IMPORT
+from homeassistant.const import CONF_API_KEY, CONF_HOST, CONF_PORT
+from homeassistant.core import HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+from homeassistant.exceptions import HomeAssistantError
+
+from .config_flow import K1ConnectionTest
+from .const import CONF_CONNECTOR_ID, DEFAULT_PORT, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_IMPORT_CONCURRENCY = 5
+
+RESULT_ALREADY_CONFIGURED = "already_configured"
+RESULT_CANNOT_CONNECT = "cannot_connect"
+RESULT_CREATED = "created"
+RESULT_DUPLICATE = "duplicate"
+RESULT_ERROR = "error"
+RESULT_INVALID = "invalid"
+
+RESULTS = (
+    RESULT_CREATED,
+    RESULT_ALREADY_CONFIGURED,
+    RESULT_DUPLICATE,
+    RESULT_INVALID,
+    RESULT_CANNOT_CONNECT,
+    RESULT_ERROR,
+)
+
+CONNECTOR_ROW_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_HOST): cv.string,
+        vol.Required(CONF_CONNECTOR_ID): cv.string,
+        vol.Optional(CONF_PORT, default=DEFAULT_PORT): cv.port,
+        vol.Optional(CONF_API_KEY): cv.string,
+    }
+)
+
+
+def read_connector_rows(path: str) -> list[dict[str, Any]]:
+    """Read the connector rows from a CSV file.
+
+    The first row is the header with the `host` and `connector_id` columns
+    and optionally the `api_key` and `port` columns.
+    """
+    with Path(path).open(encoding="utf-8", newline="") as rows_file:
+        return [dict(row) for row in csv.DictReader(rows_file)]
+
+
+class ConnectorImport:
+    """Import K1 connectors in bulk.
+
+    All rows are validated at once, at most `concurrency` connection tests
+    run at the same time. Missing API keys are looked up with a single cloud
+    session, when the login fails the rows without an API key get an error.
+    A config entry is created for every connector that passed.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        rows: list[dict[str, Any]],
+        concurrency: int = DEFAULT_IMPORT_CONCURRENCY,
+        username: str | None = None,
+        password: str | None = None,
+    ) -> None:
+        """Initialize the import."""
+        self._hass = hass
+        self._rows = rows
+        self._concurrency = concurrency
+        self._username = username
+        self._password = password
+
+    async def async_run(self) -> dict[str, Any]:
+        """Run the import and return the report."""
+        configured = {
+            entry.unique_id for entry in self._hass.config_entries.async_entries(DOMAIN)
+        }
+        results: list[dict[str, Any]] = []
+        pending: list[tuple[dict[str, Any], dict[str, Any]]] = []
+        for row_number, row in enumerate(self._rows, 1):
+            result: dict[str, Any] = {
+                "row": row_number,
+                CONF_HOST: row.get(CONF_HOST),
+                CONF_CONNECTOR_ID: row.get(CONF_CONNECTOR_ID),
+            }
+            results.append(result)
+            try:
+                # Empty CSV columns are not set
+                data = CONNECTOR_ROW_SCHEMA(
+                    {
+                        key: value
+                        for key, value in row.items()
+                        if value not in ("", None)
+                    }
+                )
+            except vol.Invalid as err:
+                result.update(result=RESULT_INVALID, error=str(err))
+                continue
+            if data[CONF_CONNECTOR_ID] in configured:
+                result["result"] = RESULT_ALREADY_CONFIGURED
+                continue
+            if any(
+                data[CONF_CONNECTOR_ID] == other[CONF_CONNECTOR_ID]
+                for _, other in pending
+            ):
+                result["result"] = RESULT_DUPLICATE
+                continue
+            pending.append((result, data))
+
+        if self._username and self._password:
+            try:
+                await self._async_add_cloud_keys([data for _, data in pending])
+            except HomeAssistantError as err:
+                for result, data in pending:
+                    if CONF_API_KEY not in data:
+                        result.update(result=RESULT_ERROR, error=str(err))
+                pending = [
+                    (result, data) for result, data in pending if "result" not in result
+                ]
+
+        semaphore = asyncio.Semaphore(self._concurrency)
+
+        async def _async_validate(data: dict[str, Any]) -> bool:
+            async with semaphore:
+                return await K1ConnectionTest(data[CONF_HOST]).async_try_connection(
+                    data[CONF_CONNECTOR_ID], data[CONF_PORT], data.get(CONF_API_KEY)
+                )
+
+        connected = await asyncio.gather(
+            *(_async_validate(data) for _, data in pending)
+        )
+        for (result, data), ok in zip(pending, connected, strict=True):
+            if not ok:
+                result["result"] = RESULT_CANNOT_CONNECT
+                continue
+            flow_result = await self._hass.config_entries.flow.async_init(
+                DOMAIN, context={"source": SOURCE_IMPORT}, data=data
+            )
+            result["result"] = (
+                RESULT_CREATED
+                if flow_result["type"] is FlowResultType.CREATE_ENTRY
+                else flow_result["reason"]
+            )
+
+        report: dict[str, Any] = {
+            outcome: sum(result["result"] == outcome for result in results)
+            for outcome in RESULTS
+        }
+        report["rows"] = results
+        _LOGGER.info(
+            "Imported %s of %s K1 connectors", report[RESULT_CREATED], len(results)
+        )
+        return report
+
+    async def _async_add_cloud_keys(self, connectors: list[dict[str, Any]]) -> None:
+        """Look up the missing API keys with one cloud session."""
+        if all(CONF_API_KEY in data for data in connectors):
+            return
+        try:
+            session = ElroConnectsSession()
+            await session.async_login(self._username, self._password)
+            cloud_connectors = await session.async_get_connectors()
+        except Exception as err:  # pylint: disable=broad-except
+            raise HomeAssistantError(
+                f"Cannot fetch the API keys from the cloud: {err}"
+            ) from err
+        keys = {
+            connector["dev_id"]: connector["ctrl_key"] for connector in cloud_connectors
+        }
+        for data in connectors:
+            if CONF_API_KEY not in data and data[CONF_CONNECTOR_ID] in keys:
+                data[CONF_API_KEY] = keys[data[CONF_CONNECTOR_ID]]
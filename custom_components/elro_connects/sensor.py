@@ -3,7 +3,11 @@
 from __future__ import annotations
 
 import logging
-from dataclasses import dataclass
+from collections.abc import Callable
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any
 
 from elro.device import (
     ATTR_BATTERY_LEVEL,
@@ -18,12 +22,21 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfRatio
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EntityCategory, Platform, UnitOfRatio, UnitOfTime
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.typing import StateType
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 from homeassistant.util import slugify
 from homeassistant.util.percentage import ranged_value_to_percentage
 
+from .aggregates import AGGREGATE_ALARM, AGGREGATE_LOW_BATTERY, AGGREGATE_OFFLINE
+from .connection import ConnectionHealth
+from .const import DOMAIN, ELRO_CONNECTS_HUB_UPDATE
 from .device import ElroConnectsEntity, ElroConnectsK1
 from .helpers import async_set_up_discovery_helper
 
@@ -35,6 +48,24 @@ class ElroSensorDescription(SensorEntityDescription):
     """Class that holds senspr specific sensor info."""
 
     maximum_value: int | None = None
+    attribute_keys: tuple[str, ...] = ()
+    # A changed value is only written when it differs at least `deadband`
+    # from the written value, and was reported for at least `min_dwell`
+    deadband: float = 0
+    min_dwell: timedelta | None = None
+
+
+@dataclass
+class ElroHubSensorDescription(SensorEntityDescription):
+    """Class that holds K1 connector sensor info."""
+
+    value_fn: Callable[[ElroConnectsK1], StateType] | None = None
+    attributes_fn: Callable[[ElroConnectsK1], dict[str, Any]] | None = None
+
+
+def _milliseconds(seconds: float | None) -> float | None:
+    """Return a duration in seconds as milliseconds."""
+    return None if seconds is None else round(seconds * 1000, 1)
 
 
 SENSOR_TYPES = {
@@ -45,6 +76,7 @@ SENSOR_TYPES = {
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement=UnitOfRatio.PERCENTAGE,
         maximum_value=100,
+        deadband=5,
     ),
     ATTR_SIGNAL: ElroSensorDescription(
         key=ATTR_SIGNAL,
@@ -55,6 +87,7 @@ SENSOR_TYPES = {
         icon="mdi:signal",
         maximum_value=4,
         entity_registry_enabled_default=False,
+        min_dwell=timedelta(minutes=5),
     ),
     ATTR_DEVICE_STATE: ElroSensorDescription(
         key=ATTR_DEVICE_STATE,
@@ -65,6 +98,110 @@ SENSOR_TYPES = {
     ),
 }
 
+# In compact mode battery and signal are attributes of the device state sensor
+COMPACT_SENSOR_TYPES = {
+    ATTR_DEVICE_STATE: replace(
+        SENSOR_TYPES[ATTR_DEVICE_STATE],
+        attribute_keys=(ATTR_BATTERY_LEVEL, ATTR_SIGNAL),
+    ),
+}
+
+HUB_SENSOR_TYPES = (
+    ElroHubSensorDescription(
+        key="connection_health",
+        translation_key="connection_health",
+        device_class=SensorDeviceClass.ENUM,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        icon="mdi:lan-connect",
+        options=[health.value for health in ConnectionHealth],
+        value_fn=lambda api: api.connection.health,
+        attributes_fn=lambda api: {
+            "consecutive_failures": api.connection.failures,
+            "retry_at": api.connection.retry_at,
+            "last_recovery_time": (
+                api.connection.last_recovery_time.total_seconds()
+                if api.connection.last_recovery_time
+                else None
+            ),
+        },
+    ),
+    ElroHubSensorDescription(
+        key="request_latency",
+        translation_key="request_latency",
+        device_class=SensorDeviceClass.DURATION,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        suggested_display_precision=1,
+        entity_registry_enabled_default=False,
+        value_fn=lambda api: _milliseconds(api.connection.mean_latency(False)),
+        attributes_fn=lambda api: {
+            "warm_requests": api.connection.requests(False),
+            "cold_requests": api.connection.requests(True),
+            "cold_request_latency": _milliseconds(api.connection.mean_latency(True)),
+            "first_request_latency": _milliseconds(
+                api.connection.first_request_latency
+            ),
+            "connects": api.connection.connects,
+            "connect_time": _milliseconds(api.connection.connect_time),
+        },
+    ),
+    ElroHubSensorDescription(
+        key="skipped_polls",
+        translation_key="skipped_polls",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        icon="mdi:debug-step-over",
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfRatio.PERCENTAGE,
+        entity_registry_enabled_default=False,
+        value_fn=lambda api: round(api.skip_ratio * 100, 1),
+        attributes_fn=lambda api: {
+            "polls": api.polls,
+            "skipped_polls": api.skipped_polls,
+            "suppressed_writes": api.suppressed_writes,
+        },
+    ),
+    ElroHubSensorDescription(
+        key="stale_devices",
+        translation_key="stale_devices",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        icon="mdi:timer-sand-complete",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda api: len(api.stale_devices),
+        attributes_fn=lambda api: {"device_ids": api.stale_devices},
+    ),
+    ElroHubSensorDescription(
+        key="alarm_devices",
+        translation_key="alarm_devices",
+        icon="mdi:alarm-light",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda api: api.aggregates.count(AGGREGATE_ALARM),
+        attributes_fn=lambda api: {
+            "device_ids": api.aggregates.device_ids(AGGREGATE_ALARM)
+        },
+    ),
+    ElroHubSensorDescription(
+        key="low_battery_devices",
+        translation_key="low_battery_devices",
+        icon="mdi:battery-alert-variant-outline",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda api: api.aggregates.count(AGGREGATE_LOW_BATTERY),
+        attributes_fn=lambda api: {
+            "device_ids": api.aggregates.device_ids(AGGREGATE_LOW_BATTERY)
+        },
+    ),
+    ElroHubSensorDescription(
+        key="offline_devices",
+        translation_key="offline_devices",
+        icon="mdi:lan-disconnect",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda api: api.aggregates.count(AGGREGATE_OFFLINE),
+        attributes_fn=lambda api: {
+            "device_ids": api.aggregates.device_ids(AGGREGATE_OFFLINE)
+        },
+    ),
+)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -73,16 +210,45 @@ async def async_setup_entry(
 ) -> None:
     """Set up the sensor platform."""
     current: set[int] = set()
+    elro_connects_api: ElroConnectsK1 = hass.data[DOMAIN][config_entry.entry_id]
+    if elro_connects_api.compact_sensors:
+        _async_remove_attribute_sensors(hass, config_entry, elro_connects_api)
 
     async_set_up_discovery_helper(
         hass,
         ElroConnectsSensor,
         config_entry,
         current,
-        SENSOR_TYPES,
+        COMPACT_SENSOR_TYPES if elro_connects_api.compact_sensors else SENSOR_TYPES,
         async_add_entities,
     )
 
+    async_add_entities(
+        ElroConnectsHubSensor(elro_connects_api, description)
+        for description in HUB_SENSOR_TYPES
+    )
+
+
+@callback
+def _async_remove_attribute_sensors(
+    hass: HomeAssistant, entry: ConfigEntry, elro_connects_api: ElroConnectsK1
+) -> None:
+    """Remove the sensors that are device state attributes in compact mode."""
+    attribute_keys = COMPACT_SENSOR_TYPES[ATTR_DEVICE_STATE].attribute_keys
+    entity_registry = er.async_get(hass)
+    for entity_entry in er.async_entries_for_config_entry(
+        entity_registry, entry.entry_id
+    ):
+        # Device entity unique ID's are formatted as <connector_id>-<device_id>-<key>
+        parts = entity_entry.unique_id.split("-", 2)
+        if (
+            entity_entry.domain == Platform.SENSOR
+            and len(parts) == 3
+            and parts[0] == elro_connects_api.connector_id
+            and parts[2] in attribute_keys
+        ):
+            entity_registry.async_remove(entity_entry.entity_id)
+
 
 class ElroConnectsSensor(ElroConnectsEntity, SensorEntity):
     """Elro Connects Fire Alarm Entity."""
@@ -105,18 +271,182 @@ class ElroConnectsSensor(ElroConnectsEntity, SensorEntity):
             device_id,
             description,
         )
+        # The state and the compact mode attributes with a deadband or dwell
+        # time, keyed by the device attribute
+        self._filtered = tuple(
+            value_description
+            for value_description in (
+                description,
+                *(SENSOR_TYPES[key] for key in description.attribute_keys),
+            )
+            if value_description.deadband or value_description.min_dwell is not None
+        )
+        self._written_values = {
+            value_description.key: self._value(value_description)
+            for value_description in self._filtered
+        }
+        self._reported_values = dict(self._written_values)
+        self._pending: dict[str, tuple[float, datetime]] = {}
+        self._cancel_dwell: dict[str, CALLBACK_TYPE] = {}
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel the pending dwell time checks."""
+        await super().async_will_remove_from_hass()
+        for key in list(self._cancel_dwell):
+            self._async_cancel_dwell(key)
+
+    @callback
+    def _async_cancel_dwell(self, key: str) -> None:
+        """Cancel the dwell time check of a value."""
+        if (cancel_dwell := self._cancel_dwell.pop(key, None)) is not None:
+            cancel_dwell()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state, unless the value change is inside the band."""
+        if not self._filtered:
+            super()._handle_coordinator_update()
+            return
+        self.data = (self.coordinator.data or {}).get(self._device_id, self.data)
+        write = True
+        for description in self._filtered:
+            value = self._value(description) if self.available else None
+            reported = self._reported_values[description.key]
+            self._reported_values[description.key] = value
+            if not self._suppress(description, value):
+                self._written_values[description.key] = value
+                continue
+            if value != reported:
+                # Updates that did not report a new value would not be written
+                self.coordinator.suppressed_writes += 1
+            if description is self.entity_description:
+                write = False
+        if write:
+            self.async_write_ha_state()
+
+    def _suppress(
+        self, description: ElroSensorDescription, value: float | None
+    ) -> bool:
+        """Return True if a changed value is inside the deadband or dwell time."""
+        key = description.key
+        written = self._written_values[key]
+        if value is None or written is None or value == written:
+            # Availability changes and unchanged values are always written
+            self._pending.pop(key, None)
+            self._async_cancel_dwell(key)
+            return False
+        if abs(value - written) < description.deadband:
+            self._pending.pop(key, None)
+            self._async_cancel_dwell(key)
+            return True
+        if description.min_dwell is None:
+            return False
+        now = dt_util.utcnow()
+        pending = self._pending.get(key)
+        if pending is None or pending[0] != value:
+            pending = self._pending[key] = (value, now)
+            # Unchanged polls do not update the entity, check again when the
+            # dwell time has passed
+            self._async_cancel_dwell(key)
+            self._cancel_dwell[key] = async_call_later(
+                self.hass, description.min_dwell, partial(self._async_dwell_passed, key)
+            )
+        if now - pending[1] < description.min_dwell:
+            return True
+        del self._pending[key]
+        self._async_cancel_dwell(key)
+        return False
+
+    @callback
+    def _async_dwell_passed(self, key: str, now: datetime) -> None:
+        """Write the pending value when it is still reported."""
+        self._cancel_dwell.pop(key, None)
+        self._handle_coordinator_update()
 
     @property
     def available(self) -> bool:
         """Return true if device is on or none if the device is offline."""
-        return bool(self.data) and not (self.data[ATTR_DEVICE_STATE] in STATES_OFFLINE)
+        return (
+            super().available
+            and bool(self.data)
+            and not (self.data[ATTR_DEVICE_STATE] in STATES_OFFLINE)
+        )
 
     @property
     def native_value(self) -> int | float | None:
         """Return the state of the sensor."""
-        raw_value = self.data[self.entity_description.key]
-        if max_value := self.entity_description.maximum_value:
+        description = self.entity_description
+        if description.key in self._written_values:
+            return self._written_values[description.key]
+        return self._value(description)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the battery and signal in compact mode."""
+        if not self.entity_description.attribute_keys:
+            return None
+        return {
+            key: (
+                self._written_values[key]
+                if key in self._written_values
+                else self._value(SENSOR_TYPES[key])
+            )
+            for key in self.entity_description.attribute_keys
+        }
+
+    def _value(self, description: ElroSensorDescription) -> int | float | None:
+        """Return the value of a device attribute."""
+        if (raw_value := self.data.get(description.key)) is None:
+            return None
+        if max_value := description.maximum_value:
             value = ranged_value_to_percentage((1, max_value), raw_value)
         else:
             value = slugify(raw_value)
         return value if max_value is None or raw_value <= max_value else None
+
+
+class ElroConnectsHubSensor(CoordinatorEntity, SensorEntity):
+    """Elro Connects K1 connector sensor entity."""
+
+    _attr_has_entity_name = True
+    coordinator: ElroConnectsK1
+    entity_description: ElroHubSensorDescription
+
+    def __init__(
+        self,
+        elro_connects_api: ElroConnectsK1,
+        description: ElroHubSensorDescription,
+    ) -> None:
+        """Initialize a K1 connector sensor entity."""
+        super().__init__(elro_connects_api)
+        self.entity_description = description
+        self._attr_device_info = elro_connects_api.k1_device_info
+        self._attr_unique_id = f"{elro_connects_api.connector_id}-{description.key}"
+
+    async def async_added_to_hass(self) -> None:
+        """Also update when the coordinator skipped an unchanged poll."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                ELRO_CONNECTS_HUB_UPDATE.format(self.coordinator.connector_id),
+                self._handle_coordinator_update,
+            )
+        )
+
+    @property
+    def available(self) -> bool:
+        """Return true, the connector sensors also report if the K1 is offline."""
+        return True
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the state of the sensor."""
+        return self.entity_description.value_fn(self.coordinator)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the state attributes of the sensor."""
+        if self.entity_description.attributes_fn is None:
+            return None
+        return self.entity_description.attributes_fn(self.coordinator)
@@ -0,0 +1,284 @@
+"""Services for the Elro Connects integration."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import homeassistant.helpers.config_validation as cv
+import voluptuous as vol
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers.json import json_dumps
+from homeassistant.util import dt as dt_util
+
+from .alarm_test import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_PACE,
+    DEFAULT_TIMEOUT,
+    AlarmTest,
+)
+from .const import ATTR_CONNECTOR_ID, DOMAIN
+from .device import ElroConnectsK1
+from .profiler import K1PollProfiler
+from .provisioning import (
+    DEFAULT_IMPORT_CONCURRENCY,
+    ConnectorImport,
+    read_connector_rows,
+)
+from .tracing import chrome_trace
+
+ATTR_CONCURRENCY = "concurrency"
+ATTR_CONNECTORS = "connectors"
+ATTR_CYCLES = "cycles"
+ATTR_PACE = "pace"
+ATTR_PATH = "path"
+ATTR_TIMEOUT = "timeout"
+
+DEFAULT_PROFILE_CYCLES = 3
+
+SERVICE_EXPORT_TRACE = "export_trace"
+SERVICE_IMPORT_CONNECTORS = "import_connectors"
+SERVICE_PROFILE = "profile"
+SERVICE_RELOAD = "reload"
+SERVICE_RUN_ALARM_TEST = "run_alarm_test"
+SERVICE_START_CAPTURE = "start_capture"
+SERVICE_STOP_CAPTURE = "stop_capture"
+
+CONNECTOR_SCHEMA = vol.Schema({vol.Optional(ATTR_CONNECTOR_ID): cv.string})
+ALARM_TEST_SCHEMA = CONNECTOR_SCHEMA.extend(
+    {
+        vol.Optional(ATTR_CONCURRENCY, default=DEFAULT_CONCURRENCY): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=10)
+        ),
+        vol.Optional(ATTR_PACE, default=DEFAULT_PACE): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=60)
+        ),
+        vol.Optional(ATTR_TIMEOUT, default=DEFAULT_TIMEOUT): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=300)
+        ),
+    }
+)
+IMPORT_CONNECTORS_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Exclusive(ATTR_CONNECTORS, "rows"): vol.All(cv.ensure_list, [dict]),
+            vol.Exclusive(ATTR_PATH, "rows"): cv.string,
+            vol.Inclusive(CONF_USERNAME, "cloud"): cv.string,
+            vol.Inclusive(CONF_PASSWORD, "cloud"): cv.string,
+            vol.Optional(ATTR_CONCURRENCY, default=DEFAULT_IMPORT_CONCURRENCY): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=20)
+            ),
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_CONNECTORS, ATTR_PATH),
+)
+PROFILE_SCHEMA = CONNECTOR_SCHEMA.extend(
+    {
+        vol.Optional(ATTR_CYCLES, default=DEFAULT_PROFILE_CYCLES): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=100)
+        )
+    }
+)
+
+
+@callback
+def async_get_connectors(
+    hass: HomeAssistant, connector_id: str | None = None
+) -> list[ElroConnectsK1]:
+    """Return the loaded K1 connectors, optionally filtered by connector ID."""
+    connectors: list[ElroConnectsK1] = [
+        elro_connects_api
+        for elro_connects_api in hass.data.get(DOMAIN, {}).values()
+        if connector_id is None or elro_connects_api.connector_id == connector_id
+    ]
+    if connector_id is not None and not connectors:
+        raise ServiceValidationError(f"K1 connector {connector_id} is not loaded")
+    return connectors
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Set up the services for the Elro Connects integration."""
+    alarm_tests: set[str] = set()
+
+    async def async_reload(call: ServiceCall) -> None:
+        """Reload the K1 connectors in place."""
+        for elro_connects_api in async_get_connectors(
+            hass, call.data.get(ATTR_CONNECTOR_ID)
+        ):
+            await elro_connects_api.async_reload()
+
+    async def async_start_capture(call: ServiceCall) -> ServiceResponse:
+        """Start capturing the K1 traffic."""
+        files: dict[str, str] = {}
+        timestamp = dt_util.now().strftime("%Y%m%d%H%M%S")
+        for elro_connects_api in async_get_connectors(
+            hass, call.data.get(ATTR_CONNECTOR_ID)
+        ):
+            if elro_connects_api.capture is None:
+                elro_connects_api.async_start_capture(
+                    hass.config.path(
+                        f"elro_connects_{elro_connects_api.connector_id}_{timestamp}.jsonl"
+                    )
+                )
+            files[elro_connects_api.connector_id] = elro_connects_api.capture.path
+        return {"files": files}
+
+    async def async_stop_capture(call: ServiceCall) -> ServiceResponse:
+        """Stop capturing the K1 traffic."""
+        files: dict[str, dict[str, str | int]] = {}
+        for elro_connects_api in async_get_connectors(
+            hass, call.data.get(ATTR_CONNECTOR_ID)
+        ):
+            if capture := await elro_connects_api.async_stop_capture():
+                files[elro_connects_api.connector_id] = {
+                    "path": capture.path,
+                    "records": capture.records,
+                }
+        return {"files": files}
+
+    async def async_profile(call: ServiceCall) -> ServiceResponse:
+        """Profile the next poll cycles of the K1 connectors."""
+        connectors = async_get_connectors(hass, call.data.get(ATTR_CONNECTOR_ID))
+        if busy := [
+            elro_connects_api.connector_id
+            for elro_connects_api in connectors
+            if elro_connects_api.profiler is not None
+        ]:
+            raise ServiceValidationError(
+                f"K1 connector {', '.join(busy)} is already being profiled"
+            )
+        timestamp = dt_util.now().strftime("%Y%m%d%H%M%S")
+        profiler = K1PollProfiler(
+            hass,
+            [elro_connects_api.connector_id for elro_connects_api in connectors],
+            call.data[ATTR_CYCLES],
+            hass.config.path(f"elro_connects_profile_{timestamp}"),
+        )
+        for elro_connects_api in connectors:
+            elro_connects_api.async_start_profile(profiler)
+        return {
+            "connectors": [
+                elro_connects_api.connector_id for elro_connects_api in connectors
+            ],
+            "cycles": profiler.cycles,
+            "stats": profiler.stats_path,
+            "summary": profiler.summary_path,
+        }
+
+    async def async_export_trace(call: ServiceCall) -> ServiceResponse:
+        """Export the traced spans of the K1 connectors as Chrome trace JSON."""
+        connectors = async_get_connectors(hass, call.data.get(ATTR_CONNECTOR_ID))
+        trace = chrome_trace(
+            elro_connects_api.tracer for elro_connects_api in connectors
+        )
+        timestamp = dt_util.now().strftime("%Y%m%d%H%M%S")
+        path = hass.config.path(f"elro_connects_trace_{timestamp}.json")
+        await hass.async_add_executor_job(
+            Path(path).write_text, json_dumps(trace), "utf-8"
+        )
+        return {
+            "path": path,
+            "spans": {
+                elro_connects_api.connector_id: len(elro_connects_api.tracer)
+                for elro_connects_api in connectors
+            },
+        }
+
+    async def async_import_connectors(call: ServiceCall) -> ServiceResponse:
+        """Validate K1 connectors in bulk and create their config entries."""
+        rows: list[dict] = call.data.get(ATTR_CONNECTORS, [])
+        if (path := call.data.get(ATTR_PATH)) is not None:
+            config_dir = Path(hass.config.config_dir).resolve()
+            rows_path = Path(hass.config.path(path)).resolve()
+            if not rows_path.is_relative_to(config_dir):
+                raise ServiceValidationError(
+                    f"{path} is not in the configuration directory"
+                )
+            try:
+                rows = await hass.async_add_executor_job(
+                    read_connector_rows, str(rows_path)
+                )
+            except OSError as err:
+                raise ServiceValidationError(f"Cannot read {path}: {err}") from err
+        return await ConnectorImport(
+            hass,
+            rows,
+            call.data[ATTR_CONCURRENCY],
+            call.data.get(CONF_USERNAME),
+            call.data.get(CONF_PASSWORD),
+        ).async_run()
+
+    async def async_run_alarm_test(call: ServiceCall) -> ServiceResponse:
+        """Test the alarms of the K1 connectors."""
+        connectors = async_get_connectors(hass, call.data.get(ATTR_CONNECTOR_ID))
+        connector_ids = {
+            elro_connects_api.connector_id for elro_connects_api in connectors
+        }
+        if busy := connector_ids & alarm_tests:
+            raise ServiceValidationError(
+                f"An alarm test is already running for {', '.join(sorted(busy))}"
+            )
+        alarm_tests.update(connector_ids)
+        try:
+            return await AlarmTest(
+                connectors,
+                call.data[ATTR_CONCURRENCY],
+                call.data[ATTR_PACE],
+                call.data[ATTR_TIMEOUT],
+            ).async_run()
+        finally:
+            alarm_tests.difference_update(connector_ids)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RUN_ALARM_TEST,
+        async_run_alarm_test,
+        schema=ALARM_TEST_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_TRACE,
+        async_export_trace,
+        schema=CONNECTOR_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_IMPORT_CONNECTORS,
+        async_import_connectors,
+        schema=IMPORT_CONNECTORS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        async_profile,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_RELOAD, async_reload, schema=CONNECTOR_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_START_CAPTURE,
+        async_start_capture,
+        schema=CONNECTOR_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_STOP_CAPTURE,
+        async_stop_capture,
+        schema=CONNECTOR_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
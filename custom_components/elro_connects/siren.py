@@ -126,26 +126,33 @@ class ElroConnectsSiren(ElroConnectsEntity, SirenEntity):
     @property
     def is_on(self) -> bool | None:
         """Return true if device is on or none if the device is offline."""
-        if not self.data or self.data[ATTR_DEVICE_STATE] in STATES_OFFLINE:
+        data = self.state_data
+        if not data or data[ATTR_DEVICE_STATE] in STATES_OFFLINE:
             return None
-        return self.data[ATTR_DEVICE_STATE] in STATES_ON
+        return data[ATTR_DEVICE_STATE] in STATES_ON
 
     async def async_turn_on(self, **kwargs) -> None:
         """Send a test alarm request."""
         _LOGGER.debug("Sending test alarm request for entity %s", self.entity_id)
-        await self._elro_connects_api.async_command(
-            self._description.test_alarm, device_ID=self._device_id
-        )
+        with self._trace_command("turn_on"):
+            await self._elro_connects_api.async_command(
+                self._description.test_alarm, device_ID=self._device_id
+            )
 
-        self.data[ATTR_DEVICE_STATE] = STATE_TEST_ALARM
-        self.async_write_ha_state()
+            self.coordinator.async_set_optimistic(
+                self._device_id, {ATTR_DEVICE_STATE: STATE_TEST_ALARM}
+            )
+            self._async_write_command_state()
 
     async def async_turn_off(self, **kwargs) -> None:
         """Send a silence alarm request."""
         _LOGGER.debug("Sending silence alarm request for entity %s", self.entity_id)
-        await self._elro_connects_api.async_command(
-            self._description.silence_alarm, device_ID=self._device_id
-        )
-
-        self.data[ATTR_DEVICE_STATE] = STATE_SILENCE
-        self.async_write_ha_state()
+        with self._trace_command("turn_off"):
+            await self._elro_connects_api.async_command(
+                self._description.silence_alarm, device_ID=self._device_id
+            )
+
+            self.coordinator.async_set_optimistic(
+                self._device_id, {ATTR_DEVICE_STATE: STATE_SILENCE}
+            )
+            self._async_write_command_state()
@@ -93,28 +93,35 @@ class ElroConnectsSwitch(ElroConnectsEntity, SwitchEntity):
     @property
     def is_on(self) -> bool | None:
         """Return true if device is on or none if the device is offline."""
-        if not self.data or self.data[ATTR_DEVICE_STATE] in STATES_OFFLINE:
+        data = self.state_data
+        if not data or data[ATTR_DEVICE_STATE] in STATES_OFFLINE:
             return None
-        if self.data[ATTR_DEVICE_VALUE] not in (DEVICE_VALUE_OFF, DEVICE_VALUE_ON):
+        if data[ATTR_DEVICE_VALUE] not in (DEVICE_VALUE_OFF, DEVICE_VALUE_ON):
             return None
-        return self.data[ATTR_DEVICE_VALUE] == DEVICE_VALUE_ON
+        return data[ATTR_DEVICE_VALUE] == DEVICE_VALUE_ON
 
     async def async_turn_on(self, **kwargs) -> None:
         """Turn switch on."""
         _LOGGER.debug("Sending turn_on request for entity %s", self.entity_id)
-        await self._elro_connects_api.async_command(
-            self._description.turn_on, device_ID=self._device_id
-        )
+        with self._trace_command("turn_on"):
+            await self._elro_connects_api.async_command(
+                self._description.turn_on, device_ID=self._device_id
+            )
 
-        self.data[ATTR_DEVICE_VALUE] = DEVICE_VALUE_ON
-        self.async_write_ha_state()
+            self.coordinator.async_set_optimistic(
+                self._device_id, {ATTR_DEVICE_VALUE: DEVICE_VALUE_ON}
+            )
+            self._async_write_command_state()
 
     async def async_turn_off(self, **kwargs) -> None:
         """Turn switch off."""
         _LOGGER.debug("Sending turn_off request for entity %s", self.entity_id)
-        await self._elro_connects_api.async_command(
-            self._description.turn_off, device_ID=self._device_id
-        )
-
-        self.data[ATTR_DEVICE_VALUE] = DEVICE_VALUE_OFF
-        self.async_write_ha_state()
+        with self._trace_command("turn_off"):
+            await self._elro_connects_api.async_command(
+                self._description.turn_off, device_ID=self._device_id
+            )
+
+            self.coordinator.async_set_optimistic(
+                self._device_id, {ATTR_DEVICE_VALUE: DEVICE_VALUE_OFF}
+            )
+            self._async_write_command_state()
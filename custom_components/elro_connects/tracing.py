@@ -0,0 +1,116 @@
+"""Span tracing of the Elro Connects command and poll lifecycle."""
+
+from __future__ import annotations
+
+import itertools
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+SPAN_LIMIT = 4096
+
+# Spans of the command and poll lifecycle
+SPAN_COMMAND = "command"
+SPAN_LOCK_WAIT = "lock_wait"
+SPAN_POLL = "poll"
+SPAN_REQUEST = "request"
+SPAN_RETRY = "retry"
+SPAN_STATE_WRITE = "state_write"
+
+# The trace the spans of the running task belong to
+_TRACE: ContextVar[int | None] = ContextVar("elro_connects_trace", default=None)
+_TRACE_IDS = itertools.count(1)
+
+
+class K1Tracer:
+    """Record the spans of the commands and polls of a K1 connector.
+
+    A span is stored as a tuple in a bounded deque, the oldest spans are
+    dropped when the limit is reached. Spans that run in the same task share
+    a trace, a root span starts a new trace. Recording a span costs two clock
+    reads and an append, the tracer is always enabled.
+    """
+
+    def __init__(self, connector_id: str, limit: int = SPAN_LIMIT) -> None:
+        """Initialize the tracer."""
+        self.connector_id = connector_id
+        # Spans as (name, trace_id, start_ns, duration_ns, args)
+        self._spans: deque[tuple[str, int, int, int, dict[str, Any]]] = deque(
+            maxlen=limit
+        )
+
+    def __len__(self) -> int:
+        """Return the number of stored spans."""
+        return len(self._spans)
+
+    @contextmanager
+    def span(self, name: str, root: bool = False, **args: Any) -> Iterator[None]:
+        """Record a span, a new trace is started for a root span or no trace."""
+        token = None
+        if root or (trace_id := _TRACE.get()) is None:
+            trace_id = next(_TRACE_IDS)
+            token = _TRACE.set(trace_id)
+        started = time.perf_counter_ns()
+        try:
+            yield
+        except BaseException as err:
+            args["error"] = type(err).__name__
+            raise
+        finally:
+            self._spans.append(
+                (name, trace_id, started, time.perf_counter_ns() - started, args)
+            )
+            if token is not None:
+                _TRACE.reset(token)
+
+    def spans(self) -> list[dict[str, Any]]:
+        """Return the stored spans, the times are in microseconds."""
+        return [
+            {
+                "name": name,
+                "trace_id": trace_id,
+                "start": started / 1000,
+                "duration": duration / 1000,
+                "args": args,
+            }
+            for name, trace_id, started, duration, args in self._spans
+        ]
+
+    def clear(self) -> None:
+        """Drop all stored spans."""
+        self._spans.clear()
+
+
+def chrome_trace(tracers: Iterable[K1Tracer]) -> dict[str, Any]:
+    """Return the spans in the Chrome trace event format.
+
+    Every K1 connector is a process and every trace a thread, the spans of a
+    command or poll are nested on one row in the trace viewer.
+    """
+    events: list[dict[str, Any]] = []
+    for pid, tracer in enumerate(tracers, 1):
+        events.append(
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": pid,
+                "args": {"name": tracer.connector_id},
+            }
+        )
+        events.extend(
+            {
+                "name": span["name"],
+                "cat": "elro_connects",
+                "ph": "X",
+                "ts": span["start"],
+                "dur": span["duration"],
+                "pid": pid,
+                "tid": span["trace_id"],
+                "args": span["args"],
+            }
+            for span in tracer.spans()
+        )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
@@ -0,0 +1,187 @@
+"""Websocket API for the Elro Connects integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import voluptuous as vol
+from elro.device import (
+    ATTR_BATTERY_LEVEL,
+    ATTR_DEVICE_STATE,
+    ATTR_DEVICE_TYPE,
+    ATTR_DEVICE_VALUE,
+    ATTR_SIGNAL,
+)
+from homeassistant.components import websocket_api
+from homeassistant.const import ATTR_NAME
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+
+from .const import (
+    ATTR_CONNECTOR_ID,
+    ATTR_DEVICE_ID,
+    ELRO_CONNECTS_DATA_UPDATED,
+)
+from .device import ElroConnectsK1
+from .services import async_get_connectors
+
+# The decoded device attributes, a change of one of these is a delta
+DEVICE_ATTRIBUTES = (
+    ATTR_DEVICE_TYPE,
+    ATTR_NAME,
+    ATTR_DEVICE_STATE,
+    ATTR_DEVICE_VALUE,
+    ATTR_BATTERY_LEVEL,
+    ATTR_SIGNAL,
+)
+
+
+@callback
+def async_setup_websocket_api(hass: HomeAssistant) -> None:
+    """Set up the websocket API."""
+    websocket_api.async_register_command(hass, websocket_snapshot)
+    websocket_api.async_register_command(hass, websocket_subscribe)
+
+
+def _device_key(
+    elro_connects_api: ElroConnectsK1, device_id: int, device_data: dict
+) -> tuple:
+    """Return the values that are compared to detect a device change."""
+    return (
+        *(device_data.get(attribute) for attribute in DEVICE_ATTRIBUTES),
+        elro_connects_api.is_stale(device_id),
+    )
+
+
+def _device_snapshot(
+    elro_connects_api: ElroConnectsK1, device_id: int, device_data: dict
+) -> dict[str, Any]:
+    """Return the decoded state, name and freshness of a device."""
+    freshness = elro_connects_api.device_freshness(device_id)
+    return {
+        ATTR_DEVICE_ID: device_id,
+        **{attribute: device_data.get(attribute) for attribute in DEVICE_ATTRIBUTES},
+        "last_update": freshness.last_update if freshness else None,
+        "missed_polls": freshness.missed_polls if freshness else 0,
+        "stale": elro_connects_api.is_stale(device_id),
+    }
+
+
+def _connector_snapshot(elro_connects_api: ElroConnectsK1) -> dict[str, Any]:
+    """Return the snapshot of all devices of a K1 connector."""
+    return {
+        ATTR_CONNECTOR_ID: elro_connects_api.connector_id,
+        "connection_health": elro_connects_api.connection.health,
+        "last_update_success": elro_connects_api.last_update_success,
+        "response_time": elro_connects_api.response_time,
+        "devices": [
+            _device_snapshot(elro_connects_api, device_id, device_data)
+            for device_id, device_data in (elro_connects_api.data or {}).items()
+        ],
+    }
+
+
+def _async_get_connectors(
+    connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> list[ElroConnectsK1] | None:
+    """Return the requested K1 connectors, or send an error."""
+    try:
+        return async_get_connectors(connection.hass, msg.get(ATTR_CONNECTOR_ID))
+    except ServiceValidationError as err:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, str(err))
+        return None
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "elro_connects/snapshot",
+        vol.Optional(ATTR_CONNECTOR_ID): str,
+    }
+)
+@callback
+def websocket_snapshot(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Return the snapshot of all devices of the K1 connectors."""
+    if (connectors := _async_get_connectors(connection, msg)) is None:
+        return
+    connection.send_result(
+        msg["id"],
+        {"connectors": [_connector_snapshot(api) for api in connectors]},
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "elro_connects/subscribe",
+        vol.Optional(ATTR_CONNECTOR_ID): str,
+    }
+)
+@callback
+def websocket_subscribe(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Send a snapshot, followed by the changed devices of every update."""
+    if (connectors := _async_get_connectors(connection, msg)) is None:
+        return
+    connector_id: str | None = msg.get(ATTR_CONNECTOR_ID)
+    # The device keys that were sent per connector
+    sent: dict[str, dict[int, tuple]] = {
+        api.connector_id: {
+            device_id: _device_key(api, device_id, device_data)
+            for device_id, device_data in (api.data or {}).items()
+        }
+        for api in connectors
+    }
+
+    @callback
+    def _async_updated(elro_connects_api: ElroConnectsK1) -> None:
+        """Send the devices that changed with the last update."""
+        if (
+            connector_id is not None and elro_connects_api.connector_id != connector_id
+        ) or elro_connects_api.data is None:
+            return
+        sent_keys = sent.setdefault(elro_connects_api.connector_id, {})
+        devices: list[dict[str, Any]] = []
+        for device_id, device_data in elro_connects_api.data.items():
+            key = _device_key(elro_connects_api, device_id, device_data)
+            if sent_keys.get(device_id) != key:
+                sent_keys[device_id] = key
+                devices.append(
+                    _device_snapshot(elro_connects_api, device_id, device_data)
+                )
+        removed = [
+            device_id
+            for device_id in sent_keys
+            if device_id not in elro_connects_api.data
+        ]
+        for device_id in removed:
+            del sent_keys[device_id]
+        if not devices and not removed:
+            return
+        connection.send_message(
+            websocket_api.event_message(
+                msg["id"],
+                {
+                    ATTR_CONNECTOR_ID: elro_connects_api.connector_id,
+                    "devices": devices,
+                    "removed": removed,
+                },
+            )
+        )
+
+    connection.subscriptions[msg["id"]] = async_dispatcher_connect(
+        hass, ELRO_CONNECTS_DATA_UPDATED, _async_updated
+    )
+    connection.send_result(msg["id"])
+    connection.send_message(
+        websocket_api.event_message(
+            msg["id"],
+            {"connectors": [_connector_snapshot(api) for api in connectors]},
+        )
+    )
@@ -0,0 +1,152 @@
+"""Test the Elro Connects alarm test orchestrator."""
+
+from __future__ import annotations
+
+import copy
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from elro.api import K1
+from elro.command import (
+    SILENCE_ALARM,
+    TEST_ALARM,
+    TEST_ALARM_ALT,
+    Command,
+    CommandAttributes,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.setup import async_setup_component
+
+from custom_components.elro_connects.const import DOMAIN
+
+from .test_common import MOCK_DEVICE_STATUS_DATA
+
+
+@pytest.fixture(autouse=True)
+def fast_focused_polling():
+    """Poll fast while testing alarms."""
+    with patch(
+        "custom_components.elro_connects.alarm_test.FOCUSED_POLL_INTERVAL", 0.01
+    ):
+        yield
+
+
+async def test_run_alarm_test(
+    hass: HomeAssistant,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test running an alarm test across all alarms."""
+    status_data = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    # A water alarm that does not respond to the test alarm
+    status_data[3] = copy.deepcopy(status_data[1])
+    status_data[3]["device_type"] = "WATER_ALARM"
+    status_data[3]["device_status_data"]["device_name"] = "0004"
+    status_data[3]["name"] = "Kelder"
+    commands: list[tuple[str, int]] = []
+
+    async def _process_command(
+        attributes: CommandAttributes, **argv: Any
+    ) -> dict[int, dict]:
+        if attributes["cmd_id"] != Command.EQUIPMENT_CONTROL:
+            return copy.deepcopy(status_data)
+        device_id = argv["device_ID"]
+        if attributes is SILENCE_ALARM:
+            commands.append(("silence", device_id))
+            status_data[device_id]["device_state"] = "SILENCE"
+        else:
+            commands.append(("test", device_id))
+            assert attributes is (TEST_ALARM if device_id == 1 else TEST_ALARM_ALT)
+            if device_id == 1:
+                status_data[device_id]["device_state"] = "TEST ALARM"
+        return {}
+
+    mock_k1_connector["result"].side_effect = _process_command
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+
+    report = await hass.services.async_call(
+        DOMAIN,
+        "run_alarm_test",
+        {"pace": 0, "timeout": 1},
+        blocking=True,
+        return_response=True,
+    )
+    assert (report["passed"], report["failed"], report["error"]) == (1, 1, 0)
+    assert report["skipped"] == 3
+    devices = {device["device_id"]: device for device in report["devices"]}
+    assert devices[1]["result"] == "passed"
+    assert devices[1]["confirm_time"] < 1
+    assert devices[2] | {"reason": "in alarm", "result": "skipped"} == devices[2]
+    assert devices[3]["result"] == "failed"
+    assert devices[4]["reason"] == "in alarm"
+    assert devices[5]["reason"] == "unavailable"
+    # Alarms that are or might be going off are never touched
+    assert sorted(commands) == [
+        ("silence", 1),
+        ("silence", 3),
+        ("test", 1),
+        ("test", 3),
+    ]
+    assert hass.states.get("siren.beganegrond_fire_alarm").state == "off"
+
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN,
+            "run_alarm_test",
+            {"connector_id": "ST_unknown"},
+            blocking=True,
+            return_response=True,
+        )
+
+
+@pytest.mark.parametrize("failing", ["status", "silence"])
+async def test_alarm_test_errors(
+    hass: HomeAssistant,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+    failing: str,
+) -> None:
+    """Test a sent test alarm is silenced when the alarm test fails."""
+    status_data = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    commands: list[tuple[str, int]] = []
+
+    async def _process_command(
+        attributes: CommandAttributes, **argv: Any
+    ) -> dict[int, dict]:
+        if attributes["cmd_id"] != Command.EQUIPMENT_CONTROL:
+            if commands and failing == "status":
+                raise K1.K1ConnectionError("No response")
+            return copy.deepcopy(status_data)
+        if attributes is SILENCE_ALARM:
+            commands.append(("silence", argv["device_ID"]))
+            if failing == "silence":
+                raise K1.K1ConnectionError("No response")
+        else:
+            commands.append(("test", argv["device_ID"]))
+            status_data[argv["device_ID"]]["device_state"] = "TEST ALARM"
+        return {}
+
+    mock_k1_connector["result"].side_effect = _process_command
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+
+    report = await hass.services.async_call(
+        DOMAIN,
+        "run_alarm_test",
+        {"pace": 0, "timeout": 1},
+        blocking=True,
+        return_response=True,
+    )
+    assert commands == [("test", 1), ("silence", 1)]
+    assert report["error"] == 1
+    device = next(device for device in report["devices"] if device["device_id"] == 1)
+    assert device["result"] == "error"
+    if failing == "silence":
+        assert device["reason"].startswith("alarm not silenced")
+        assert device["silence_error"]
+    else:
+        assert "silence_error" not in device
@@ -0,0 +1,103 @@
+"""Test the Elro Connects traffic capture and replay."""
+
+from __future__ import annotations
+
+import copy
+import json
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import pytest
+from elro.api import K1
+from elro.command import GET_ALL_EQUIPMENT_STATUS, GET_DEVICE_NAMES
+from homeassistant.components import siren
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import ATTR_ENTITY_ID, SERVICE_TURN_ON, STATE_OFF, STATE_ON
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.elro_connects.capture import K1TrafficReplay
+from custom_components.elro_connects.const import DOMAIN
+
+from .test_common import MOCK_DEVICE_STATUS_DATA
+
+
+async def test_capture_and_replay(
+    hass: HomeAssistant,
+    tmp_path: Path,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test capturing the K1 traffic and replaying it."""
+    hass.config.config_dir = str(tmp_path)
+    mock_k1_connector["result"].return_value = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+
+    response = await hass.services.async_call(
+        DOMAIN, "start_capture", {}, blocking=True, return_response=True
+    )
+    path = response["files"]["ST_deadbeef0000"]
+    assert path.startswith(str(tmp_path))
+
+    # Capture a poll and a command
+    updated_status_data = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    updated_status_data[1]["device_state"] = "FIRE ALARM"
+    mock_k1_connector["result"].return_value = updated_status_data
+    async_fire_time_changed(hass, dt.now() + timedelta(seconds=30))
+    await hass.async_block_till_done()
+    await hass.services.async_call(
+        siren.DOMAIN,
+        SERVICE_TURN_ON,
+        {ATTR_ENTITY_ID: "siren.zolder_fire_alarm"},
+        blocking=True,
+    )
+    response = await hass.services.async_call(
+        DOMAIN,
+        "stop_capture",
+        {"connector_id": "ST_deadbeef0000"},
+        blocking=True,
+        return_response=True,
+    )
+    assert response["files"]["ST_deadbeef0000"] == {"path": path, "records": 3}
+
+    records = [json.loads(line) for line in Path(path).read_text().splitlines()]
+    assert [record["cmd"] for record in records] == [
+        "GET_ALL_EQUIPMENT_STATUS",
+        "GET_DEVICE_NAME",
+        "EQUIPMENT_CONTROL",
+    ]
+    assert records[0]["resp"]["1"]["device_state"] == "FIRE ALARM"
+    assert records[2]["argv"] == {"device_ID": 4}
+
+    # Replay the captured traffic
+    assert await hass.config_entries.async_unload(mock_entry.entry_id)
+    replay = K1TrafficReplay.from_file(path)
+    mock_k1_connector["result"].side_effect = replay.async_process_command
+    assert await hass.config_entries.async_setup(mock_entry.entry_id)
+    await hass.async_block_till_done()
+    assert replay.requests == 2
+    assert hass.states.get("siren.beganegrond_fire_alarm").state == STATE_ON
+    assert hass.states.get("siren.zolder_fire_alarm").state == STATE_OFF
+
+
+async def test_replay_timing_and_errors() -> None:
+    """Test the replay reproduces the captured timing and errors."""
+    replay = K1TrafficReplay(
+        [
+            {"t": 0.0, "d": 0.01, "cmd": "GET_ALL_EQUIPMENT_STATUS", "resp": {}},
+            {"t": 0.05, "d": 0.01, "cmd": "GET_ALL_EQUIPMENT_STATUS", "err": "lost"},
+        ],
+        realtime=True,
+    )
+    started = time.monotonic()
+    assert await replay.async_process_command(GET_ALL_EQUIPMENT_STATUS) == {}
+    with pytest.raises(K1.K1ConnectionError):
+        await replay.async_process_command(GET_ALL_EQUIPMENT_STATUS)
+    assert time.monotonic() - started >= 0.05
+    with pytest.raises(K1.K1ConnectionError):
+        await replay.async_process_command(GET_DEVICE_NAMES)
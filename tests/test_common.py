@@ -1,5 +1,15 @@
 """Helpers for testing the Elro Connects integration."""
 
+import random
+
+MOCK_DEVICE_TYPES = (
+    ("FIRE_ALARM", "0013"),
+    ("CO_ALARM", "2008"),
+    ("WATER_ALARM", "0004"),
+    ("SOCKET", "1200"),
+)
+MOCK_DEVICE_STATES = {"01": "NORMAL", "55": "ALARM", "15": "SILENCE", "FF": "OFFLINE"}
+
 MOCK_DEVICE_STATUS_DATA = {
     1: {
         "device_type": "FIRE_ALARM",
@@ -192,3 +202,39 @@ MOCK_DEVICE_RESPONSE = [
 
 MOCK_USER = "test@example.com"
 MOCK_PASSWORD = "somepassword"
+
+
+def generate_device_status_data(
+    count: int, poll: int = 0, change_rate: float = 0.05
+) -> dict[int, dict]:
+    """Generate status data for simulated devices.
+
+    Every poll a fraction of the devices changes its signal, battery or state.
+    The data is deterministic for a given `count` and `poll`.
+    """
+    rng = random.Random(poll)
+    data: dict[int, dict] = {}
+    for device_id in range(1, count + 1):
+        device_type, device_name = MOCK_DEVICE_TYPES[device_id % len(MOCK_DEVICE_TYPES)]
+        signal, battery, state = 4, 100, "01"
+        if poll and rng.random() < change_rate:
+            signal = rng.randint(1, 4)
+            battery = rng.choice((100, 75, 50, 5))
+            state = rng.choice(tuple(MOCK_DEVICE_STATES))
+        value = 1 if device_type == "SOCKET" else 255
+        data[device_id] = {
+            "device_type": device_type,
+            "signal": signal,
+            "battery": battery,
+            "device_state": MOCK_DEVICE_STATES[state],
+            "device_status_data": {
+                "cmdId": 19,
+                "device_ID": device_id,
+                "device_name": device_name,
+                "device_status": f"{signal:02X}{battery:02X}{state}{value:02X}",
+            },
+            "device_value": "on" if value == 1 else hex(value),
+            "device_value_data": value,
+            "name": f"Device {device_id}",
+        }
+    return data
@@ -17,7 +17,18 @@ from homeassistant.core import HomeAssistant
 from homeassistant.data_entry_flow import FlowResultType
 from homeassistant.setup import async_setup_component
 
-from custom_components.elro_connects.const import CONF_CONNECTOR_ID, DOMAIN
+from custom_components.elro_connects.const import (
+    CONF_COMMAND_TIMEOUT,
+    CONF_COMPACT_SENSORS,
+    CONF_CONNECTOR_ID,
+    CONF_EXECUTOR_PROCESSING,
+    CONF_INTERLINK,
+    CONF_KEEPALIVE,
+    CONF_PRUNE_AFTER,
+    CONF_SETUP_TIMEOUT,
+    CONF_STALE_TIMEOUT,
+    DOMAIN,
+)
 
 from .test_common import (
     MOCK_AUTH_RESPONSE,
@@ -237,6 +248,16 @@ async def test_update_options(
     assert config_entry.data.get(CONF_HOST) == "1.1.1.2"
     assert config_entry.data.get(CONF_CONNECTOR_ID) == "ST_deadbeef0000"
     assert config_entry.data.get(CONF_PORT) == 1024
+    assert config_entry.options == {
+        CONF_STALE_TIMEOUT: 3600,
+        CONF_INTERLINK: False,
+        CONF_KEEPALIVE: True,
+        CONF_SETUP_TIMEOUT: 0,
+        CONF_COMPACT_SENSORS: False,
+        CONF_PRUNE_AFTER: 0,
+        CONF_EXECUTOR_PROCESSING: False,
+        CONF_COMMAND_TIMEOUT: 10,
+    }
 
 
 async def test_update_options_from_cloud(
@@ -0,0 +1,83 @@
+"""Test the Elro Connects device status decoder."""
+
+from __future__ import annotations
+
+import copy
+
+import pytest
+from elro.utils import get_device_states
+
+from custom_components.elro_connects.decoder import DeviceStatusDecoder
+
+
+def _hexdata(device_id: int, device_name: str, device_status: str) -> dict:
+    """Return a raw device status record."""
+    return {
+        "cmdId": 19,
+        "device_ID": device_id,
+        "device_name": device_name,
+        "device_status": device_status,
+    }
+
+
+MOCK_CONTENT = [
+    _hexdata(1, "0013", "0364AAFF"),
+    _hexdata(2, "0013", "044B55FF"),
+    _hexdata(4, "0013", "0105FEFF"),
+    _hexdata(5, "2008", "FEFEFEFF"),
+    _hexdata(6, "1200", "04640101"),
+    _hexdata(7, "1200", "04640100"),
+    _hexdata(8, "0004", "02327702"),
+    _hexdata(9, "FFFF", "04640101"),
+    _hexdata(10, "0013", "0364AAFF1234"),
+]
+
+
+def test_decode_matches_library() -> None:
+    """Test the batch decoder returns the same states as the library."""
+    decoder = DeviceStatusDecoder()
+    assert decoder(copy.deepcopy(MOCK_CONTENT)) == get_device_states(
+        copy.deepcopy(MOCK_CONTENT)
+    )
+    valid = [hexdata for hexdata in MOCK_CONTENT if len(hexdata["device_status"]) == 8]
+    assert decoder(copy.deepcopy(valid)) == get_device_states(copy.deepcopy(valid))
+    assert decoder.changed == 0
+
+
+def test_decode_reuses_unchanged_records() -> None:
+    """Test only records with a changed raw status are decoded."""
+    decoder = DeviceStatusDecoder()
+    first = decoder(copy.deepcopy(MOCK_CONTENT[:3]))
+    assert decoder.changed == 3
+
+    content = copy.deepcopy(MOCK_CONTENT[:3])
+    content[1]["device_status"] = "044B01FF"
+    second = decoder(content)
+    assert decoder.changed == 1
+    assert second[1] is first[1]
+    assert second[1]["device_status_data"] is content[0]
+    assert second[2] is not first[2]
+    assert second[2]["device_state"] == "NORMAL"
+    assert second == get_device_states(copy.deepcopy(content))
+
+    # Devices that are no longer reported are forgotten
+    decoder(copy.deepcopy(MOCK_CONTENT[1:2]))
+    decoder(copy.deepcopy(MOCK_CONTENT[:1]))
+    assert decoder.changed == 1
+
+
+def test_decode_duplicate_records() -> None:
+    """Test the last record of a device wins, like the library does."""
+    decoder = DeviceStatusDecoder()
+    decoder([_hexdata(1, "0013", "0364AAFF")])
+    content = [_hexdata(1, "0013", "03641BFF"), _hexdata(1, "0013", "0364AAFF")]
+    assert decoder(copy.deepcopy(content)) == get_device_states(content)
+
+
+def test_decode_malformed_status() -> None:
+    """Test a malformed status is decoded like the library does."""
+    decoder = DeviceStatusDecoder()
+    content = [_hexdata(1, "0013", "0364ZZFF"), _hexdata(2, "0013", "0364AAFF")]
+    assert decoder(copy.deepcopy(content)) == get_device_states(content)
+    with pytest.raises(ValueError):
+        decoder([_hexdata(1, "0013", "03ZZAAFF")])
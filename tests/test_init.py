@@ -1,19 +1,53 @@
 """Test the Elro Connects setup."""
 
+import asyncio
 import copy
 from datetime import timedelta
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from elro.api import K1
+from elro.command import SET_DEVICE_NAME, TEST_ALARM, Command, CommandAttributes
+from freezegun.api import FrozenDateTimeFactory
 import pytest
-from pytest_homeassistant_custom_component.common import async_fire_time_changed
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_capture_events,
+    async_fire_time_changed,
+)
 
 from custom_components.elro_connects import async_remove_config_entry_device
-from custom_components.elro_connects.const import DOMAIN
+from custom_components.elro_connects.const import (
+    CONF_CONNECTOR_ID,
+    CONF_EXECUTOR_PROCESSING,
+    CONF_KEEPALIVE,
+    CONF_PRUNE_AFTER,
+    CONF_SETUP_TIMEOUT,
+    CONF_STALE_TIMEOUT,
+    DOMAIN,
+    EVENT_DEVICE_TRANSITION,
+)
+from custom_components.elro_connects.device import (
+    HEARTBEAT_INTERVAL,
+    ElroConnectsK1,
+    K1CommandCancelled,
+    K1CommandTimeout,
+    K1Unavailable,
+    process_response,
+)
+from homeassistant.components import siren
 from homeassistant.config_entries import ConfigEntry, ConfigEntryState
-from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.const import (
+    ATTR_ENTITY_ID,
+    CONF_HOST,
+    CONF_PORT,
+    SERVICE_TURN_ON,
+    STATE_OFF,
+    STATE_ON,
+    STATE_UNAVAILABLE,
+)
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.device_registry import format_mac
 from homeassistant.setup import async_setup_component
 from homeassistant.util import dt
@@ -280,3 +314,632 @@ async def test_update_device_name(
     await hass.async_block_till_done()
 
     assert mock_k1_connector["result"].call_count == 0
+
+
+async def test_prune_devices(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test devices that disappeared from the K1 are removed."""
+    hass.config_entries.async_update_entry(mock_entry, options={CONF_PRUNE_AFTER: 2})
+    mock_k1_connector["result"].return_value = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    elro_connects_api = hass.data[DOMAIN][mock_entry.entry_id]
+    device_registry = dr.async_get(hass)
+    entity_registry = er.async_get(hass)
+    identifiers = {(DOMAIN, "ST_deadbeef0000_1")}
+    assert device_registry.async_get_device(identifiers=identifiers)
+    assert entity_registry.async_get("siren.beganegrond_fire_alarm")
+
+    async def _async_poll(status_data: dict[int, dict]) -> None:
+        mock_k1_connector["result"].return_value = copy.deepcopy(status_data)
+        freezer.tick(timedelta(seconds=30))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+    # The device is removed after it was absent for two polls
+    status_data = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    status_data.pop(1)
+    await _async_poll(status_data)
+    assert device_registry.async_get_device(identifiers=identifiers)
+    await _async_poll(status_data)
+    assert device_registry.async_get_device(identifiers=identifiers) is None
+    assert entity_registry.async_get("siren.beganegrond_fire_alarm") is None
+    assert hass.states.get("siren.beganegrond_fire_alarm") is None
+    assert 1 not in elro_connects_api.data
+    assert elro_connects_api.device_freshness(1) is None
+    # Other devices are kept
+    assert entity_registry.async_get("siren.eerste_etage_fire_alarm")
+
+    # The device is added again when it comes back
+    await _async_poll(MOCK_DEVICE_STATUS_DATA)
+    assert device_registry.async_get_device(identifiers=identifiers)
+    assert hass.states.get("siren.beganegrond_fire_alarm").state == STATE_OFF
+
+
+async def test_sync_device_names(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test names changed on the K1 are synced to the device registry."""
+    status_data = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    mock_k1_connector["result"].return_value = status_data
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    device_registry = dr.async_get(hass)
+    device_entry = device_registry.async_get_device(
+        identifiers={(DOMAIN, "ST_deadbeef0000_1")}
+    )
+    assert device_entry.name == "Beganegrond"
+    device_registry.async_update_device(device_entry.id, name_by_user="Hal")
+    await hass.async_block_till_done()
+
+    # The device is renamed in the Elro app
+    mock_k1_connector["result"].reset_mock()
+    status_data = copy.deepcopy(status_data)
+    status_data[1]["name"] = "Gang"
+    mock_k1_connector["result"].return_value = status_data
+    freezer.tick(timedelta(seconds=30))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    device_entry = device_registry.async_get(device_entry.id)
+    assert device_entry.name == "Gang"
+    # The name set by the user is kept and is not written back to the K1
+    assert device_entry.name_by_user == "Hal"
+    assert all(
+        call.args[0]["cmd_id"] != SET_DEVICE_NAME["cmd_id"]
+        for call in mock_k1_connector["result"].mock_calls
+    )
+    assert (
+        device_registry.async_get_device(
+            identifiers={(DOMAIN, "ST_deadbeef0000_2")}
+        ).name
+        == "Eerste etage"
+    )
+
+
+def test_process_response_does_not_change_responses() -> None:
+    """Test the decoded responses are merged into new dicts."""
+    status = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    names = {1: {"name": "Keuken"}, 99: {"name": "Zolder"}}
+    processed = process_response({}, status, names)
+    assert status == MOCK_DEVICE_STATUS_DATA
+    assert names == {1: {"name": "Keuken"}, 99: {"name": "Zolder"}}
+    assert processed.connector_data[1]["name"] == "Keuken"
+    assert processed.connector_data[99] is not names[99]
+    assert processed.coordinator_update[1]["name"] == "Keuken"
+
+
+@pytest.mark.parametrize("executor", [False, True], ids=["event_loop", "executor"])
+async def test_device_transition_events(
+    hass: HomeAssistant,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+    executor: bool,
+) -> None:
+    """Test transition events are fired when a device changes state class."""
+    hass.config_entries.async_update_entry(
+        mock_entry, options={CONF_EXECUTOR_PROCESSING: executor}
+    )
+    events = async_capture_events(hass, EVENT_DEVICE_TRANSITION)
+    initial_status_data = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    mock_k1_connector["result"].return_value = initial_status_data
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    # Only the alarm that is already going off fires an event on discovery
+    assert len(events) == 1
+    assert events[0].data["device_id"] == 2
+    assert events[0].data["from_state"] is None
+    assert events[0].data["to_state"] == "ALARM"
+    assert events[0].data["transition"] == "alarm"
+    assert hass.states.get("siren.beganegrond_fire_alarm").state == STATE_OFF
+    events.clear()
+
+    # Device 1 goes into alarm, device 2 is silenced, device 5 stays offline
+    updated_status_data = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    updated_status_data[1]["device_state"] = "FIRE ALARM"
+    updated_status_data[2]["device_state"] = "SILENCE"
+    mock_k1_connector["result"].return_value = updated_status_data
+    time = dt.now() + timedelta(seconds=30)
+    async_fire_time_changed(hass, time)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert len(events) == 2
+    assert events[0].data["connector_id"] == "ST_deadbeef0000"
+    assert events[0].data["device_id"] == 1
+    assert events[0].data["device_type"] == "FIRE_ALARM"
+    assert events[0].data["name"] == "Beganegrond"
+    assert events[0].data["from_state"] == "NORMAL"
+    assert events[0].data["to_state"] == "FIRE ALARM"
+    assert events[0].data["transition"] == "alarm"
+    assert dt.parse_datetime(events[0].data["response_time"]) is not None
+    assert events[1].data["device_id"] == 2
+    assert events[1].data["transition"] == "silence"
+    assert hass.states.get("siren.beganegrond_fire_alarm").state == STATE_ON
+
+    # A change within the same state class does not fire an event
+    updated_status_data = copy.deepcopy(updated_status_data)
+    updated_status_data[1]["device_state"] = "ALARM"
+    mock_k1_connector["result"].return_value = updated_status_data
+    time = time + timedelta(seconds=30)
+    async_fire_time_changed(hass, time)
+    await hass.async_block_till_done(wait_background_tasks=True)
+    assert len(events) == 2
+
+
+async def test_connection_backoff_and_recovery(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test the connection health, circuit breaker and recovery."""
+    health_entity_id = "sensor.elro_connects_k1_st_deadbeef0000_connection_health"
+    mock_k1_connector["result"].return_value = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    assert hass.states.get(health_entity_id).state == "healthy"
+
+    # Simulate a K1 reboot, the cached state is kept for the first failures
+    mock_k1_connector["result"].side_effect = K1.K1ConnectionError
+    for _ in range(2):
+        freezer.tick(timedelta(seconds=400))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+    assert hass.states.get(health_entity_id).state == "degraded"
+    assert hass.states.get("siren.beganegrond_fire_alarm").state == STATE_OFF
+
+    freezer.tick(timedelta(seconds=400))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    state = hass.states.get(health_entity_id)
+    assert state.state == "offline"
+    assert state.attributes["consecutive_failures"] == 3
+    assert hass.states.get("siren.beganegrond_fire_alarm").state == STATE_UNAVAILABLE
+    # The socket is recreated after every failure
+    assert mock_k1_connector["configure"].call_count == 3
+
+    # Commands are short circuited while the circuit is open
+    mock_k1_connector["result"].reset_mock()
+    elro_connects_api = hass.data[DOMAIN][mock_entry.entry_id]
+    with pytest.raises(K1Unavailable):
+        await elro_connects_api.async_command(TEST_ALARM, device_ID=2)
+    assert mock_k1_connector["result"].call_count == 0
+
+    # The K1 is back online, the poll that is scheduled slightly before the
+    # retry time probes the K1
+    mock_k1_connector["result"].side_effect = None
+    freezer.move_to(elro_connects_api.connection.retry_at - timedelta(seconds=0.5))
+    await elro_connects_api.async_refresh()
+    await hass.async_block_till_done()
+    assert mock_k1_connector["result"].call_count > 0
+    state = hass.states.get(health_entity_id)
+    assert state.state == "healthy"
+    assert state.attributes["consecutive_failures"] == 0
+    assert state.attributes["last_recovery_time"] >= 800
+    assert hass.states.get("siren.beganegrond_fire_alarm").state == STATE_OFF
+
+
+async def test_stale_devices(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test devices without valid updates become unavailable."""
+    stale_entity_id = "sensor.elro_connects_k1_st_deadbeef0000_stale_devices"
+    hass.config_entries.async_update_entry(mock_entry, options={CONF_STALE_TIMEOUT: 60})
+    mock_k1_connector["result"].return_value = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    assert hass.states.get(stale_entity_id).state == "0"
+    elro_connects_api = hass.data[DOMAIN][mock_entry.entry_id]
+    # Device 4 was discovered with an unknown state, that is not a valid update
+    assert elro_connects_api.device_freshness(4).last_update is None
+    assert elro_connects_api.device_freshness(4).missed_polls == 1
+    assert elro_connects_api.device_freshness(1).missed_polls == 0
+
+    # Device 1 reports an unknown state, device 2 is not reported any more
+    updated_status_data = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    updated_status_data[1]["device_state"] = "UNKNOWN"
+    updated_status_data.pop(2)
+    mock_k1_connector["result"].return_value = updated_status_data
+    freezer.tick(timedelta(seconds=30))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert elro_connects_api.device_freshness(1).missed_polls == 1
+    assert elro_connects_api.device_freshness(2).missed_polls == 1
+    assert elro_connects_api.device_freshness(7).missed_polls == 0
+    assert hass.states.get("siren.beganegrond_fire_alarm").state == STATE_OFF
+
+    for _ in range(2):
+        freezer.tick(timedelta(seconds=30))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+    # Device 4 was discovered with an unknown state and never had a valid update
+    state = hass.states.get(stale_entity_id)
+    assert state.state == "3"
+    assert state.attributes["device_ids"] == [1, 2, 4]
+    assert hass.states.get("siren.beganegrond_fire_alarm").state == STATE_UNAVAILABLE
+    assert hass.states.get("sensor.beganegrond_battery").state == STATE_UNAVAILABLE
+    assert hass.states.get("siren.eerste_etage_fire_alarm").state == STATE_UNAVAILABLE
+    assert hass.states.get("switch.wall_switch_on_socket").state == STATE_ON
+
+    # A valid update makes the device available again
+    mock_k1_connector["result"].return_value = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    freezer.tick(timedelta(seconds=30))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert hass.states.get(stale_entity_id).state == "1"
+    assert hass.states.get("siren.beganegrond_fire_alarm").state == STATE_OFF
+
+
+async def test_skip_unchanged_polls(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test the update is skipped when the K1 response did not change."""
+    mock_k1_connector["result"].return_value = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    elro_connects_api = hass.data[DOMAIN][mock_entry.entry_id]
+    data = elro_connects_api.data
+    last_updated = hass.states.get("sensor.beganegrond_battery").last_updated
+
+    for _ in range(3):
+        freezer.tick(timedelta(seconds=30))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+    assert elro_connects_api.data is data
+    assert elro_connects_api.polls == 4
+    assert elro_connects_api.skipped_polls == 3
+    assert elro_connects_api.skip_ratio == 0.75
+    assert hass.states.get("sensor.beganegrond_battery").last_updated == last_updated
+    # The freshness is still updated
+    assert elro_connects_api.device_freshness(1).missed_polls == 0
+    assert elro_connects_api.device_freshness(1).last_update == dt.utcnow()
+
+    # A command forces the next poll to be processed
+    await elro_connects_api.async_command(TEST_ALARM, device_ID=1)
+    freezer.tick(timedelta(seconds=30))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert elro_connects_api.skipped_polls == 3
+    assert elro_connects_api.data is not data
+
+    # A changed response is processed
+    updated_status_data = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    updated_status_data[1]["battery"] = 50
+    mock_k1_connector["result"].return_value = updated_status_data
+    freezer.tick(timedelta(seconds=30))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert elro_connects_api.polls == 6
+    assert elro_connects_api.skipped_polls == 3
+    assert hass.states.get("sensor.beganegrond_battery").state == "50"
+
+
+async def test_keepalive(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test the session is warmed up and reconnected in the background."""
+    mock_k1_connector["result"].return_value = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    connects: list[str] = []
+
+    async def _connect(self: ElroConnectsK1) -> None:
+        connects.append(self.connector_id)
+        self._transport = MagicMock()
+        self._session = {"key": "abc"}
+
+    with patch.object(ElroConnectsK1, "async_connect", _connect):
+        assert await async_setup_component(hass, DOMAIN, {})
+        await hass.async_block_till_done()
+        elro_connects_api = hass.data[DOMAIN][mock_entry.entry_id]
+        # The session was set up before the first request
+        assert connects == ["ST_deadbeef0000"]
+        assert elro_connects_api.connection.connects == 1
+        assert elro_connects_api.connection.requests(True) == 0
+        assert elro_connects_api.connection.requests(False) > 0
+        assert elro_connects_api.connection.first_request_latency is not None
+
+        # The dropped session is set up again between polls, on a new socket
+        elro_connects_api._session = {}
+        freezer.tick(HEARTBEAT_INTERVAL)
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done(wait_background_tasks=True)
+        assert len(connects) == 2
+        assert mock_k1_connector["configure"].call_count == 1
+
+        # Without keep-alive the session is set up by the next request
+        hass.config_entries.async_update_entry(
+            mock_entry, options={CONF_KEEPALIVE: False}
+        )
+        await hass.async_block_till_done()
+        elro_connects_api._session = {}
+        freezer.tick(HEARTBEAT_INTERVAL)
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done(wait_background_tasks=True)
+        assert len(connects) == 2
+
+
+async def test_keepalive_outage(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test the heartbeat does not reconnect while the K1 is unreachable."""
+    mock_k1_connector["result"].return_value = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    connects: list[str] = []
+    reachable = True
+
+    async def _connect(self: ElroConnectsK1) -> None:
+        connects.append(self.connector_id)
+        if not reachable:
+            raise K1.K1ConnectionError("No response")
+        self._transport = MagicMock()
+        self._session = {"key": "abc"}
+
+    with patch.object(ElroConnectsK1, "async_connect", _connect):
+        assert await async_setup_component(hass, DOMAIN, {})
+        await hass.async_block_till_done()
+        elro_connects_api = hass.data[DOMAIN][mock_entry.entry_id]
+        assert len(connects) == 1
+
+        # The session is dropped and the K1 can not be reached for a minute
+        reachable = False
+        mock_k1_connector["result"].side_effect = K1.K1ConnectionError("No response")
+        elro_connects_api._session = {}
+        connects.clear()
+        polls = mock_k1_connector["result"].call_count
+        for _ in range(12):
+            freezer.tick(HEARTBEAT_INTERVAL)
+            async_fire_time_changed(hass)
+            await hass.async_block_till_done(wait_background_tasks=True)
+
+        # The failed reconnect backs off, after that only the polls probe the K1
+        assert connects == ["ST_deadbeef0000"]
+        assert mock_k1_connector["result"].call_count - polls <= 4
+        assert elro_connects_api.connection.failures > 1
+
+
+async def test_hot_reload(
+    hass: HomeAssistant,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test settings are applied in place and the transport swapped on a move."""
+    mock_k1_connector["result"].return_value = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    elro_connects_api = hass.data[DOMAIN][mock_entry.entry_id]
+    data = elro_connects_api.data
+    entities = len(hass.states.async_entity_ids())
+    assert mock_k1_connector["configure"].call_count == 0
+
+    # Other settings keep the session, the data and the entities
+    hass.config_entries.async_update_entry(mock_entry, options={CONF_STALE_TIMEOUT: 60})
+    await hass.async_block_till_done()
+    assert hass.data[DOMAIN][mock_entry.entry_id] is elro_connects_api
+    assert elro_connects_api.data is data
+    assert mock_k1_connector["configure"].call_count == 0
+    assert hass.states.get("siren.beganegrond_fire_alarm").state == STATE_OFF
+
+    # The reload service polls in place
+    calls = mock_k1_connector["result"].call_count
+    await hass.services.async_call(
+        DOMAIN, "reload", {"connector_id": "ST_deadbeef0000"}, blocking=True
+    )
+    assert mock_k1_connector["result"].call_count > calls
+    assert mock_k1_connector["configure"].call_count == 0
+    assert hass.data[DOMAIN][mock_entry.entry_id] is elro_connects_api
+
+    # A new address swaps the transport, the entities are kept
+    hass.config_entries.async_update_entry(
+        mock_entry, data={**mock_entry.data, CONF_HOST: "1.1.1.2"}
+    )
+    await hass.async_block_till_done()
+    assert mock_k1_connector["configure"].call_count == 1
+    assert mock_k1_connector["configure"].call_args[0][:2] == ("1.1.1.2", 1025)
+    assert hass.data[DOMAIN][mock_entry.entry_id] is elro_connects_api
+    assert len(hass.states.async_entity_ids()) == entities
+    await hass.services.async_call(DOMAIN, "reload", {}, blocking=True)
+    assert hass.states.get("siren.beganegrond_fire_alarm").state == STATE_OFF
+
+
+async def test_setup_timeout(
+    hass: HomeAssistant,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test the setup does not wait for a K1 connector that does not respond."""
+    mock_k1_connector["result"].return_value = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    assert await hass.config_entries.async_unload(mock_entry.entry_id)
+    await hass.async_block_till_done()
+
+    responding = asyncio.Event()
+
+    async def _process_command(*args, **kwargs) -> dict[int, dict]:
+        await responding.wait()
+        return copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+
+    mock_k1_connector["result"].return_value = None
+    mock_k1_connector["result"].side_effect = _process_command
+    hass.config_entries.async_update_entry(mock_entry, options={CONF_SETUP_TIMEOUT: 1})
+    assert await hass.config_entries.async_setup(mock_entry.entry_id)
+    await hass.async_block_till_done()
+    assert mock_entry.state is ConfigEntryState.LOADED
+
+    # The known devices are added, but are unavailable until the K1 responds
+    assert hass.states.get("siren.beganegrond_fire_alarm").state == STATE_UNAVAILABLE
+    assert hass.states.get("sensor.beganegrond_battery").state == STATE_UNAVAILABLE
+    assert (
+        hass.states.get("sensor.beganegrond_battery").attributes.get("restored") is None
+    )
+
+    responding.set()
+    await hass.async_block_till_done(wait_background_tasks=True)
+    assert hass.states.get("siren.beganegrond_fire_alarm").state == STATE_OFF
+    assert hass.states.get("sensor.beganegrond_battery").state == "100"
+
+
+async def test_setup_timeout_unreachable_connector(
+    hass: HomeAssistant,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test a K1 that does not respond does not hold up the setup of others."""
+    hass.config_entries.async_update_entry(mock_entry, options={CONF_SETUP_TIMEOUT: 1})
+    healthy_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_HOST: "1.1.1.2",
+            CONF_CONNECTOR_ID: "ST_deadbeef0001",
+            CONF_PORT: 1025,
+        },
+        options={CONF_SETUP_TIMEOUT: 1},
+    )
+    healthy_entry.add_to_hass(hass)
+    responding = asyncio.Event()
+
+    async def _process_command(
+        self: ElroConnectsK1, attributes: CommandAttributes, **argv: int | str
+    ) -> dict[int, dict]:
+        # Like the K1 library the lock is held until the K1 responds
+        async with self._lock:
+            if self.connector_id == "ST_deadbeef0000":
+                await responding.wait()
+            return copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+
+    with patch.object(ElroConnectsK1, "async_process_command", _process_command):
+        assert await async_setup_component(hass, DOMAIN, {})
+        await hass.async_block_till_done()
+        assert mock_entry.state is ConfigEntryState.LOADED
+        assert healthy_entry.state is ConfigEntryState.LOADED
+
+        # The healthy K1 is refreshed while the other K1 still does not respond
+        assert hass.data[DOMAIN][mock_entry.entry_id].data is None
+        healthy_api = hass.data[DOMAIN][healthy_entry.entry_id]
+        assert healthy_api.last_update_success
+        assert healthy_api.data[1]["device_state"] == "NORMAL"
+
+        responding.set()
+        await hass.async_block_till_done(wait_background_tasks=True)
+        assert hass.data[DOMAIN][mock_entry.entry_id].data is not None
+
+
+class HangingK1:
+    """Let the requests to the K1 hang until they are released."""
+
+    def __init__(self) -> None:
+        """Initialize the hanging K1."""
+        self.requested = asyncio.Event()
+        self.responding = asyncio.Event()
+        self.commands: list[int] = []
+
+    async def async_process_command(
+        self, attributes: CommandAttributes, **argv: int | str
+    ) -> dict[int, dict]:
+        """Wait until released, a cancelled request is a connection error."""
+        if attributes["cmd_id"] == Command.EQUIPMENT_CONTROL:
+            self.commands.append(argv["device_ID"])
+        self.requested.set()
+        try:
+            await self.responding.wait()
+        except asyncio.CancelledError as err:
+            # Like the library, a cancelled request is a connection error
+            raise K1.K1ConnectionError("Not received the expected result") from err
+        return copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+
+
+async def test_command_deadline(
+    hass: HomeAssistant,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test the deadline of a command covers the lock wait and the request."""
+    mock_k1_connector["result"].return_value = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    elro_connects_api: ElroConnectsK1 = hass.data[DOMAIN][mock_entry.entry_id]
+    k1 = HangingK1()
+    mock_k1_connector["result"].side_effect = k1.async_process_command
+
+    # A hanging poll holds the API lock, the command is never sent
+    refresh = hass.async_create_task(elro_connects_api.async_refresh())
+    await k1.requested.wait()
+    with pytest.raises(K1CommandTimeout):
+        await elro_connects_api.async_command(TEST_ALARM, timeout=0.05, device_ID=1)
+    assert k1.commands == []
+    k1.responding.set()
+    await refresh
+    assert elro_connects_api.last_update_success
+
+    # A hanging request closes the session, but does not back off polling
+    k1.responding.clear()
+    mock_k1_connector["configure"].reset_mock()
+    with pytest.raises(K1CommandTimeout):
+        await elro_connects_api.async_command(TEST_ALARM, timeout=0.05, device_ID=1)
+    assert k1.commands == [1]
+    mock_k1_connector["configure"].assert_called_once()
+    assert elro_connects_api.metrics.retries == 0
+    assert elro_connects_api.connection.allow_request()
+
+
+async def test_cancel_queued_commands(
+    hass: HomeAssistant,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test queued commands are cancelled on entity removal and unload."""
+    mock_k1_connector["result"].return_value = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    elro_connects_api: ElroConnectsK1 = hass.data[DOMAIN][mock_entry.entry_id]
+    k1 = HangingK1()
+    mock_k1_connector["result"].side_effect = k1.async_process_command
+    refresh = hass.async_create_task(elro_connects_api.async_refresh())
+    await k1.requested.wait()
+
+    async def _async_queued(command: asyncio.Task) -> asyncio.Task:
+        while not elro_connects_api._pending_commands:
+            await asyncio.sleep(0)
+        return command
+
+    # The command of a removed entity is not sent
+    turn_on = await _async_queued(
+        hass.async_create_task(
+            hass.services.async_call(
+                siren.DOMAIN,
+                SERVICE_TURN_ON,
+                {ATTR_ENTITY_ID: "siren.beganegrond_fire_alarm"},
+                blocking=True,
+            )
+        )
+    )
+    er.async_get(hass).async_remove("siren.beganegrond_fire_alarm")
+    with pytest.raises(K1CommandCancelled):
+        await turn_on
+
+    # All queued commands are cancelled on unload
+    command = await _async_queued(
+        hass.async_create_task(elro_connects_api.async_command(TEST_ALARM, device_ID=2))
+    )
+    assert await hass.config_entries.async_unload(mock_entry.entry_id)
+    with pytest.raises(K1CommandCancelled):
+        await command
+    k1.responding.set()
+    await refresh
+    assert k1.commands == []
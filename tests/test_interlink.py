@@ -0,0 +1,221 @@
+"""Test the Elro Connects alarm interlink."""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+from datetime import timedelta
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+from elro.command import Command, CommandAttributes
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST, CONF_PORT
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_capture_events,
+    async_fire_time_changed,
+)
+
+from custom_components.elro_connects.const import (
+    CONF_CONNECTOR_ID,
+    CONF_INTERLINK,
+    DOMAIN,
+    EVENT_INTERLINK,
+)
+from custom_components.elro_connects.device import ElroConnectsK1
+
+from .test_common import MOCK_DEVICE_STATUS_DATA
+
+
+async def test_interlink(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test an alarm sounds the sirens of all interlinked connectors."""
+    hass.config_entries.async_update_entry(mock_entry, options={CONF_INTERLINK: True})
+    for index, interlink in ((1, True), (2, False)):
+        MockConfigEntry(
+            domain=DOMAIN,
+            data={
+                CONF_HOST: f"1.1.1.{index + 1}",
+                CONF_CONNECTOR_ID: f"ST_deadbeef000{index}",
+                CONF_PORT: 1025,
+            },
+            options={CONF_INTERLINK: interlink},
+        ).add_to_hass(hass)
+
+    status_data: dict[str, dict[int, dict]] = {}
+    commands: list[tuple[str, int, str]] = []
+
+    async def _process_command(
+        self: ElroConnectsK1, attributes: CommandAttributes, **argv: Any
+    ) -> dict[int, dict]:
+        data = status_data.setdefault(
+            self.connector_id, copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+        )
+        if attributes["cmd_id"] != Command.EQUIPMENT_CONTROL:
+            return copy.deepcopy(data)
+        commands.append(
+            (
+                self.connector_id,
+                argv["device_ID"],
+                attributes["additional_attributes"]["device_status"],
+            )
+        )
+        return {}
+
+    events = async_capture_events(hass, EVENT_INTERLINK)
+    with patch.object(ElroConnectsK1, "async_process_command", _process_command):
+        assert await async_setup_component(hass, DOMAIN, {})
+        await hass.async_block_till_done(wait_background_tasks=True)
+
+        # The alarms that are already going off when the interlinked connectors
+        # are set up are propagated
+        assert {event.data["connector_id"] for event in events} == {
+            "ST_deadbeef0000",
+            "ST_deadbeef0001",
+        }
+        assert {event.data["device_id"] for event in events} == {2}
+        # The sirens of a connector are reached once its first poll finished
+        assert ("ST_deadbeef0000", 1, "17000000") in commands
+        assert {(device_id, status) for _, device_id, status in commands} == {
+            (1, "17000000")
+        }
+        commands.clear()
+        events.clear()
+
+        # A fire alarm goes off on the first connector
+        status_data["ST_deadbeef0000"][1]["device_state"] = "FIRE ALARM"
+        freezer.tick(timedelta(seconds=30))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done(wait_background_tasks=True)
+
+        # Only the sirens of the interlinked connectors that are not in alarm,
+        # offline or in an unknown state sound
+        assert commands == [("ST_deadbeef0001", 1, "17000000")]
+        assert len(events) == 1
+        assert events[0].data["connector_id"] == "ST_deadbeef0000"
+        assert events[0].data["device_id"] == 1
+        assert events[0].data["latency"] >= 0
+        assert events[0].data["targets"] == [
+            {
+                "connector_id": "ST_deadbeef0001",
+                "device_id": 1,
+                "latency": events[0].data["latency"],
+            }
+        ]
+
+        # The test alarm of the interlinked siren is not propagated
+        status_data["ST_deadbeef0001"][1]["device_state"] = "TEST ALARM"
+        freezer.tick(timedelta(seconds=30))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done(wait_background_tasks=True)
+        assert len(commands) == 1
+        assert len(events) == 1
+
+        # An alarm on a connector that is not interlinked is not propagated
+        status_data["ST_deadbeef0002"][1]["device_state"] = "FIRE ALARM"
+        freezer.tick(timedelta(seconds=30))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done(wait_background_tasks=True)
+        assert len(commands) == 1
+        assert len(events) == 1
+
+        # An opened window is not propagated
+        status_data["ST_deadbeef0000"][9] = {
+            "device_type": "DOOR_WINDOW_SENSOR",
+            "signal": 3,
+            "battery": 100,
+            "device_state": "CLOSED",
+            "device_status_data": {
+                "cmdId": 19,
+                "device_ID": 9,
+                "device_name": "0101",
+                "device_status": "0364AAFF",
+            },
+            "device_value": "0xff",
+            "device_value_data": 1,
+            "name": "Window",
+        }
+        for device_state in ("CLOSED", "ALARM"):
+            status_data["ST_deadbeef0000"][9]["device_state"] = device_state
+            freezer.tick(timedelta(seconds=30))
+            async_fire_time_changed(hass)
+            await hass.async_block_till_done(wait_background_tasks=True)
+        assert hass.data[DOMAIN][mock_entry.entry_id].data[9]["device_state"] == "ALARM"
+        assert len(commands) == 1
+        assert len(events) == 1
+
+
+async def test_interlink_unreachable_connector(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test a connector that does not respond does not hold up the others."""
+    hass.config_entries.async_update_entry(mock_entry, options={CONF_INTERLINK: True})
+    for index in (1, 2):
+        MockConfigEntry(
+            domain=DOMAIN,
+            data={
+                CONF_HOST: f"1.1.1.{index + 1}",
+                CONF_CONNECTOR_ID: f"ST_deadbeef000{index}",
+                CONF_PORT: 1025,
+            },
+            options={CONF_INTERLINK: True},
+        ).add_to_hass(hass)
+
+    status_data: dict[str, dict[int, dict]] = {}
+    commands: list[tuple[str, int]] = []
+    responding = asyncio.Event()
+    # Device 2 is not in alarm, so no alarm is propagated at setup
+    normal_status_data = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    normal_status_data[2]["device_state"] = "NORMAL"
+
+    async def _process_command(
+        self: ElroConnectsK1, attributes: CommandAttributes, **argv: Any
+    ) -> dict[int, dict]:
+        # Like the K1 library the lock is held until the K1 responds
+        async with self._lock:
+            data = status_data.setdefault(
+                self.connector_id, copy.deepcopy(normal_status_data)
+            )
+            if attributes["cmd_id"] != Command.EQUIPMENT_CONTROL:
+                return copy.deepcopy(data)
+            if self.connector_id == "ST_deadbeef0000":
+                await responding.wait()
+            commands.append((self.connector_id, argv["device_ID"]))
+            return {}
+
+    events = async_capture_events(hass, EVENT_INTERLINK)
+    with patch.object(ElroConnectsK1, "async_process_command", _process_command):
+        assert await async_setup_component(hass, DOMAIN, {})
+        await hass.async_block_till_done(wait_background_tasks=True)
+        assert not events
+
+        # The sirens of the other connectors sound while one connector hangs
+        status_data["ST_deadbeef0000"][1]["device_state"] = "FIRE ALARM"
+        freezer.tick(timedelta(seconds=30))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert sorted(commands) == [
+            ("ST_deadbeef0001", 1),
+            ("ST_deadbeef0001", 2),
+            ("ST_deadbeef0002", 1),
+            ("ST_deadbeef0002", 2),
+        ]
+        assert not events
+
+        responding.set()
+        await hass.async_block_till_done(wait_background_tasks=True)
+        assert len(commands) == 5
+        assert len(events) == 1
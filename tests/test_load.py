@@ -0,0 +1,337 @@
+"""Load test for large Elro Connects installations.
+
+The size of the simulated installation is set with environment variables,
+the defaults keep the test fast enough for the regular test run:
+
+    ELRO_LOAD_HUBS=10 ELRO_LOAD_DEVICES=500 ELRO_LOAD_POLLS=40 \
+        pytest tests/test_load.py -s
+
+The report with the event loop lag, state writes and memory usage is
+printed to stdout. The test runs with and without compact sensors, the
+compact run also reports what it saves per 100 devices.
+
+The processing benchmark reports the time the event loop is blocked per
+poll, with the K1 responses processed on the event loop or in an executor.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from homeassistant.const import CONF_HOST, CONF_PORT, EVENT_STATE_CHANGED
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.elro_connects.const import (
+    CONF_COMPACT_SENSORS,
+    CONF_CONNECTOR_ID,
+    CONF_EXECUTOR_PROCESSING,
+    DEFAULT_INTERVAL,
+    DOMAIN,
+)
+from custom_components.elro_connects.device import ElroConnectsK1
+
+from .test_common import generate_device_status_data
+
+LOAD_HUBS = int(os.environ.get("ELRO_LOAD_HUBS", "2"))
+LOAD_DEVICES = int(os.environ.get("ELRO_LOAD_DEVICES", "100"))
+LOAD_POLLS = int(os.environ.get("ELRO_LOAD_POLLS", "10"))
+LOAD_CHANGE_RATE = float(os.environ.get("ELRO_LOAD_CHANGE_RATE", "0.05"))
+
+# Reports of the finished runs by compact mode
+_REPORTS: dict[bool, LoadReport] = {}
+# Coordinator data of the finished benchmark runs by executor mode
+_PROCESSED: dict[bool, dict[int, dict]] = {}
+
+
+class EventLoopLagProbe:
+    """Measure how long the event loop is blocked by other callbacks.
+
+    The probe yields to the event loop and measures the time until it is
+    resumed. Timer based probes can not be used, `async_fire_time_changed`
+    fires pending timers early.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the probe."""
+        self.samples: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    async def _async_probe(self) -> None:
+        """Collect lag samples until cancelled."""
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(0)
+            self.samples.append(time.perf_counter() - started)
+
+    def start(self) -> None:
+        """Start probing, the task is not tracked by Home Assistant."""
+        self._task = asyncio.get_running_loop().create_task(self._async_probe())
+
+    async def async_stop(self) -> None:
+        """Stop probing."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def percentiles(self) -> dict[str, float]:
+        """Return the lag percentiles in milliseconds."""
+        if len(self.samples) < 2:
+            return {}
+        quantiles = statistics.quantiles(self.samples, n=100, method="inclusive")
+        return {
+            "p50": quantiles[49] * 1000,
+            "p95": quantiles[94] * 1000,
+            "p99": quantiles[98] * 1000,
+            "max": max(self.samples) * 1000,
+        }
+
+
+@dataclass
+class LoadReport:
+    """Results of a load test run."""
+
+    hubs: int
+    devices: int
+    polls: int
+    compact: bool = False
+    entities: int = 0
+    setup_time: float = 0.0
+    poll_time: float = 0.0
+    state_writes: int = 0
+    memory: int = 0
+    lag: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def state_writes_per_second(self) -> float:
+        """Return the state writes per second of wall clock time."""
+        return self.state_writes / self.poll_time if self.poll_time else 0.0
+
+    @property
+    def memory_per_entity(self) -> float:
+        """Return the memory allocated per entity during setup."""
+        return self.memory / self.entities if self.entities else 0.0
+
+    def per_100_devices(self, value: float) -> float:
+        """Return a value scaled to 100 devices."""
+        return value * 100 / (self.hubs * self.devices)
+
+    def savings(self, full: LoadReport) -> str:
+        """Return what this report saves per 100 devices compared to another."""
+        entities = self.per_100_devices(full.entities - self.entities)
+        memory = self.per_100_devices(full.memory - self.memory) / 1024
+        writes = self.per_100_devices(full.state_writes - self.state_writes)
+        return "\n".join(
+            (
+                "  saved per 100 devices:",
+                f"    registry entries:  {entities:.0f}",
+                f"    memory:            {memory:.0f} KiB",
+                f"    recorder writes:   {writes:.0f} in {self.polls} polls",
+            )
+        )
+
+    def __str__(self) -> str:
+        """Return the report as text."""
+        lag = ", ".join(f"{key} {value:.2f} ms" for key, value in self.lag.items())
+        mode = "compact sensors" if self.compact else "all sensors"
+        size = f"{self.hubs} hubs x {self.devices} devices"
+        return "\n".join(
+            (
+                f"Elro Connects load test: {size}, {mode}",
+                f"  simulated period:    {self.polls * DEFAULT_INTERVAL} s",
+                f"  entities:            {self.entities}",
+                f"  setup time:          {self.setup_time:.2f} s",
+                f"  poll time:           {self.poll_time:.2f} s",
+                f"  event loop lag:      {lag}",
+                f"  state writes:        {self.state_writes}",
+                f"  state writes/s:      {self.state_writes_per_second:.0f}",
+                f"  memory per entity:   {self.memory_per_entity / 1024:.1f} KiB",
+                f"  memory:              {self.memory / 1024:.0f} KiB",
+            )
+        )
+
+
+@pytest.mark.parametrize("compact", [False, True], ids=["all", "compact"])
+async def test_load(
+    hass: HomeAssistant,
+    mock_k1_connector: dict[AsyncMock],
+    compact: bool,
+) -> None:
+    """Test the integration with many hubs and devices."""
+    report = LoadReport(LOAD_HUBS, LOAD_DEVICES, LOAD_POLLS, compact)
+    mock_k1_connector["result"].return_value = generate_device_status_data(LOAD_DEVICES)
+    entries: list[MockConfigEntry] = []
+    for hub in range(LOAD_HUBS):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={
+                CONF_HOST: f"10.0.{hub // 256}.{hub % 256}",
+                CONF_CONNECTOR_ID: f"ST_deadbeef{hub:04x}",
+                CONF_PORT: 1025,
+            },
+            options={CONF_COMPACT_SENSORS: compact},
+        )
+        entry.add_to_hass(hass)
+        entries.append(entry)
+
+    # Set up the hubs and measure the memory allocated for the entities
+    tracemalloc.start()
+    started = time.perf_counter()
+    baseline = tracemalloc.take_snapshot()
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    report.setup_time = time.perf_counter() - started
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    report.memory = sum(
+        stat.size_diff for stat in snapshot.compare_to(baseline, "filename")
+    )
+
+    entity_registry = er.async_get(hass)
+    report.entities = sum(
+        len(er.async_entries_for_config_entry(entity_registry, entry.entry_id))
+        for entry in entries
+    )
+    assert report.entities >= LOAD_HUBS * LOAD_DEVICES
+
+    # Drive the polling and measure the event loop lag and state writes
+    @callback
+    def _async_state_changed(event: Event) -> None:
+        report.state_writes += 1
+
+    unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, _async_state_changed)
+    probe = EventLoopLagProbe()
+    probe.start()
+    started = time.perf_counter()
+    now = dt.now()
+    for poll in range(1, LOAD_POLLS + 1):
+        mock_k1_connector["result"].return_value = generate_device_status_data(
+            LOAD_DEVICES, poll, LOAD_CHANGE_RATE
+        )
+        async_fire_time_changed(hass, now + timedelta(seconds=DEFAULT_INTERVAL * poll))
+        await hass.async_block_till_done()
+    report.poll_time = time.perf_counter() - started
+    await probe.async_stop()
+    unsub()
+    report.lag = probe.percentiles()
+
+    # Every hub polled the connector for every poll
+    assert mock_k1_connector["result"].call_count >= 2 * LOAD_HUBS * (LOAD_POLLS + 1)
+    if LOAD_CHANGE_RATE:
+        assert report.state_writes
+    _REPORTS[compact] = report
+    print(f"\n{report}")
+    if compact and (full := _REPORTS.get(False)) is not None:
+        assert report.entities < full.entities
+        print(report.savings(full))
+
+    for entry in entries:
+        assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@dataclass
+class ProcessingReport:
+    """Event loop time per poll of a processing benchmark run."""
+
+    devices: int
+    polls: int
+    executor: bool
+    update_time: list[float] = field(default_factory=list)
+    poll_time: list[float] = field(default_factory=list)
+
+    @staticmethod
+    def _format(samples: list[float]) -> str:
+        """Return the mean and maximum of samples in milliseconds."""
+        mean = statistics.mean(samples) * 1000
+        return f"mean {mean:.2f} ms, max {max(samples) * 1000:.2f} ms"
+
+    def __str__(self) -> str:
+        """Return the report as text."""
+        mode = "executor" if self.executor else "event loop"
+        return "\n".join(
+            (
+                f"Elro Connects processing benchmark: {self.devices} devices, {mode}",
+                f"  polls:               {self.polls}",
+                f"  update per poll:     {self._format(self.update_time)}",
+                f"  poll per poll:       {self._format(self.poll_time)}",
+            )
+        )
+
+
+@pytest.mark.parametrize("executor", [False, True], ids=["event_loop", "executor"])
+async def test_processing_benchmark(
+    hass: HomeAssistant,
+    mock_k1_connector: dict[AsyncMock],
+    executor: bool,
+) -> None:
+    """Benchmark the event loop time per poll with and without an executor.
+
+    The CPU time of the event loop thread is measured, the time spent in the
+    executor is not. The update is the fetch and processing of the response,
+    the poll also includes the state writes of the entities.
+    """
+    devices = LOAD_HUBS * LOAD_DEVICES
+    report = ProcessingReport(devices, LOAD_POLLS, executor)
+    mock_k1_connector["result"].return_value = generate_device_status_data(devices)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_HOST: "10.0.0.1",
+            CONF_CONNECTOR_ID: "ST_deadbeef0000",
+            CONF_PORT: 1025,
+        },
+        options={CONF_EXECUTOR_PROCESSING: executor},
+    )
+    entry.add_to_hass(hass)
+    update_data = ElroConnectsK1._async_update_data
+
+    async def _async_update_data(self: ElroConnectsK1) -> dict[int, dict]:
+        started = time.thread_time()
+        try:
+            return await update_data(self)
+        finally:
+            report.update_time.append(time.thread_time() - started)
+
+    with patch.object(ElroConnectsK1, "_async_update_data", _async_update_data):
+        assert await async_setup_component(hass, DOMAIN, {})
+        await hass.async_block_till_done()
+        report.update_time.clear()
+
+        now = dt.now()
+        for poll in range(1, LOAD_POLLS + 1):
+            mock_k1_connector["result"].return_value = generate_device_status_data(
+                devices, poll, LOAD_CHANGE_RATE
+            )
+            started = time.thread_time()
+            async_fire_time_changed(
+                hass, now + timedelta(seconds=DEFAULT_INTERVAL * poll)
+            )
+            # The polls wait for the executor in a background task
+            await hass.async_block_till_done(wait_background_tasks=True)
+            report.poll_time.append(time.thread_time() - started)
+
+    assert len(report.update_time) == LOAD_POLLS
+    print(f"\n{report}")
+    elro_connects_api = hass.data[DOMAIN][entry.entry_id]
+    _PROCESSED[executor] = elro_connects_api.data
+    # Both modes process the responses to the same data
+    if executor and (processed := _PROCESSED.get(False)) is not None:
+        assert elro_connects_api.data == processed
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
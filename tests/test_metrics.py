@@ -0,0 +1,90 @@
+"""Test the Elro Connects Prometheus metrics."""
+
+from __future__ import annotations
+
+import copy
+from unittest.mock import AsyncMock
+
+from elro.command import TEST_ALARM
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.typing import ClientSessionGenerator
+
+from custom_components.elro_connects.const import DOMAIN
+from custom_components.elro_connects.metrics import K1Metrics
+
+from .test_common import MOCK_DEVICE_STATUS_DATA
+
+
+async def test_metrics_view(
+    hass: HomeAssistant,
+    hass_client: ClientSessionGenerator,
+    hass_client_no_auth: ClientSessionGenerator,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test the metrics are served in the text exposition format."""
+    mock_k1_connector["result"].return_value = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    elro_connects_api = hass.data[DOMAIN][mock_entry.entry_id]
+    await elro_connects_api.async_command(TEST_ALARM, device_ID=1)
+
+    client = await hass_client_no_auth()
+    response = await client.get("/api/elro_connects/metrics")
+    assert response.status == 401
+
+    client = await hass_client()
+    response = await client.get("/api/elro_connects/metrics")
+    assert response.status == 200
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    samples = {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+        for line in (await response.text()).splitlines()
+        if not line.startswith("#")
+    }
+    label = '{connector_id="ST_deadbeef0000"}'
+    assert samples[f"elro_connects_up{label}"] == 1
+    assert samples[f"elro_connects_polls_total{label}"] == 1
+    assert samples[f"elro_connects_poll_duration_seconds_count{label}"] == 1
+    assert samples[f"elro_connects_command_duration_seconds_count{label}"] == 1
+    # Two requests per poll and one for the command
+    assert samples[f"elro_connects_request_duration_seconds_count{label}"] == 3
+    # The warm up, the poll and the command
+    assert samples[f"elro_connects_lock_wait_seconds_count{label}"] == 3
+    assert samples[f"elro_connects_retries_total{label}"] == 0
+    assert samples[f"elro_connects_stale_devices{label}"] == 0
+    assert samples[f"elro_connects_suppressed_writes_total{label}"] == 0
+    device_counts = {
+        key: value
+        for key, value in samples.items()
+        if key.startswith("elro_connects_devices{")
+    }
+    assert sum(device_counts.values()) == len(elro_connects_api.data)
+    assert all(',state="' in key for key in device_counts)
+
+
+def test_device_states_are_counted_incrementally() -> None:
+    """Test only the changed and pruned devices are counted again."""
+    metrics = K1Metrics()
+    devices = {
+        1: {"device_state": "NORMAL"},
+        2: {"device_state": "NORMAL"},
+        3: {"device_state": "FIRE ALARM"},
+    }
+    metrics.update_devices(devices, devices)
+    assert metrics.device_states == {"NORMAL": 2, "FIRE ALARM": 1}
+
+    # Devices that did not change are not counted again
+    devices[1] = {"device_state": "FIRE ALARM"}
+    devices[2] = {"device_state": "OFFLINE"}
+    metrics.update_devices(devices, {1})
+    assert metrics.device_states == {"NORMAL": 1, "FIRE ALARM": 2}
+
+    metrics.update_devices(devices, {2, 3})
+    assert metrics.device_states == {"OFFLINE": 1, "FIRE ALARM": 2}
+
+    metrics.remove_devices({2, 4})
+    assert metrics.device_states == {"FIRE ALARM": 2}
+    assert "OFFLINE" not in metrics.device_states
@@ -0,0 +1,93 @@
+"""Test the Elro Connects poll profiler."""
+
+from __future__ import annotations
+
+import copy
+import pstats
+import sys
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import pytest
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.elro_connects.const import DOMAIN
+
+from .test_common import MOCK_DEVICE_STATUS_DATA
+
+
+async def test_profile_service(
+    hass: HomeAssistant,
+    tmp_path: Path,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test profiling the next poll cycles."""
+    hass.config.config_dir = str(tmp_path)
+    mock_k1_connector["result"].return_value = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+
+    response = await hass.services.async_call(
+        DOMAIN, "profile", {"cycles": 2}, blocking=True, return_response=True
+    )
+    assert response["connectors"] == ["ST_deadbeef0000"]
+    assert response["cycles"] == 2
+
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN, "profile", {"connector_id": "ST_deadbeef0000"}, blocking=True
+        )
+
+    for seconds, device_state in ((30, "FIRE ALARM"), (60, "NORMAL")):
+        updated_status_data = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+        updated_status_data[1]["device_state"] = device_state
+        mock_k1_connector["result"].return_value = updated_status_data
+        async_fire_time_changed(hass, dt.now() + timedelta(seconds=seconds))
+        await hass.async_block_till_done()
+    assert hass.data[DOMAIN][mock_entry.entry_id].profiler is None
+
+    stats = pstats.Stats(response["stats"])
+    assert any(function == "_async_update_data" for _, _, function in stats.stats)
+    summary = Path(response["summary"]).read_text()
+    for stage in ("cycle", "fetch", "process", "dispatch", "listeners"):
+        assert f"\n{stage} " in summary
+
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN, "profile", {"connector_id": "ST_unknown"}, blocking=True
+        )
+
+
+async def test_profile_service_cprofile_unavailable(
+    hass: HomeAssistant,
+    tmp_path: Path,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test only the summary is written when another profiler is active."""
+    hass.config.config_dir = str(tmp_path)
+    mock_k1_connector["result"].return_value = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+
+    sys.monitoring.use_tool_id(sys.monitoring.PROFILER_ID, "other profiler")
+    try:
+        response = await hass.services.async_call(
+            DOMAIN, "profile", {"cycles": 1}, blocking=True, return_response=True
+        )
+        assert response["stats"] is None
+        async_fire_time_changed(hass, dt.now() + timedelta(seconds=30))
+        await hass.async_block_till_done()
+    finally:
+        sys.monitoring.free_tool_id(sys.monitoring.PROFILER_ID)
+    assert hass.data[DOMAIN][mock_entry.entry_id].profiler is None
+
+    assert not list(tmp_path.glob("*.prof"))
+    assert "\ncycle " in Path(response["summary"]).read_text()
@@ -0,0 +1,254 @@
+"""Test the Elro Connects bulk provisioning."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from homeassistant.const import CONF_API_KEY, CONF_HOST, CONF_PORT
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.elro_connects.config_flow import K1ConnectionTest
+from custom_components.elro_connects.const import CONF_CONNECTOR_ID, DOMAIN
+
+from .test_common import MOCK_AUTH_RESPONSE, MOCK_DEVICE_RESPONSE
+
+
+@pytest.fixture
+def mock_connection_test() -> dict[str, int]:
+    """Mock the K1 connection test, ST_deadbeef0003 can not be reached."""
+    tests = {"running": 0, "max_running": 0, "count": 0}
+
+    async def _async_try_connection(
+        self: K1ConnectionTest,
+        connector_id: str,
+        port: int,
+        api_key: str | None = None,
+    ) -> bool:
+        tests["count"] += 1
+        tests["running"] += 1
+        tests["max_running"] = max(tests["max_running"], tests["running"])
+        await asyncio.sleep(0.01)
+        tests["running"] -= 1
+        return connector_id != "ST_deadbeef0003"
+
+    with (
+        patch.object(K1ConnectionTest, "async_try_connection", _async_try_connection),
+        patch(
+            "custom_components.elro_connects.async_setup_entry",
+            return_value=True,
+        ),
+        patch(
+            "elro.auth.ElroConnectsSession._async_get_domain",
+            AsyncMock(return_value="hekr.me"),
+        ),
+    ):
+        yield tests
+
+
+async def test_import_connectors(
+    hass: HomeAssistant,
+    mock_connection_test: dict[str, int],
+    mock_get: AsyncMock,
+    mock_post: AsyncMock,
+) -> None:
+    """Test importing K1 connectors in bulk."""
+    mock_post.return_value.__aenter__.return_value.json = AsyncMock(
+        side_effect=[MOCK_AUTH_RESPONSE]
+    )
+    mock_get.return_value.__aenter__.return_value.json = AsyncMock(
+        side_effect=[MOCK_DEVICE_RESPONSE]
+    )
+    MockConfigEntry(
+        domain=DOMAIN,
+        unique_id="ST_deadbeef0004",
+        data={
+            CONF_HOST: "1.1.1.4",
+            CONF_CONNECTOR_ID: "ST_deadbeef0004",
+            CONF_PORT: 1025,
+        },
+    ).add_to_hass(hass)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+
+    connectors = [
+        {CONF_HOST: "1.1.1.1", CONF_CONNECTOR_ID: "ST_deadbeef0000"},
+        {CONF_HOST: "1.1.1.2", CONF_CONNECTOR_ID: "ST_deadbeef0002", CONF_API_KEY: "k"},
+        {CONF_HOST: "1.1.1.3", CONF_CONNECTOR_ID: "ST_deadbeef0003"},
+        {CONF_HOST: "1.1.1.4", CONF_CONNECTOR_ID: "ST_deadbeef0004"},
+        {CONF_HOST: "1.1.1.5", CONF_CONNECTOR_ID: "ST_deadbeef0000"},
+        {CONF_HOST: "1.1.1.6"},
+    ] + [
+        {CONF_HOST: f"1.1.2.{index}", CONF_CONNECTOR_ID: f"ST_deadbeef01{index:02}"}
+        for index in range(10)
+    ]
+    report = await hass.services.async_call(
+        DOMAIN,
+        "import_connectors",
+        {
+            "connectors": connectors,
+            "username": "user",
+            "password": "pass",
+            "concurrency": 3,
+        },
+        blocking=True,
+        return_response=True,
+    )
+    assert {result: report[result] for result in report if result != "rows"} == {
+        "created": 12,
+        "already_configured": 1,
+        "duplicate": 1,
+        "invalid": 1,
+        "cannot_connect": 1,
+        "error": 0,
+    }
+    rows = report["rows"]
+    assert [row["result"] for row in rows[:6]] == [
+        "created",
+        "created",
+        "cannot_connect",
+        "already_configured",
+        "duplicate",
+        "invalid",
+    ]
+    assert rows[0] == {
+        "row": 1,
+        CONF_HOST: "1.1.1.1",
+        CONF_CONNECTOR_ID: "ST_deadbeef0000",
+        "result": "created",
+    }
+    assert rows[5]["error"]
+
+    # The connection tests run in parallel with bounded concurrency
+    assert mock_connection_test["count"] == 13
+    assert mock_connection_test["max_running"] == 3
+    # One cloud login for all connectors
+    assert mock_post.call_count == 1
+
+    entries = {
+        entry.unique_id: entry for entry in hass.config_entries.async_entries(DOMAIN)
+    }
+    assert len(entries) == 13
+    assert entries["ST_deadbeef0000"].data == {
+        CONF_HOST: "1.1.1.1",
+        CONF_CONNECTOR_ID: "ST_deadbeef0000",
+        CONF_PORT: 1025,
+        CONF_API_KEY: "deadbeefdeadbeefdeadbeefdeadbeef",
+    }
+    assert entries["ST_deadbeef0002"].data[CONF_API_KEY] == "k"
+
+
+async def test_import_connectors_from_file(
+    hass: HomeAssistant,
+    tmp_path: Path,
+    mock_connection_test: dict[str, int],
+) -> None:
+    """Test importing K1 connectors from a CSV file."""
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    hass.config.config_dir = str(config_dir)
+    rows = (
+        "host,connector_id,api_key,port\n"
+        "1.1.1.1,ST_deadbeef0000,,1024\n"
+        "1.1.1.2,ST_deadbeef0001,deadbeef,\n"
+    )
+    (config_dir / "elro_connects.csv").write_text(rows, encoding="utf-8")
+    # Files outside the configuration directory are not read
+    (tmp_path / "outside.csv").write_text(rows, encoding="utf-8")
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+
+    report = await hass.services.async_call(
+        DOMAIN,
+        "import_connectors",
+        {"path": "elro_connects.csv"},
+        blocking=True,
+        return_response=True,
+    )
+    assert report["created"] == 2
+    entries = {
+        entry.unique_id: entry for entry in hass.config_entries.async_entries(DOMAIN)
+    }
+    assert entries["ST_deadbeef0000"].data == {
+        CONF_HOST: "1.1.1.1",
+        CONF_CONNECTOR_ID: "ST_deadbeef0000",
+        CONF_PORT: 1024,
+    }
+    assert entries["ST_deadbeef0001"].data[CONF_API_KEY] == "deadbeef"
+
+    for path in ("missing.csv", "../outside.csv"):
+        with pytest.raises(ServiceValidationError):
+            await hass.services.async_call(
+                DOMAIN,
+                "import_connectors",
+                {"path": path},
+                blocking=True,
+                return_response=True,
+            )
+
+
+async def test_import_connectors_cloud_login_failed(
+    hass: HomeAssistant,
+    mock_connection_test: dict[str, int],
+) -> None:
+    """Test a failed cloud login is reported for the rows without an API key."""
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+
+    with patch(
+        "elro.auth.ElroConnectsSession.async_login",
+        side_effect=Exception("Invalid credentials"),
+    ):
+        report = await hass.services.async_call(
+            DOMAIN,
+            "import_connectors",
+            {
+                "connectors": [
+                    {CONF_HOST: "1.1.1.1", CONF_CONNECTOR_ID: "ST_deadbeef0000"},
+                    {
+                        CONF_HOST: "1.1.1.2",
+                        CONF_CONNECTOR_ID: "ST_deadbeef0001",
+                        CONF_API_KEY: "k",
+                    },
+                ],
+                "username": "user",
+                "password": "wrong",
+            },
+            blocking=True,
+            return_response=True,
+        )
+    assert (report["created"], report["error"]) == (1, 1)
+    assert report["rows"][0]["result"] == "error"
+    assert "Invalid credentials" in report["rows"][0]["error"]
+    assert mock_connection_test["count"] == 1
+
+
+async def test_connection_tests_run_in_parallel(hass: HomeAssistant) -> None:
+    """Test connection tests do not wait for each other."""
+
+    async def _create_datagram_endpoint(*args, **kwargs) -> tuple:
+        # The K1 never responds
+        return MagicMock(), MagicMock()
+
+    started = time.monotonic()
+    with (
+        patch("elro.api.TIME_OUT", 0.2),
+        patch.object(hass.loop, "create_datagram_endpoint", _create_datagram_endpoint),
+    ):
+        results = await asyncio.gather(
+            *(
+                K1ConnectionTest(f"1.1.1.{index}").async_try_connection(
+                    f"ST_deadbeef000{index}", 1025
+                )
+                for index in range(5)
+            )
+        )
+    assert results == [False] * 5
+    # Serial connection tests would take 1 s
+    assert time.monotonic() - started < 0.6
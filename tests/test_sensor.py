@@ -0,0 +1,226 @@
+"""Test the Elro Connects sensor platform."""
+
+from __future__ import annotations
+
+import copy
+from datetime import timedelta
+from unittest.mock import AsyncMock
+
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.elro_connects.const import (
+    CONF_COMPACT_SENSORS,
+    DEFAULT_INTERVAL,
+    DOMAIN,
+)
+from custom_components.elro_connects.device import process_response
+
+from .test_common import MOCK_DEVICE_STATUS_DATA
+
+
+async def test_compact_sensors(
+    hass: HomeAssistant,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test battery and signal are device state attributes in compact mode."""
+    mock_k1_connector["result"].return_value = MOCK_DEVICE_STATUS_DATA
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    entity_registry = er.async_get(hass)
+    assert entity_registry.async_get("sensor.beganegrond_battery")
+    assert entity_registry.async_get("sensor.beganegrond_signal")
+    entities = len(
+        er.async_entries_for_config_entry(entity_registry, mock_entry.entry_id)
+    )
+
+    # Changing the mode reloads the config entry
+    hass.config_entries.async_update_entry(
+        mock_entry, options={CONF_COMPACT_SENSORS: True}
+    )
+    await hass.async_block_till_done()
+    assert entity_registry.async_get("sensor.beganegrond_battery") is None
+    assert entity_registry.async_get("sensor.beganegrond_signal") is None
+    assert hass.states.get("sensor.beganegrond_battery") is None
+    state = hass.states.get("sensor.beganegrond_device_state")
+    assert state.state == "normal"
+    assert state.attributes["battery"] == 100
+    assert state.attributes["signal"] == 75
+    assert (
+        len(er.async_entries_for_config_entry(entity_registry, mock_entry.entry_id))
+        < entities
+    )
+
+    # The sensors are added again when compact mode is disabled
+    hass.config_entries.async_update_entry(
+        mock_entry, options={CONF_COMPACT_SENSORS: False}
+    )
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.beganegrond_battery").state == "100"
+    assert (
+        "battery" not in hass.states.get("sensor.beganegrond_device_state").attributes
+    )
+
+
+async def test_sensor_deadband_and_dwell(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test small battery changes and short signal changes are not written."""
+    # Enable the signal sensor
+    er.async_get(hass).async_get_or_create(
+        "sensor",
+        DOMAIN,
+        "ST_deadbeef0000-1-signal",
+        config_entry=mock_entry,
+        suggested_object_id="beganegrond_signal",
+    )
+    status_data = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    mock_k1_connector["result"].return_value = status_data
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    elro_connects_api = hass.data[DOMAIN][mock_entry.entry_id]
+    assert hass.states.get("sensor.beganegrond_battery").state == "100"
+    signal = hass.states.get("sensor.beganegrond_signal").state
+
+    async def _async_poll(device_id: int = 1, **changes: int) -> None:
+        status_data[device_id].update(changes)
+        mock_k1_connector["result"].return_value = copy.deepcopy(status_data)
+        freezer.tick(timedelta(seconds=30))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+    # A battery change inside the deadband is not written
+    await _async_poll(battery=97)
+    assert hass.states.get("sensor.beganegrond_battery").state == "100"
+    assert elro_connects_api.suppressed_writes == 1
+    # Updates of other devices are not counted as suppressed writes
+    for signal_level in (1, 2, 1, 2):
+        await _async_poll(2, signal=signal_level)
+    assert elro_connects_api.polls == 6
+    assert hass.states.get("sensor.beganegrond_battery").state == "100"
+    assert elro_connects_api.suppressed_writes == 1
+    await _async_poll(battery=95)
+    assert hass.states.get("sensor.beganegrond_battery").state == "95"
+
+    # A signal change is only written after the minimum dwell time
+    await _async_poll(signal=2)
+    assert hass.states.get("sensor.beganegrond_signal").state == signal
+    await _async_poll(signal=3)
+    assert hass.states.get("sensor.beganegrond_signal").state == signal
+    await _async_poll(signal=2)
+    assert hass.states.get("sensor.beganegrond_signal").state == signal
+    suppressed_writes = elro_connects_api.suppressed_writes
+    assert suppressed_writes > 1
+
+    # Unchanged polls do not update the entities, the pending value is
+    # written when the dwell time has passed
+    freezer.tick(timedelta(minutes=5))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert float(hass.states.get("sensor.beganegrond_signal").state) == (
+        float(signal) * 2 / 3
+    )
+    assert elro_connects_api.suppressed_writes == suppressed_writes
+
+
+async def test_compact_sensor_deadband_and_dwell(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test the compact mode attributes have the same deadband and dwell time."""
+    entity_id = "sensor.beganegrond_device_state"
+    hass.config_entries.async_update_entry(
+        mock_entry, options={CONF_COMPACT_SENSORS: True}
+    )
+    status_data = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    mock_k1_connector["result"].return_value = status_data
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    elro_connects_api = hass.data[DOMAIN][mock_entry.entry_id]
+    assert hass.states.get(entity_id).attributes["battery"] == 100
+    assert hass.states.get(entity_id).attributes["signal"] == 75
+
+    async def _async_poll(**changes: int | str) -> None:
+        status_data[1].update(changes)
+        mock_k1_connector["result"].return_value = copy.deepcopy(status_data)
+        freezer.tick(timedelta(seconds=30))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+    # A battery change inside the deadband is not written
+    await _async_poll(battery=97)
+    assert hass.states.get(entity_id).attributes["battery"] == 100
+    assert elro_connects_api.suppressed_writes == 1
+    await _async_poll(battery=95)
+    assert hass.states.get(entity_id).attributes["battery"] == 95
+
+    # A signal change is only written after the minimum dwell time, the
+    # state is written right away
+    await _async_poll(signal=2, device_state="FIRE ALARM")
+    state = hass.states.get(entity_id)
+    assert state.state == "fire_alarm"
+    assert state.attributes["signal"] == 75
+    assert elro_connects_api.suppressed_writes == 2
+    freezer.tick(timedelta(minutes=5))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert hass.states.get(entity_id).attributes["signal"] == 50
+
+
+async def test_hub_aggregate_sensors(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test the K1 connector counts the devices in alarm, offline or low."""
+    status = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    # An open window sensor reports an alarm
+    status[9] = copy.deepcopy(status[1])
+    status[9].update(device_type="DOOR_WINDOW_SENSOR", device_state="ALARM")
+    mock_k1_connector["result"].return_value = copy.deepcopy(status)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+
+    def _aggregate(name: str) -> tuple[str, list[int]]:
+        state = hass.states.get(f"sensor.elro_connects_k1_st_deadbeef0000_{name}")
+        return state.state, state.attributes["device_ids"]
+
+    assert _aggregate("devices_in_alarm") == ("1", [2])
+    assert _aggregate("devices_with_low_battery") == ("1", [4])
+    assert _aggregate("offline_devices") == ("1", [5])
+
+    # Only the devices that changed are tested again
+    status[1]["battery"] = 10
+    status[2]["device_state"] = "NORMAL"
+    status[5]["signal"] = 1
+    elro_connects_api = hass.data[DOMAIN][mock_entry.entry_id]
+    processed = process_response(elro_connects_api.data, copy.deepcopy(status), None)
+    assert processed.changed == {1, 2}
+
+    async def _async_poll() -> None:
+        mock_k1_connector["result"].return_value = copy.deepcopy(status)
+        freezer.tick(timedelta(seconds=DEFAULT_INTERVAL))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+    await _async_poll()
+    assert _aggregate("devices_in_alarm") == ("0", [])
+    assert _aggregate("devices_with_low_battery") == ("2", [1, 4])
+    assert _aggregate("offline_devices") == ("1", [5])
+
+    # A test alarm is not counted
+    status[1]["device_state"] = "TEST ALARM"
+    await _async_poll()
+    assert elro_connects_api.data[1]["device_state"] == "TEST ALARM"
+    assert _aggregate("devices_in_alarm") == ("0", [])
@@ -2,10 +2,13 @@
 
 from __future__ import annotations
 
+import copy
+from datetime import timedelta
 from unittest.mock import AsyncMock
 
 import pytest
 from elro.command import Command
+from freezegun.api import FrozenDateTimeFactory
 from homeassistant.components import siren
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
@@ -18,8 +21,9 @@ from homeassistant.const import (
 )
 from homeassistant.core import HomeAssistant
 from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
 
-from custom_components.elro_connects.const import DOMAIN
+from custom_components.elro_connects.const import DEFAULT_INTERVAL, DOMAIN
 
 from .test_common import MOCK_DEVICE_STATUS_DATA
 
@@ -129,3 +133,30 @@ async def test_alarm_testing(
         == "00000000"
     )
     assert mock_k1_connector["result"].call_args[1] == {"device_ID": 1}
+
+
+async def test_real_alarm_overrules_optimistic_state(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test an alarm reported after a silence command is not hidden."""
+    entity_id = "siren.beganegrond_fire_alarm"
+    mock_k1_connector["result"].return_value = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+
+    await hass.services.async_call(
+        siren.DOMAIN, SERVICE_TURN_OFF, {ATTR_ENTITY_ID: entity_id}, blocking=True
+    )
+    assert hass.states.get(entity_id).state == STATE_OFF
+
+    # The fire alarm goes off before the K1 confirms the silence command
+    status_alarm = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    status_alarm[1]["device_state"] = "FIRE ALARM"
+    mock_k1_connector["result"].return_value = status_alarm
+    freezer.tick(timedelta(seconds=DEFAULT_INTERVAL))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert hass.states.get(entity_id).state == STATE_ON
@@ -2,10 +2,13 @@
 
 from __future__ import annotations
 
+import copy
+from datetime import timedelta
 from unittest.mock import AsyncMock
 
 import pytest
 from elro.command import Command
+from freezegun.api import FrozenDateTimeFactory
 from homeassistant.components import switch
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
@@ -17,8 +20,10 @@ from homeassistant.const import (
 )
 from homeassistant.core import HomeAssistant
 from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
 
-from custom_components.elro_connects.const import DOMAIN
+from custom_components.elro_connects.const import DEFAULT_INTERVAL, DOMAIN
+from custom_components.elro_connects.device import OPTIMISTIC_TIMEOUT
 
 from .test_common import MOCK_DEVICE_STATUS_DATA
 
@@ -116,3 +121,56 @@ async def test_socket_testing(
         == "01000000"
     )
     assert mock_k1_connector["result"].call_args[1] == {"device_ID": 7}
+
+
+async def test_optimistic_state(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test the optimistic state is held until confirmed or expired."""
+    entity_id = "switch.wall_switch_off_socket"
+    status_off = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    status_on = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    status_on[7]["device_status_data"]["device_status"] = "04FF0101"
+    status_on[7]["device_value"] = "on"
+
+    async def _async_poll(status: dict[int, dict]) -> None:
+        mock_k1_connector["result"].return_value = copy.deepcopy(status)
+        freezer.tick(timedelta(seconds=DEFAULT_INTERVAL))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+    mock_k1_connector["result"].return_value = copy.deepcopy(status_off)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    elro_connects_api = hass.data[DOMAIN][mock_entry.entry_id]
+
+    await hass.services.async_call(
+        switch.DOMAIN, SERVICE_TURN_ON, {ATTR_ENTITY_ID: entity_id}, blocking=True
+    )
+    assert hass.states.get(entity_id).state == STATE_ON
+    # The coordinator data is not changed by the command
+    assert elro_connects_api.data[7]["device_value"] == "off"
+
+    # A poll that does not report the new state yet does not flap the state
+    await _async_poll(status_off)
+    assert hass.states.get(entity_id).state == STATE_ON
+
+    # The confirmed state is not held, later changes are shown
+    await _async_poll(status_on)
+    assert hass.states.get(entity_id).state == STATE_ON
+    await _async_poll(status_off)
+    assert hass.states.get(entity_id).state == STATE_OFF
+
+    # A state the K1 never confirms expires, also on unchanged polls
+    mock_k1_connector["result"].return_value = copy.deepcopy(status_off)
+    await hass.services.async_call(
+        switch.DOMAIN, SERVICE_TURN_ON, {ATTR_ENTITY_ID: entity_id}, blocking=True
+    )
+    await _async_poll(status_off)
+    assert hass.states.get(entity_id).state == STATE_ON
+    freezer.tick(OPTIMISTIC_TIMEOUT)
+    await _async_poll(status_off)
+    assert hass.states.get(entity_id).state == STATE_OFF
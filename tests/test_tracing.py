@@ -0,0 +1,104 @@
+"""Test the Elro Connects command and poll tracing."""
+
+from __future__ import annotations
+
+import copy
+import json
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import pytest
+from homeassistant.components import siren
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import ATTR_ENTITY_ID, SERVICE_TURN_OFF
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+
+from custom_components.elro_connects.const import DOMAIN
+from custom_components.elro_connects.tracing import K1Tracer
+
+from .test_common import MOCK_DEVICE_STATUS_DATA
+
+
+async def test_export_trace(
+    hass: HomeAssistant,
+    tmp_path: Path,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test tracing a poll and a command and exporting the trace."""
+    hass.config.config_dir = str(tmp_path)
+    mock_k1_connector["result"].return_value = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+
+    await hass.services.async_call(
+        siren.DOMAIN,
+        SERVICE_TURN_OFF,
+        {ATTR_ENTITY_ID: "siren.beganegrond_fire_alarm"},
+        blocking=True,
+    )
+    response = await hass.services.async_call(
+        DOMAIN, "export_trace", {}, blocking=True, return_response=True
+    )
+    assert response["path"].startswith(str(tmp_path))
+    assert response["spans"]["ST_deadbeef0000"] > 0
+
+    events = json.loads(Path(response["path"]).read_text(encoding="utf-8"))[
+        "traceEvents"
+    ]
+    assert events[0] == {
+        "name": "process_name",
+        "ph": "M",
+        "pid": 1,
+        "args": {"name": "ST_deadbeef0000"},
+    }
+    spans = [event for event in events if event["ph"] == "X"]
+
+    # The stages of the command share the trace of the entity service call
+    root = next(span for span in spans if span["name"] == "siren.turn_off")
+    assert root["args"] == {"entity_id": "siren.beganegrond_fire_alarm"}
+    command = {span["name"]: span for span in spans if span["tid"] == root["tid"]}
+    assert set(command) == {
+        "siren.turn_off",
+        "command",
+        "lock_wait",
+        "request",
+        "state_write",
+    }
+    assert command["command"]["args"] == {
+        "command": "EQUIPMENT_CONTROL",
+        "device_ID": 1,
+    }
+    for name in ("command", "lock_wait", "request", "state_write"):
+        assert command[name]["ts"] >= root["ts"]
+        assert command[name]["ts"] + command[name]["dur"] <= root["ts"] + root["dur"]
+
+    # The stages of the first poll are traced
+    poll = next(span for span in spans if span["name"] == "poll")
+    assert {span["name"] for span in spans if span["tid"] == poll["tid"]} >= {
+        "poll",
+        "fetch",
+        "lock_wait",
+        "request",
+        "process",
+        "dispatch",
+        "listeners",
+    }
+
+
+async def test_tracer_limit_and_errors() -> None:
+    """Test the tracer keeps a bounded number of spans and records errors."""
+    tracer = K1Tracer("ST_deadbeef0000", limit=3)
+    with tracer.span("outer", root=True):
+        with tracer.span("inner"):
+            pass
+        with pytest.raises(ValueError), tracer.span("failed"):
+            raise ValueError
+    with tracer.span("next"):
+        pass
+
+    spans = tracer.spans()
+    assert [span["name"] for span in spans] == ["failed", "outer", "next"]
+    assert spans[0]["args"] == {"error": "ValueError"}
+    assert spans[0]["trace_id"] == spans[1]["trace_id"] != spans[2]["trace_id"]
@@ -0,0 +1,102 @@
+"""Test the Elro Connects websocket API."""
+
+from __future__ import annotations
+
+import copy
+from datetime import timedelta
+from unittest.mock import AsyncMock
+
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+from pytest_homeassistant_custom_component.typing import WebSocketGenerator
+
+from custom_components.elro_connects.const import DOMAIN
+
+from .test_common import MOCK_DEVICE_STATUS_DATA
+
+
+async def test_snapshot(
+    hass: HomeAssistant,
+    hass_ws_client: WebSocketGenerator,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test fetching the snapshot of a K1 connector."""
+    mock_k1_connector["result"].return_value = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    elro_connects_api = hass.data[DOMAIN][mock_entry.entry_id]
+    client = await hass_ws_client(hass)
+
+    await client.send_json_auto_id({"type": "elro_connects/snapshot"})
+    response = await client.receive_json()
+    assert response["success"]
+    connector = response["result"]["connectors"][0]
+    assert connector["connector_id"] == "ST_deadbeef0000"
+    assert connector["last_update_success"] is True
+    devices = {device["device_id"]: device for device in connector["devices"]}
+    assert set(devices) == set(elro_connects_api.data)
+    assert devices[1]["name"] == "Beganegrond"
+    assert devices[1]["device_state"] == elro_connects_api.data[1]["device_state"]
+    assert devices[1]["battery"] == 100
+    assert devices[1]["stale"] is False
+    assert devices[1]["last_update"] is not None
+
+    await client.send_json_auto_id(
+        {"type": "elro_connects/snapshot", "connector_id": "ST_unknown"}
+    )
+    response = await client.receive_json()
+    assert not response["success"]
+    assert response["error"]["code"] == "not_found"
+
+
+async def test_subscribe(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    hass_ws_client: WebSocketGenerator,
+    mock_k1_connector: dict[AsyncMock],
+    mock_entry: ConfigEntry,
+) -> None:
+    """Test a subscription streams only the changed devices."""
+    status_data = copy.deepcopy(MOCK_DEVICE_STATUS_DATA)
+    mock_k1_connector["result"].return_value = copy.deepcopy(status_data)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    elro_connects_api = hass.data[DOMAIN][mock_entry.entry_id]
+    client = await hass_ws_client(hass)
+
+    await client.send_json_auto_id(
+        {"type": "elro_connects/subscribe", "connector_id": "ST_deadbeef0000"}
+    )
+    response = await client.receive_json()
+    assert response["success"]
+    subscription = response["id"]
+    response = await client.receive_json()
+    assert response["id"] == subscription
+    snapshot = response["event"]["connectors"][0]
+    assert len(snapshot["devices"]) == len(elro_connects_api.data)
+
+    # Only the changed and removed devices are sent
+    status_data[1]["device_state"] = "FIRE ALARM"
+    status_data.pop(2)
+    mock_k1_connector["result"].return_value = copy.deepcopy(status_data)
+    freezer.tick(timedelta(seconds=30))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    response = await client.receive_json()
+    delta = response["event"]
+    assert delta["connector_id"] == "ST_deadbeef0000"
+    assert [device["device_id"] for device in delta["devices"]] == [1]
+    assert delta["devices"][0]["device_state"] == "FIRE ALARM"
+    assert delta["removed"] == []
+    assert 2 in elro_connects_api.data
+
+    # Unsubscribing stops the deltas
+    await client.send_json_auto_id(
+        {"type": "unsubscribe_events", "subscription": subscription}
+    )
+    response = await client.receive_json()
+    assert response["success"]